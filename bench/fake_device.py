@@ -0,0 +1,87 @@
+"""Synthetic ESP32 on one end of a pseudo-terminal pair.
+
+The monitor opens FakeDevice.port like a real serial port while a thread writes
+traffic into the master side. Every line or frame carries its sequence number and the
+time.monotonic_ns() at which it was written, so the receiving end can compute
+end-to-end latency and detect loss.
+"""
+import os
+import threading
+import time
+import tty
+
+
+class FakeDevice:
+    """Writes text lines or length-prefixed binary frames at a fixed rate (0 = flood)."""
+
+    def __init__(self, rate=1000, line_length=80, binary=False, burst_interval=0.001):
+        self.rate = rate
+        self.line_length = line_length
+        self.binary = binary
+        self.burst_interval = burst_interval
+        self.sent = 0
+        self.sent_bytes = 0
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)  # No echo or newline translation, like a USB CDC port
+        os.set_blocking(self._master, False)  # A full pty must not wedge stop()
+        self.port = os.ttyname(self._slave)
+        self._running = False
+        self._thread = None
+
+    def encode(self, seq, timestamp):
+        """One message carrying seq and its send timestamp, padded to line_length."""
+        if self.binary:
+            payload = seq.to_bytes(8, "little") + timestamp.to_bytes(8, "little")
+            payload += bytes(range(256)) * (max(0, self.line_length - 18) // 256 + 1)
+            payload = payload[:max(16, self.line_length - 2)]
+            return len(payload).to_bytes(2, "little") + payload
+        head = f"{seq} {timestamp} "
+        return (head + "x" * max(0, self.line_length - len(head) - 1) + "\n").encode()
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="fake-device", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        os.close(self._master)
+        os.close(self._slave)
+
+    def _run(self):
+        started = time.monotonic()
+        while self._running:
+            if self.rate:
+                due = int((time.monotonic() - started) * self.rate) - self.sent
+                if due <= 0:
+                    time.sleep(self.burst_interval)
+                    continue
+            else:
+                due = 64  # Flood: the pty blocks us once the reader falls behind
+            now = time.monotonic_ns()
+            data = b"".join(self.encode(self.sent + index, now) for index in range(due))
+            view = memoryview(data)
+            while view and self._running:
+                try:
+                    written = os.write(self._master, view)
+                except BlockingIOError:
+                    time.sleep(self.burst_interval)
+                    continue
+                except OSError:
+                    return  # The other side went away
+                view = view[written:]
+            # stop() can interrupt a burst; only count messages that went out whole
+            written = len(data) - len(view)
+            self.sent += written // (len(data) // due)
+            self.sent_bytes += written
+
+
+def decode_binary(frame):
+    """Decoder for the monitor side: turns a binary frame back into "seq timestamp"."""
+    return f"{int.from_bytes(frame[:8], 'little')} {int.from_bytes(frame[8:16], 'little')}"
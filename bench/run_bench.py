@@ -0,0 +1,238 @@
+"""End-to-end throughput, latency and memory benchmark against a pty FakeDevice.
+
+Examples:
+    python bench/run_bench.py --rate 5000 --duration 10
+    python bench/run_bench.py --rate 0 --binary                # flood: max sustained throughput
+    python bench/run_bench.py --mode gui --rate 20000          # offscreen Qt, through the flush timer
+    python bench/run_bench.py --sweep --max-p99-ms 100 --json results.json
+
+Latency is measured from the device's write to the moment the line is handed to the
+display (the model insert in GUI mode, the drain in headless mode).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from esp_monitor.framing import make_framer  # noqa: E402
+from esp_monitor.session import SessionManager  # noqa: E402
+from fake_device import FakeDevice, decode_binary  # noqa: E402
+
+
+def rss_bytes():
+    """Resident set size of this process (Linux /proc, else peak RSS from getrusage)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Probe:
+    """Collects per-line latency and loss from displayed lines."""
+
+    def __init__(self):
+        self.latencies = []
+        self.received = 0
+        self.memory = []  # (seconds, rss bytes)
+
+    def observe(self, lines, now=None):
+        now = now or time.monotonic_ns()
+        for line in lines:
+            if line.startswith("["):
+                line = line.split("] ", 1)[-1]  # Display timestamp and/or port prefix
+                if line.startswith("["):
+                    line = line.split("] ", 1)[-1]
+            fields = line.split(" ", 2)
+            if len(fields) < 2 or not fields[0].isdigit() or not fields[1].isdigit():
+                continue  # Status messages and the like
+            self.received += 1
+            self.latencies.append(now - int(fields[1]))
+
+    def percentile(self, fraction):
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] / 1e6
+
+
+class Settle:
+    """After the device stops, wait until the backlog drains (quiet for 0.5 s, at most 10 s)."""
+
+    def __init__(self, probe, quiet=0.5, limit=10.0):
+        self.probe = probe
+        self.quiet = quiet
+        self.deadline = time.monotonic() + limit
+        self._seen = probe.received
+        self._changed = time.monotonic()
+
+    def done(self):
+        now = time.monotonic()
+        if self.probe.received != self._seen:
+            self._seen = self.probe.received
+            self._changed = now
+        return now - self._changed >= self.quiet or now >= self.deadline
+
+
+def run_headless(device, args, probe, started):
+    session = SessionManager()
+    framer = make_framer("length") if args.binary else make_framer("lines")
+    engine = session.add(device.port, args.baud, framer=framer, decoder=decode_binary if args.binary else None)
+    device.start()
+    next_sample = 0.0
+    while True:
+        elapsed = time.monotonic() - started
+        if elapsed >= args.duration:
+            break
+        if elapsed >= next_sample:
+            probe.memory.append((round(elapsed, 3), rss_bytes()))
+            next_sample += 1.0
+        time.sleep(args.poll_interval)
+        lines, _, _ = engine.drain_lines()
+        probe.observe(lines)
+    device.stop()
+    settle = Settle(probe)
+    while not settle.done():
+        time.sleep(args.poll_interval)
+        lines, _, _ = engine.drain_lines()
+        probe.observe(lines)
+    session.close()
+    return session.stats
+
+
+def run_gui(device, args, probe, started):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    from esp_monitor.gui import SerialMonitor
+
+    class ProbedMonitor(SerialMonitor):
+        def append_lines(self, lines, stamps):
+            super().append_lines(lines, stamps)
+            probe.observe(lines)
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    window = ProbedMonitor()
+    window.show()
+    if args.binary:
+        window.framing_selector.setCurrentText("length")
+    window.port_selector.addItem(device.port)
+    window.port_selector.setCurrentText(device.port)
+    window.baud_selector.addItem(str(args.baud))
+    window.baud_selector.setCurrentText(str(args.baud))
+    window.connect_serial()
+    if args.binary:
+        window.session.engines[device.port].decoder = decode_binary
+    device.start()
+    next_sample = 0.0
+    settle = None
+    while True:
+        elapsed = time.monotonic() - started
+        if settle is None and elapsed >= args.duration:
+            device.stop()
+            settle = Settle(probe)
+        if settle is not None and settle.done():
+            break
+        if elapsed >= next_sample:
+            probe.memory.append((round(elapsed, 3), rss_bytes()))
+            next_sample += 1.0
+        app.processEvents()
+        time.sleep(0.001)
+    stats = window.stats
+    window.close()
+    return stats
+
+
+def run_once(args, rate):
+    device = FakeDevice(rate=rate, line_length=args.line_length, binary=args.binary)
+    probe = Probe()
+    rss_before = rss_bytes()
+    started = time.monotonic()
+    try:
+        runner = run_gui if args.mode == "gui" else run_headless
+        stats = runner(device, args, probe, started)
+    finally:
+        device.close()
+    elapsed = args.duration
+    rss_after = rss_bytes()
+    return {
+        "mode": args.mode,
+        "binary": args.binary,
+        "rate": rate,
+        "line_length": args.line_length,
+        "duration": elapsed,
+        "sent": device.sent,
+        "received": probe.received,
+        "lost": device.sent - probe.received,
+        "lines_per_second": probe.received / elapsed,
+        "bytes_per_second": probe.received * args.line_length / elapsed,
+        "latency_ms": {
+            "p50": probe.percentile(0.50),
+            "p99": probe.percentile(0.99),
+            "max": probe.percentile(1.0),
+        },
+        "rss_mb": {
+            "before": rss_before / 1e6,
+            "after": rss_after / 1e6,
+            "growth": (rss_after - rss_before) / 1e6,
+            "samples": [(seconds, rss / 1e6) for seconds, rss in probe.memory],
+        },
+        "pipeline": stats.totals(),
+    }
+
+
+def print_result(result):
+    latency = result["latency_ms"]
+    rate = result["rate"] or "flood"
+    print(f"{result['mode']:>8} rate={rate:<8} sent={result['sent']:<9} received={result['received']:<9} "
+          f"lost={result['lost']:<7} {result['lines_per_second']:>10.0f} lines/s "
+          f"{result['bytes_per_second'] / 1e6:>7.2f} MB/s  p50={latency['p50']:.2f} ms  "
+          f"p99={latency['p99']:.2f} ms  rss +{result['rss_mb']['growth']:.1f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=["headless", "gui"], default="headless")
+    parser.add_argument("--rate", type=int, default=1000, help="lines (or frames) per second, 0 = flood")
+    parser.add_argument("--line-length", type=int, default=80, help="bytes per line or frame (default: 80)")
+    parser.add_argument("--binary", action="store_true", help="send length-prefixed binary frames")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per run (default: 5)")
+    parser.add_argument("--baud", type=int, default=921600, help="nominal baud rate (ignored by ptys)")
+    parser.add_argument("--poll-interval", type=float, default=0.01, help="headless drain interval")
+    parser.add_argument("--sweep", action="store_true",
+                        help="double the rate from --rate until lines are lost or p99 exceeds --max-p99-ms")
+    parser.add_argument("--max-p99-ms", type=float, default=100.0)
+    parser.add_argument("--json", metavar="FILE", help="write all results as JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    if args.sweep:
+        rate = args.rate or 1000
+        best = None
+        while True:
+            result = run_once(args, rate)
+            print_result(result)
+            results.append(result)
+            behind = result["sent"] < rate * args.duration * 0.9  # The pty reader pushed back
+            if behind or result["lost"] > result["sent"] * 0.001 or result["latency_ms"]["p99"] > args.max_p99_ms:
+                break
+            best = rate
+            rate *= 2
+        print(f"max sustained rate: {best or 0} lines/s ({(best or 0) * args.line_length / 1e6:.2f} MB/s)")
+    else:
+        result = run_once(args, args.rate)
+        print_result(result)
+        results.append(result)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
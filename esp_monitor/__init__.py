@@ -0,0 +1,5 @@
+"""ESP32 serial monitor.
+
+The engine, capture and buffer modules have no Qt dependency and back both the
+headless command line (cli) and the PyQt6 window (gui).
+"""
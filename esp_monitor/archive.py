@@ -0,0 +1,362 @@
+"""SQLite archive of every connection session, searchable across runs.
+
+Each session (port, baud, start and end time, the firmware's boot banner) gets a row
+in "sessions" and every received line a row in "lines", numbered within its session.
+An FTS5 index over the text, filled once per write transaction, answers searches
+across all sessions, and browsing reads one page of a session at a time, so
+neither the writer nor the queries hold more than a page or a batch in memory.
+
+    python monitor.py --list-sessions
+    python monitor.py --search "wifi disconnect"
+    python monitor.py --show-session 12
+
+The database lives in a per-user data directory (DATA_DIR) so that runs from any
+working directory share one history.
+"""
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+
+from .idflog import ANSI_RE
+
+
+def _data_dir():
+    """The platform's per-user application data directory for esp_monitor."""
+    home = os.path.expanduser("~")
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.join(home, "AppData", "Local")
+    elif sys.platform == "darwin":
+        base = os.path.join(home, "Library", "Application Support")
+    else:
+        base = os.environ.get("XDG_DATA_HOME") or os.path.join(home, ".local", "share")
+    return os.path.join(base, "esp_monitor")
+
+
+DATA_DIR = _data_dir()
+DEFAULT_PATH = os.path.join(DATA_DIR, "sessions.db")
+BANNER_RE = re.compile(r"ESP-ROM:|rst:0x|Project name:|App version:|Compile time:|ESP-IDF:|ELF file SHA256:")
+BANNER_SCAN_LINES = 200  # Lines after connecting searched for the boot banner
+BANNER_MAX_LINES = 16
+WRITE_ATTEMPTS = 5  # Consecutive failed flushes (locked database, full disk) before the writer gives up
+RESTART_INTERVAL = 10.0  # Seconds before revive() starts a writer that gave up again
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    port TEXT NOT NULL,
+    baud INTEGER,
+    started INTEGER NOT NULL,  -- Wall clock, ns since the epoch
+    ended INTEGER,             -- NULL while running (or if the monitor crashed)
+    lines INTEGER NOT NULL DEFAULT 0,
+    banner TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS lines (
+    id INTEGER PRIMARY KEY,
+    session INTEGER NOT NULL,
+    seq INTEGER NOT NULL,      -- Line number within the session
+    stamp INTEGER NOT NULL,    -- Wall clock arrival time, ns since the epoch
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lines_session ON lines(session, seq);
+"""
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS lines_fts USING fts5(text, content='lines', content_rowid='id');
+"""
+
+
+def fts_query(text):
+    """Turn what a user types into an FTS5 query: every word must appear, "word*" is a prefix."""
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*") and len(word) > 1
+        word = word.rstrip("*")
+        if word:
+            terms.append('"' + word.replace('"', '""') + '"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+class ArchiveSession:
+    """Handle for one connection's records; id is set once the writer has inserted it."""
+
+    def __init__(self, port, baud, started):
+        self.port = port
+        self.baud = baud
+        self.started = started
+        self.id = None
+        self.count = 0  # Lines written so far (the next line's seq)
+        self.banner = []
+        self.ended = None
+
+
+class Archive:
+    """Writes sessions and their lines to SQLite on a background thread.
+
+    add() only appends a batch to a deque. Every flush_interval the writer thread
+    inserts what is queued in one transaction and indexes the new rows with a single
+    INSERT ... SELECT into the FTS table (about 5x faster than a per-row trigger).
+    When the disk falls more than max_pending lines behind, new batches are
+    dropped and counted. A flush that fails is rolled back and its batches are
+    queued again for the next one; a session's id and line count only change once
+    its rows are committed. After WRITE_ATTEMPTS failed flushes in a row the writer
+    stops; revive(), called from the front end's periodic loop, starts it again
+    with what is still queued. Queries (sessions, lines, search) use their
+    own connection on the calling thread; WAL mode lets them run while the writer
+    commits.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, flush_interval=0.25, max_pending=1000000, stats=None, on_message=None):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.on_message = on_message or print
+        self.fts = False
+        self.dropped = 0  # Lines discarded because the writer fell too far behind
+        self._queue = deque()
+        self._queued_lines = 0  # Lines ever queued (by add()) and committed (by the writer);
+        self._committed_lines = 0  # each has one writer thread, their difference is the backlog
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._gave_up = None  # time.monotonic() when the writer last stopped on errors
+        self._reader = None
+        self._wall_offset = time.time_ns() - time.monotonic_ns()  # Line stamps are monotonic
+        if stats is not None:
+            self._written = stats.counter("archive.lines")
+            self._dropped = stats.counter("archive.dropped")
+            self._commit_time = stats.histogram("archive.commit", "ns")
+        else:
+            self._written = self._dropped = self._commit_time = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        """Create the schema and start the writer; raises sqlite3.Error or OSError if the file cannot be used."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = self._connect()
+        try:
+            with db:
+                db.executescript(SCHEMA)
+                try:
+                    db.executescript(FTS_SCHEMA)
+                except sqlite3.OperationalError:
+                    pass  # SQLite built without FTS5: search falls back to scanning
+            self.fts = _has_fts(db)
+        finally:
+            db.close()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="archive-writer", daemon=True)
+        self._thread.start()
+
+    def revive(self):
+        """Restart a writer that gave up, at most every RESTART_INTERVAL; True while running.
+
+        Called from the GUI flush timer and the headless loop, so a database that was
+        locked or a disk that was full for a while does not end the recording.
+        """
+        if self._thread is not None:
+            return True
+        if self._gave_up is None or time.monotonic() - self._gave_up < RESTART_INTERVAL:
+            return False
+        self._gave_up = None
+        try:
+            self.start()
+        except (sqlite3.Error, OSError) as e:
+            self._gave_up = time.monotonic()
+            self.on_message(f"Archive error: {e}")
+            return False
+        return True
+
+    def stop(self):
+        """Write everything queued so far and stop the writer."""
+        self._stop_event.set()
+        thread = self._thread
+        if thread:
+            thread.join()
+            self._thread = None
+        if self._reader:
+            self._reader.close()
+            self._reader = None
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=10)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    # Writing (any thread; the work happens on the writer thread)
+
+    def open_session(self, port, baud=None):
+        """Start recording a connection; returns the handle to pass to add() and end_session()."""
+        session = ArchiveSession(port, baud, time.time_ns())
+        self._queue.append(("open", session))
+        return session
+
+    def add(self, session, lines, stamps):
+        """Queue received lines with their time.monotonic_ns() stamps."""
+        if not lines:
+            return
+        if self._queued_lines - self._committed_lines + len(lines) > self.max_pending:
+            self.dropped += len(lines)
+            if self._dropped is not None:
+                self._dropped.add(len(lines))
+            return
+        self._queued_lines += len(lines)
+        self._queue.append(("lines", session, lines, stamps))
+
+    def end_session(self, session):
+        self._queue.append(("end", session, time.time_ns()))
+
+    def _run(self):
+        db = None
+        failures = 0
+        try:
+            db = self._connect()
+            while True:
+                stopping = self._stop_event.wait(self.flush_interval)
+                try:
+                    self._drain(db)
+                except sqlite3.OperationalError:
+                    failures += 1  # Locked or busy database, full disk: the batch is queued again
+                    if failures >= WRITE_ATTEMPTS:
+                        raise
+                    continue
+                failures = 0
+                if stopping:
+                    break
+        except sqlite3.Error as e:
+            self._gave_up = time.monotonic()
+            self.on_message(f"Archive error: {e}")
+        finally:
+            if db is not None:
+                db.close()
+            self._thread = None  # Not running; the next start() retries what is still queued
+
+    def _drain(self, db):
+        """Write what is queued in one transaction; on an error the batch goes back on the queue."""
+        queue = self._queue
+        items = [queue.popleft() for _ in range(len(queue))]  # Bounded by what was queued when it began
+        if not items:
+            return
+        started = time.perf_counter_ns()
+        try:
+            records, written = self._write(db, items)
+        except sqlite3.Error:
+            queue.extendleft(reversed(items))  # Ahead of anything queued since
+            raise
+        for session, (session_id, count, banner, ended) in records.items():
+            session.id = session_id
+            session.count = count
+            session.banner = banner
+            session.ended = ended
+        self._committed_lines += written
+        if self._written is not None:
+            self._written.add(written)
+            self._commit_time.record(time.perf_counter_ns() - started)
+
+    def _write(self, db, items):
+        """Insert items; returns ({session: [id, count, banner, ended] as committed}, lines written)."""
+        records = {}
+        written = 0
+        with db:
+            db.execute("BEGIN IMMEDIATE")  # Take the write lock first; a read upgraded to a write can fail as busy
+            last_id = db.execute("SELECT coalesce(max(id), 0) FROM lines").fetchone()[0]
+            offset = self._wall_offset
+            for item in items:
+                session = item[1]
+                record = records.get(session)
+                if record is None:
+                    record = records[session] = [session.id, session.count, list(session.banner), session.ended]
+                if item[0] == "open":
+                    cursor = db.execute("INSERT INTO sessions (port, baud, started) VALUES (?, ?, ?)",
+                                        (session.port, session.baud, session.started))
+                    record[0] = cursor.lastrowid
+                elif item[0] == "lines":
+                    lines, stamps = item[2], item[3]
+                    first = record[1]
+                    if first < BANNER_SCAN_LINES:
+                        self._scan_banner(record[2], first, lines)
+                    db.executemany("INSERT INTO lines (session, seq, stamp, text) VALUES (?, ?, ?, ?)",
+                                   zip([record[0]] * len(lines), range(first, first + len(lines)),
+                                       [stamp + offset for stamp in stamps], lines))
+                    record[1] += len(lines)
+                    written += len(lines)
+                else:
+                    record[3] = item[2]
+            if written and self.fts:
+                db.execute("INSERT INTO lines_fts (rowid, text) SELECT id, text FROM lines WHERE id > ?", (last_id,))
+            db.executemany("UPDATE sessions SET lines = ?, ended = ?, banner = ? WHERE id = ?",
+                           [(count, ended, "\n".join(banner), session_id)
+                            for session_id, count, banner, ended in records.values()])
+        return records, written
+
+    @staticmethod
+    def _scan_banner(banner, count, lines):
+        for line in lines[:BANNER_SCAN_LINES - count]:
+            if len(banner) < BANNER_MAX_LINES and BANNER_RE.search(line):
+                banner.append(ANSI_RE.sub("", line).strip())
+
+    # Queries (on the calling thread)
+
+    def _query(self, sql, params=()):
+        if self._reader is None:
+            self._reader = self._connect()
+            self.fts = _has_fts(self._reader)
+        return self._reader.execute(sql, params).fetchall()
+
+    def sessions(self, limit=200, offset=0):
+        """Newest sessions first: [(id, port, baud, started, ended, lines, banner)]."""
+        return self._query("SELECT id, port, baud, started, ended, lines, banner FROM sessions "
+                           "ORDER BY id DESC LIMIT ? OFFSET ?", (limit, offset))
+
+    def session(self, session_id):
+        rows = self._query("SELECT id, port, baud, started, ended, lines, banner FROM sessions WHERE id = ?",
+                           (session_id,))
+        return rows[0] if rows else None
+
+    def lines(self, session_id, start=0, count=1000):
+        """Lines start .. start + count - 1 of a session: [(seq, stamp, text)]."""
+        return self._query("SELECT seq, stamp, text FROM lines WHERE session = ? AND seq >= ? AND seq < ? "
+                           "ORDER BY seq", (session_id, start, start + count))
+
+    def search(self, text, session_id=None, limit=500):
+        """Newest lines containing every word of text: [(session, seq, stamp, text)].
+
+        Answered from the FTS5 index in rowid order, so the cost follows the number of
+        matches returned rather than the size of the archive.
+        """
+        where = " AND l.session = ?" if session_id is not None else ""
+        if self.fts:
+            query = fts_query(text)
+            if not query:
+                return []
+            params = (query,) + ((session_id,) if session_id is not None else ()) + (limit,)
+            return self._query("SELECT l.session, l.seq, l.stamp, l.text FROM lines_fts f "
+                               "JOIN lines l ON l.id = f.rowid WHERE lines_fts MATCH ?" + where +
+                               " ORDER BY f.rowid DESC LIMIT ?", params)
+        words = [word.rstrip("*") for word in text.split() if word.rstrip("*")]
+        if not words:
+            return []
+        like = " AND ".join(["l.text LIKE ? ESCAPE '\\'"] * len(words))
+        patterns = tuple("%" + re.sub(r"([\\%_])", r"\\\1", word) + "%" for word in words)  # Wildcards match literally
+        params = patterns + ((session_id,) if session_id is not None else ()) + (limit,)
+        return self._query("SELECT l.session, l.seq, l.stamp, l.text FROM lines l WHERE " + like + where +
+                           " ORDER BY l.id DESC LIMIT ?", params)
+
+
+def _has_fts(db):
+    return db.execute("SELECT 1 FROM sqlite_master WHERE name = 'lines_fts'").fetchone() is not None
+
+
+def format_time(stamp):
+    """Wall clock ns as "YYYY-mm-dd HH:MM:SS.mmm" (or "" for None)."""
+    if stamp is None:
+        return ""
+    seconds, ns = divmod(stamp, 1_000_000_000)
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(seconds)) + f".{ns // 1_000_000:03d}"
@@ -0,0 +1,338 @@
+"""Symbolize ESP32 panic dumps (Guru Meditation, Backtrace:, abort()) against the firmware ELF.
+
+The ELF's function symbols and DWARF line table are parsed once into sorted address
+arrays, looked up with bisect, and cached on disk under the ELF's SHA-256, so opening
+the same firmware again loads the index instead of parsing it. A BacktraceDecoder
+per port watches the decoded lines and inserts one line per resolved address after
+the line that contained it, the way `idf.py monitor` does:
+
+    Backtrace: 0x400d1234:0x3ffb1230 0x400d5678:0x3ffb1250
+    --- 0x400d1234: app_main at /project/main/main.c:42
+    --- 0x400d5678: main_task at /idf/components/freertos/app_startup.c:208
+
+Function names come from the symbol table, which is read directly. File and line
+need pyelftools (`pip install pyelftools`); without it only names are shown.
+"""
+import hashlib
+import json
+import os
+import re
+import struct
+from array import array
+from bisect import bisect_right
+
+try:
+    from elftools.common.exceptions import DWARFError, ELFError
+    from elftools.elf.elffile import ELFFile  # Optional: DWARF line table for file:line
+except ImportError:
+    ELFFile = None
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "esp_monitor")
+CACHE_VERSION = 1
+# Lines that open a panic dump (stack overflow, assert and stack smashing reports are
+# followed by a Guru Meditation or Backtrace line). "ELF file SHA256:" also opens and closes
+# one, so a firmware mismatch is reported at boot. Substring scans of a batch are much
+# faster than a regex alternation, and their cost grows with the number of markers.
+PANIC_MARKERS = ("Backtrace:", "Guru Meditation", "abort() was called", "ELF file SHA256:")
+PANIC_END_RE = re.compile(r"Rebooting\.\.\.|CPU halted|ESP-ROM:|rst:0x|ELF file SHA256:")
+ADDRESS_RE = re.compile(r"0x[0-9a-fA-F]{8}")
+ELF_SHA_RE = re.compile(r"ELF file SHA256:\s*([0-9a-fA-F]+)")
+MAX_BLOCK_LINES = 64  # A panic dump ends here at the latest if no end marker arrives
+
+_SHT_SYMTAB = 2
+_STT_FUNC = 2
+
+
+class SymbolIndex:
+    """Function and line lookup for one ELF, as sorted address arrays.
+
+    Functions: starts/sizes/names sorted by start address. Lines: line_addresses
+    sorted, with parallel file numbers and line numbers; file 0 marks the end of a
+    DWARF sequence, so addresses past a sequence do not resolve to its last row.
+    """
+
+    def __init__(self):
+        self.sha256 = ""
+        self.path = ""
+        self.cached = False  # Loaded from the on-disk cache rather than parsed
+        self.has_lines = False
+        self.starts = array("Q")
+        self.sizes = array("Q")
+        self.names = []
+        self.line_addresses = array("Q")
+        self.line_files = array("I")
+        self.line_numbers = array("I")
+        self.files = [""]
+
+    @classmethod
+    def load(cls, path, cache_dir=CACHE_DIR):
+        """Index an ELF file, from the cache if this exact file was indexed before; raises OSError/ValueError."""
+        sha256 = file_sha256(path)
+        cache_path = os.path.join(cache_dir, sha256 + ".idx") if cache_dir else None
+        index = None
+        if cache_path and os.path.exists(cache_path):
+            try:
+                index = cls.read_cache(cache_path)
+            except (OSError, ValueError, KeyError, EOFError):
+                index = None  # Stale or damaged; parse again
+            if index is not None and not index.has_lines and ELFFile is not None:
+                index = None  # Cached without pyelftools, which is available now
+        if index is None:
+            index = cls.parse(path)
+            if cache_path:
+                try:
+                    index.write_cache(cache_path)
+                except OSError:
+                    pass  # Caching is an optimization only
+        else:
+            index.cached = True
+        index.sha256 = sha256
+        index.path = path
+        return index
+
+    @classmethod
+    def parse(cls, path):
+        index = cls()
+        with open(path, "rb") as file:
+            data = file.read()
+        try:
+            functions = sorted(_read_functions(data))
+        except (struct.error, IndexError) as e:
+            raise ValueError(f"unreadable ELF file: {e}")
+        seen = set()
+        for start, size, name in functions:
+            if start in seen:
+                continue  # Aliases of the same function; the first name wins
+            seen.add(start)
+            index.starts.append(start)
+            index.sizes.append(size)
+            index.names.append(name)
+        if ELFFile is not None:
+            try:
+                index._read_lines(path)
+            except (ELFError, DWARFError, struct.error):
+                pass  # Unusual debug info; function names still work
+        return index
+
+    def _read_lines(self, path):
+        """Collect the DWARF line table rows of every compile unit, sorted by address."""
+        rows = []
+        file_ids = {"": 0}
+        with open(path, "rb") as file:
+            elf = ELFFile(file)
+            if not elf.has_dwarf_info():
+                return
+            dwarf = elf.get_dwarf_info()
+            for unit in dwarf.iter_CUs():
+                program = dwarf.line_program_for_CU(unit)
+                if program is None:
+                    continue
+                names = _program_file_names(program)
+                for entry in program.get_entries():
+                    state = entry.state
+                    if state is None:
+                        continue
+                    if state.end_sequence:
+                        rows.append((state.address, 0, 0))  # Sorts before a row starting at the same address
+                        continue
+                    name = names.get(state.file, "")
+                    file_id = file_ids.get(name)
+                    if file_id is None:
+                        file_id = file_ids[name] = len(file_ids)
+                    rows.append((state.address, 1, file_id, state.line))
+        rows.sort()
+        self.files = list(file_ids)
+        for row in rows:
+            self.line_addresses.append(row[0])
+            self.line_files.append(row[2] if row[1] else 0)
+            self.line_numbers.append(row[3] if row[1] else 0)
+        self.has_lines = True
+
+    def function(self, address):
+        """(name, offset) of the function containing address, or None.
+
+        Symbols without a size (common in assembly sources) extend to the next symbol.
+        """
+        i = bisect_right(self.starts, address) - 1
+        if i < 0:
+            return None
+        start = self.starts[i]
+        if self.sizes[i]:
+            end = start + self.sizes[i]
+        elif i + 1 < len(self.starts):
+            end = self.starts[i + 1]
+        else:
+            end = start + 1
+        if address >= end:
+            return None
+        return self.names[i], address - start
+
+    def line(self, address):
+        """(file, line) of the row covering address, or None."""
+        i = bisect_right(self.line_addresses, address) - 1
+        if i < 0 or not self.line_files[i]:
+            return None
+        return self.files[self.line_files[i]], self.line_numbers[i]
+
+    def describe(self, address):
+        """"name at file:line" (or "name+0x10") for an address, or None if it is not code."""
+        function = self.function(address)
+        if function is None:
+            return None
+        line = self.line(address)
+        if line:
+            return f"{function[0]} at {line[0]}:{line[1]}"
+        return f"{function[0]}+{function[1]:#x}"
+
+    def write_cache(self, path):
+        """Save as a JSON header line (names, files) followed by the raw arrays."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        header = {"version": CACHE_VERSION, "names": self.names, "files": self.files, "has_lines": self.has_lines,
+                  "functions": len(self.starts), "lines": len(self.line_addresses)}
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as file:
+            file.write(json.dumps(header).encode("utf-8") + b"\n")
+            for column in (self.starts, self.sizes, self.line_addresses, self.line_files, self.line_numbers):
+                column.tofile(file)
+        os.replace(temporary, path)  # Readers never see a partial cache
+
+    @classmethod
+    def read_cache(cls, path):
+        index = cls()
+        with open(path, "rb") as file:
+            header = json.loads(file.readline())
+            if header["version"] != CACHE_VERSION:
+                raise ValueError("old cache format")
+            index.names = header["names"]
+            index.files = header["files"]
+            index.has_lines = header["has_lines"]
+            index.starts.fromfile(file, header["functions"])
+            index.sizes.fromfile(file, header["functions"])
+            for column in (index.line_addresses, index.line_files, index.line_numbers):
+                column.fromfile(file, header["lines"])
+        return index
+
+    def summary(self):
+        source = "cache" if self.cached else "ELF"
+        return (f"{os.path.basename(self.path)}: {len(self.starts)} functions, "
+                f"{len(self.line_addresses)} line rows (from {source})")
+
+
+class BacktraceDecoder:
+    """Finds panic dumps in one port's lines and inserts the symbolized addresses.
+
+    Outside a dump a batch costs a few substring scans of the joined lines. Inside one
+    (from a Guru Meditation / Backtrace / abort line until Rebooting..., the next
+    boot, or MAX_BLOCK_LINES), every 8-digit hex address that falls in a function is
+    described on its own "--- " line, once per line.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self._block_lines = 0  # Lines left in the current dump, 0 outside one
+
+    def process(self, lines, stamps):
+        """Return (lines, stamps) with the decoded lines inserted; the inputs are not modified."""
+        if not self._block_lines and not _has_marker("\n".join(lines)):
+            return lines, stamps
+        out_lines = []
+        out_stamps = []
+        for line, stamp in zip(lines, stamps):
+            out_lines.append(line)
+            out_stamps.append(stamp)
+            if not self._block_lines:
+                if not _has_marker(line):
+                    continue
+                self._block_lines = MAX_BLOCK_LINES
+            self._block_lines -= 1
+            decoded = self.decode_line(line)
+            out_lines.extend(decoded)
+            out_stamps.extend([stamp] * len(decoded))
+            if PANIC_END_RE.search(line):
+                self._block_lines = 0
+        return out_lines, out_stamps
+
+    def decode_line(self, line):
+        """The "--- " lines for one line of a panic dump."""
+        decoded = []
+        match = ELF_SHA_RE.search(line)
+        if match and not self.index.sha256.startswith(match.group(1).lower()):
+            decoded.append(f"--- Warning: the device runs ELF {match.group(1)}, "
+                           f"symbols are from {self.index.sha256[:len(match.group(1))]}")
+        seen = set()
+        for text in ADDRESS_RE.findall(line):
+            address = int(text, 16)
+            if address in seen:
+                continue  # Recursion repeats frames
+            seen.add(address)
+            description = self.index.describe(address)
+            if description:
+                decoded.append(f"--- {text}: {description}")
+        return decoded
+
+
+def _has_marker(text):
+    for marker in PANIC_MARKERS:
+        if marker in text:
+            return True
+    return False
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_functions(data):
+    """Yield (address, size, name) of the FUNC symbols in an ELF's .symtab; raises ValueError."""
+    if data[:4] != b"\x7fELF":
+        raise ValueError("not an ELF file")
+    is64 = data[4] == 2
+    order = "<" if data[5] == 1 else ">"
+    if is64:
+        shoff, = struct.unpack_from(order + "Q", data, 0x28)
+        shentsize, shnum = struct.unpack_from(order + "HH", data, 0x3A)
+        section_format, symbol_format = order + "IIQQQQIIQQ", order + "IBBHQQ"
+    else:
+        shoff, = struct.unpack_from(order + "I", data, 0x20)
+        shentsize, shnum = struct.unpack_from(order + "HH", data, 0x2E)
+        section_format, symbol_format = order + "IIIIIIIIII", order + "IIIBBH"
+    sections = [struct.unpack_from(section_format, data, shoff + i * shentsize) for i in range(shnum)]
+    for section in sections:
+        if section[1] != _SHT_SYMTAB:
+            continue
+        offset, size, link = section[4], section[5], section[6]
+        strings = sections[link][4]
+        table = data[offset:offset + size]
+        for symbol in struct.iter_unpack(symbol_format, table[:len(table) // struct.calcsize(symbol_format)
+                                                             * struct.calcsize(symbol_format)]):
+            if is64:
+                name, info, _, _, value, size = symbol
+            else:
+                name, value, size, info, _, _ = symbol
+            if info & 0xF == _STT_FUNC and value:
+                end = data.index(b"\0", strings + name)
+                yield value, size, data[strings + name:end].decode("utf-8", "replace")
+
+
+def _program_file_names(program):
+    """file number -> path for a line program (DWARF 5 numbers files from 0, earlier versions from 1)."""
+    header = program.header
+    version = header["version"]
+    directories = [_text(directory) for directory in header["include_directory"]]
+    names = {}
+    for i, entry in enumerate(header["file_entry"]):
+        number = i if version >= 5 else i + 1
+        directory_index = entry.dir_index if version >= 5 else entry.dir_index - 1
+        name = _text(entry.name)
+        if 0 <= directory_index < len(directories) and not os.path.isabs(name):
+            name = os.path.join(directories[directory_index], name)
+        names[number] = name
+    return names
+
+
+def _text(value):
+    return value.decode("utf-8", "replace") if isinstance(value, bytes) else value
@@ -0,0 +1,285 @@
+"""Local TCP fan-out of a port's received stream, so several programs can share one port.
+
+Only one process can open a serial port. A Bridge lets the monitor keep it and
+re-serve what it reads: any number of clients (a logger, a test script, nc) connect
+to a local TCP port and get the bytes as they arrive. What a client sends is queued
+on the Transmitter and written to the device, like the send bar does.
+
+    python monitor.py --headless -p /dev/ttyUSB0 --serve 5555 --output /dev/null
+    nc localhost 5555
+"""
+import selectors
+import socket
+import threading
+from collections import deque
+
+MODES = ["raw", "lines"]
+POLICIES = ["drop", "disconnect"]
+INBOX_SIZE = 4096  # Chunks queued for the bridge thread before the oldest are discarded
+
+
+class Bridge:
+    """Serves one engine's received bytes to TCP clients from a selector thread.
+
+    write() is called by the reader thread and only appends to a deque. The bridge's
+    thread copies each chunk into every client's bounded buffer and sends with
+    non-blocking sockets. A client whose buffer exceeds max_buffer bytes either
+    loses its oldest unsent data (policy "drop") or is disconnected ("disconnect"),
+    so a stalled consumer never slows down the reader, the GUI or other clients.
+    In "lines" mode only complete lines are sent (and dropped), so clients never
+    get half a line. Bytes from clients go to the transmitter unless writable is False.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, mode="raw", max_buffer=256 * 1024, policy="drop",
+                 transmitter=None, writable=True, stats=None, on_message=None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown bridge mode: {mode}")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown slow-client policy: {policy}")
+        self.host = host
+        self.port = port
+        self.mode = mode
+        self.max_buffer = max_buffer
+        self.policy = policy
+        self.transmitter = transmitter
+        self.writable = writable
+        self.on_message = on_message or print
+        self.engine = None
+        self.clients = {}  # socket -> _Client, only touched by the bridge thread
+        self._inbox = deque(maxlen=INBOX_SIZE)  # Raw chunks from the reader thread
+        self.inbox_dropped = 0  # Chunks discarded because the bridge thread fell behind
+        self._partial = b""  # Incomplete last line in "lines" mode
+        self._selector = selectors.DefaultSelector()
+        self._wake_recv, self._wake_send = socket.socketpair()
+        self._wake_recv.setblocking(False)
+        self._wake_send.setblocking(False)
+        self._listener = None
+        self._running = False
+        self._thread = None
+        self.stats = stats  # Metrics are created by start(), named after the TCP port
+        self._accepted = self._sent = self._dropped = self._kicked = self._received = None
+        self._inbox_dropped = None
+
+    @property
+    def address(self):
+        """(host, port) actually listened on; port 0 picks a free one."""
+        return self._listener.getsockname()[:2] if self._listener else (self.host, self.port)
+
+    def start(self):
+        """Listen and start the bridge thread; raises OSError if the address is taken."""
+        try:
+            self._listener = socket.create_server((self.host, self.port))
+        except OSError:
+            self.stop()  # Release the wake-up sockets; the bridge cannot be reused
+            raise
+        self._listener.setblocking(False)
+        stats = self.stats
+        if stats is not None:
+            # One set per bridge: each is written only by its own thread and attached reader
+            prefix = f"bridge.{self.address[1]}"
+            self._accepted = stats.counter(f"{prefix}.clients")
+            self._sent = stats.counter(f"{prefix}.sent")
+            self._dropped = stats.counter(f"{prefix}.dropped")
+            self._kicked = stats.counter(f"{prefix}.disconnected")
+            self._received = stats.counter(f"{prefix}.received")
+            self._inbox_dropped = stats.counter(f"{prefix}.inbox_dropped")
+        self._selector.register(self._listener, selectors.EVENT_READ, "listen")
+        self._selector.register(self._wake_recv, selectors.EVENT_READ, None)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"bridge-{self.address[1]}", daemon=True)
+        self._thread.start()
+
+    def attach(self, engine):
+        """Serve engine's stream (replacing any previous one) and send client data to it."""
+        if self.engine is not None:
+            self.engine.bridge = None
+        self.engine = engine
+        engine.bridge = self
+
+    def detach(self):
+        if self.engine is not None:
+            self.engine.bridge = None
+            self.engine = None
+
+    def write(self, data):
+        """Queue a received chunk for the clients; safe to call from the reader thread."""
+        inbox = self._inbox
+        if len(inbox) == inbox.maxlen:
+            self.inbox_dropped += 1  # deque discards the oldest chunk
+            if self._inbox_dropped is not None:
+                self._inbox_dropped.add()
+        inbox.append(data)
+        self._wake()
+
+    def stop(self):
+        """Disconnect every client and close the listener."""
+        self.detach()
+        self._running = False
+        self._wake()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        for sock in list(self.clients):
+            self._close(sock)
+        if self._listener:
+            self._listener.close()
+            self._listener = None
+        self._selector.close()
+        self._wake_recv.close()
+        self._wake_send.close()
+
+    def _wake(self):
+        try:
+            self._wake_send.send(b"\0")
+        except OSError:
+            pass  # Wake-up socket buffer is full; the loop is already due to run
+
+    def _run(self):
+        while self._running:
+            for key, events in self._selector.select(timeout=1.0):
+                if key.data is None:
+                    try:
+                        self._wake_recv.recv(4096)
+                    except OSError:
+                        pass
+                elif key.data == "listen":
+                    self._accept()
+                else:
+                    if events & selectors.EVENT_READ:
+                        self._receive(key.fileobj)
+                    if events & selectors.EVENT_WRITE and key.fileobj in self.clients:
+                        self._flush(self.clients[key.fileobj])
+            if self._inbox:
+                self._distribute()
+
+    def _accept(self):
+        try:
+            sock, peer = self._listener.accept()
+        except OSError:
+            return
+        sock.setblocking(False)
+        client = _Client(sock, peer)
+        self.clients[sock] = client
+        self._selector.register(sock, selectors.EVENT_READ, client)
+        if self._accepted is not None:
+            self._accepted.add()
+        self.on_message(f"Bridge {self.address[1]}: client {peer[0]}:{peer[1]} connected")
+
+    def _receive(self, sock):
+        try:
+            data = sock.recv(65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._close(sock)
+            return
+        if self._received is not None:
+            self._received.add(len(data))
+        engine = self.engine
+        if self.writable and self.transmitter is not None and engine is not None:
+            self.transmitter.send(engine, data)
+
+    def _distribute(self):
+        """Move queued chunks into every client's buffer and send what the sockets take."""
+        inbox = self._inbox
+        chunks = []
+        while inbox:
+            chunks.append(inbox.popleft())
+        data = b"".join(chunks)
+        if self.mode == "lines":
+            data = self._partial + data
+            end = data.rfind(b"\n") + 1
+            if end == 0 and len(data) > self.max_buffer:
+                end = len(data)  # No line end in sight; pass it on rather than grow forever
+            data, self._partial = data[:end], data[end:]
+        if not data:
+            return
+        for client in list(self.clients.values()):
+            client.pending.append(data)
+            client.size += len(data)
+            self._flush(client)  # The policy only applies to what the socket would not take
+            if client.size > self.max_buffer and client.sock in self.clients:
+                self._overflow(client)
+
+    def _overflow(self, client):
+        """Apply the slow-client policy to a client with more than max_buffer bytes unsent."""
+        if self.policy == "disconnect":
+            if self._kicked is not None:
+                self._kicked.add()
+            self._close(client.sock, f"too slow, {client.size} bytes behind")
+            return
+        pending = client.pending
+        keep = pending.popleft() if client.offset else None  # Partly sent, finish it
+        while pending and client.size > self.max_buffer:
+            self._drop(client, len(pending.popleft()))
+        if keep is not None:
+            if client.size > self.max_buffer:
+                # Still too far behind: cut the unsent rest, after the current line in "lines" mode
+                end = client.offset
+                if self.mode == "lines":
+                    end = keep.find(b"\n", end) + 1 or len(keep)
+                self._drop(client, len(keep) - end)
+                keep = keep[:end]
+            pending.appendleft(keep)
+
+    def _drop(self, client, size):
+        client.size -= size
+        client.dropped += size
+        if self._dropped is not None:
+            self._dropped.add(size)
+
+    def _flush(self, client):
+        """Send buffered data until the socket would block; watch for writability if it does."""
+        pending = client.pending
+        sent_total = 0
+        try:
+            while pending:
+                head = pending[0]
+                sent = client.sock.send(memoryview(head)[client.offset:])
+                sent_total += sent
+                client.offset += sent
+                if client.offset < len(head):
+                    break
+                pending.popleft()
+                client.offset = 0
+        except BlockingIOError:
+            pass
+        except OSError:
+            self._close(client.sock)
+            return
+        client.size -= sent_total
+        if self._sent is not None and sent_total:
+            self._sent.add(sent_total)
+        waiting = bool(pending)
+        if waiting != client.waiting:
+            client.waiting = waiting
+            events = selectors.EVENT_READ | (selectors.EVENT_WRITE if waiting else 0)
+            self._selector.modify(client.sock, events, client)
+
+    def _close(self, sock, reason=None):
+        client = self.clients.pop(sock, None)
+        try:
+            self._selector.unregister(sock)
+        except (KeyError, ValueError):
+            pass
+        sock.close()
+        if client is None:
+            return
+        details = [reason] if reason else []
+        if client.dropped:
+            details.append(f"{client.dropped} bytes dropped")
+        suffix = f" ({', '.join(details)})" if details else ""
+        self.on_message(f"Bridge {self.address[1]}: client {client.peer[0]}:{client.peer[1]} disconnected{suffix}")
+
+
+class _Client:
+    def __init__(self, sock, peer):
+        self.sock = sock
+        self.peer = peer
+        self.pending = deque()  # Byte blocks not fully sent yet
+        self.offset = 0  # Bytes of pending[0] already sent
+        self.size = 0  # Unsent bytes in pending
+        self.dropped = 0
+        self.waiting = False  # Registered for EVENT_WRITE
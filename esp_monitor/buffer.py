@@ -0,0 +1,97 @@
+"""Fixed-capacity line storage shared by the GUI and headless front ends."""
+from array import array
+from itertools import chain
+
+
+class LineBuffer:
+    """Fixed-capacity ring buffer of display lines; the oldest lines are overwritten.
+
+    Every line ever appended gets a sequence number (0, 1, 2, ...) that survives
+    eviction, so indexes built on top of the buffer can refer to lines stably.
+    Each line also has an arrival stamp (time.monotonic_ns()), kept as a machine
+    integer in a parallel array and formatted only when shown.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self._stamps = array("q", bytes(8 * capacity))
+        self._head = 0  # Slot of the oldest line
+        self._size = 0
+        self.total = 0  # Lines appended so far; the next line gets this sequence number
+
+    @property
+    def first_seq(self):
+        """Sequence number of the oldest line still held."""
+        return self.total - self._size
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        if not 0 <= index < self._size:
+            raise IndexError("line index out of range")
+        return self._slots[(self._head + index) % self.capacity]
+
+    def __iter__(self):
+        end = self._head + self._size
+        if end <= self.capacity:
+            return iter(self._slots[self._head:end])
+        return chain(self._slots[self._head:], self._slots[:end - self.capacity])
+
+    def extend(self, lines, stamps=None):
+        """Append lines with their arrival stamps; the caller makes room with drop_front first."""
+        count = len(lines)
+        stamps = array("q", stamps) if stamps is not None else array("q", bytes(8 * count))
+        tail = (self._head + self._size) % self.capacity
+        first = min(count, self.capacity - tail)
+        self._slots[tail:tail + first] = lines[:first]
+        self._slots[:count - first] = lines[first:]
+        self._stamps[tail:tail + first] = stamps[:first]
+        self._stamps[:count - first] = stamps[first:]
+        self._size += count
+        self.total += count
+
+    def drop_front(self, count):
+        """Forget the oldest lines without touching the rest."""
+        self._head = (self._head + count) % self.capacity
+        self._size -= count
+
+    def get(self, seq):
+        """Return a line by sequence number."""
+        return self[seq - self.first_seq]
+
+    def stamp(self, seq):
+        """Return the arrival stamp of a line by sequence number."""
+        index = seq - self.first_seq
+        if not 0 <= index < self._size:
+            raise IndexError("line index out of range")
+        return self._stamps[(self._head + index) % self.capacity]
+
+    def stamps(self):
+        """Arrival stamps of all held lines, oldest first, as an array."""
+        end = self._head + self._size
+        if end <= self.capacity:
+            return self._stamps[self._head:end]
+        return self._stamps[self._head:] + self._stamps[:end - self.capacity]
+
+    def lines_from(self, seq):
+        """List of the lines from sequence number seq (clamped to the oldest) onwards."""
+        start = max(seq, self.first_seq) - self.first_seq
+        return list(self)[start:]
+
+    def clear(self):
+        self._slots = [None] * self.capacity
+        self._stamps = array("q", bytes(8 * self.capacity))
+        self._head = 0
+        self._size = 0
+
+    def resize(self, capacity):
+        """Change the line cap, keeping the newest lines that still fit."""
+        lines = list(self)[-capacity:]
+        stamps = self.stamps()[-capacity:] if lines else array("q")
+        total = self.total
+        self.capacity = capacity
+        self.clear()
+        self.extend(lines, stamps)
+        self.total = total
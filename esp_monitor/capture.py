@@ -0,0 +1,165 @@
+"""Streaming capture of received bytes to rotating, optionally compressed files.
+
+Next to every segment, "<segment>.idx" records where each received chunk starts and
+when it arrived, so a capture can be replayed with its original timing (see replay).
+The index is a little-endian uint64 array: a header of INDEX_MAGIC, the wall-clock
+and monotonic time of the segment's start (ns), then one (offset, monotonic ns) pair
+per chunk. It is left uncompressed so it can be memory-mapped.
+"""
+import gzip
+import os
+import shutil
+import sys
+import threading
+import time
+from array import array
+from collections import deque
+from datetime import datetime
+
+try:
+    import zstandard  # Optional: zstd compression of closed capture segments
+except ImportError:
+    zstandard = None
+
+INDEX_SUFFIX = ".idx"
+INDEX_MAGIC = int.from_bytes(b"ESPIDX1\0", "little")
+INDEX_HEADER = 3  # uint64 words before the first (offset, timestamp) pair
+
+
+class CaptureWriter:
+    """Streams received bytes to rotating segment files on a background thread.
+
+    write() only appends to a deque, so the serial reader never waits on the disk.
+    Closed segments are optionally compressed with gzip or zstd. With index=True each
+    chunk's arrival time is recorded in a sidecar index for replay.
+    """
+
+    COMPRESSIONS = ["none", "gzip"] + (["zstd"] if zstandard else [])
+
+    def __init__(self, directory, prefix="capture", max_bytes=64 * 1024 * 1024, max_seconds=None,
+                 compression="none", flush_interval=0.25, on_message=None, index=True):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.compression = compression
+        self.flush_interval = flush_interval
+        self.on_message = on_message or print
+        self.index = index
+        self.bytes_written = 0
+        self.dropped = 0  # Chunks discarded because the writer fell too far behind
+        self._queue = deque(maxlen=65536)
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._file = None
+        self._index_file = None
+        self._path = None
+        self._segment_index = 0
+        self._segment_bytes = 0
+        self._segment_started = 0.0
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="capture-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, data, timestamp=None):
+        """Queue a chunk for writing; safe to call from the reader thread.
+
+        timestamp is the time.monotonic_ns() at which the chunk was read (now by default).
+        """
+        queue = self._queue
+        if len(queue) == queue.maxlen:
+            self.dropped += 1
+        queue.append((timestamp or time.monotonic_ns(), data))
+
+    def stop(self):
+        """Flush everything queued so far, close the current segment and stop the thread."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        try:
+            while True:
+                stopping = self._stop_event.wait(self.flush_interval)
+                self._drain()
+                if stopping:
+                    break
+        except OSError as e:
+            self.on_message(f"Capture error: {e}")
+        finally:
+            self._close_segment()
+
+    def _drain(self):
+        queue = self._queue
+        chunks = []
+        while queue:
+            chunks.append(queue.popleft())
+        if chunks:
+            if self._file is None:
+                self._open_segment()
+            if self._index_file:
+                entries = array("Q")
+                offset = self._segment_bytes
+                for timestamp, data in chunks:
+                    entries.append(offset)
+                    entries.append(timestamp)
+                    offset += len(data)
+                _write_index(self._index_file, entries)
+            data = b"".join([data for _, data in chunks])
+            self._file.write(data)  # One buffered bulk write per flush interval
+            self._segment_bytes += len(data)
+            self.bytes_written += len(data)
+        self._maybe_rotate()
+
+    def _maybe_rotate(self):
+        if self._file is None:
+            return
+        too_big = self.max_bytes and self._segment_bytes >= self.max_bytes
+        too_old = self.max_seconds and time.monotonic() - self._segment_started >= self.max_seconds
+        if too_big or too_old:
+            self._close_segment()
+
+    def _open_segment(self):
+        self._segment_index += 1
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        name = f"{self.prefix}_{stamp}_{self._segment_index:03d}.log"
+        self._path = os.path.join(self.directory, name)
+        self._file = open(self._path, "wb", buffering=1024 * 1024)
+        if self.index:
+            self._index_file = open(self._path + INDEX_SUFFIX, "wb", buffering=64 * 1024)
+            _write_index(self._index_file, array("Q", [INDEX_MAGIC, time.time_ns(), time.monotonic_ns()]))
+        self._segment_bytes = 0
+        self._segment_started = time.monotonic()
+
+    def _close_segment(self):
+        if self._file is None:
+            return
+        self._file.close()
+        if self._index_file:
+            self._index_file.close()
+            self._index_file = None
+        path, self._file, self._path = self._path, None, None
+        if self.compression != "none":
+            threading.Thread(target=self._compress, args=(path,), name="capture-compress").start()
+
+    def _compress(self, path):
+        try:
+            if self.compression == "gzip":
+                with open(path, "rb") as src, gzip.open(path + ".gz", "wb") as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+            elif self.compression == "zstd":
+                with open(path, "rb") as src, open(path + ".zst", "wb") as dst:
+                    zstandard.ZstdCompressor().copy_stream(src, dst)
+            os.remove(path)
+        except OSError as e:
+            self.on_message(f"Capture compression error: {e}")
+
+
+def _write_index(file, entries):
+    if sys.byteorder == "big":
+        entries.byteswap()
+    entries.tofile(file)
@@ -0,0 +1,470 @@
+"""Command-line entry point: headless logging, or the GUI when no --headless is given."""
+import argparse
+import codecs
+import csv
+import os
+import re
+import signal
+import sys
+import threading
+import time
+
+from .bridge import MODES as BRIDGE_MODES, POLICIES, Bridge
+from .capture import CaptureWriter
+from .framing import DECODE_ERRORS, FRAMERS, load_decoder, make_framer
+from .idflog import CSV_COLUMNS, LEVELS, csv_row, parse_batch
+from .ports import PortWatcher, Reconnector
+from .replay import ReplayFinished, is_replay, replay_url
+from .session import SessionManager
+from .timestamps import MODES, TimestampFormatter
+from .transmit import LINE_ENDINGS, Macro, MacroRunner, Transmitter
+
+_IMPORTED_AT = time.perf_counter()  # Startup reference when the caller did not pass one
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="monitor.py",
+        description="ESP32 serial monitor. Starts the GUI unless --headless is given "
+                    "(which needs at least one --port or --replay).",
+    )
+    parser.add_argument("--headless", action="store_true", help="log from the command line without loading PyQt6")
+    parser.add_argument("-p", "--port", action="append", default=[],
+                        help="serial port to open (repeat to monitor several)")
+    parser.add_argument("-r", "--replay", action="append", default=[], metavar="CAPTURE",
+                        help="play back a recorded capture as if it were a port (repeatable)")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="replay speed: 1 = real time, 10 = ten times faster, 0 = as fast as possible")
+    parser.add_argument("--reconnect", action="store_true",
+                        help="reopen ports that drop out (board reset, re-plug) instead of exiting")
+    parser.add_argument("-b", "--baud", type=int, default=115200, help="baud rate (default: 115200)")
+    parser.add_argument("-o", "--output", help="append received lines to this file instead of stdout")
+    parser.add_argument("-d", "--duration", type=float, help="stop after this many seconds")
+    parser.add_argument("-i", "--include", action="append", default=[], metavar="REGEX",
+                        help="only keep lines matching REGEX (repeatable)")
+    parser.add_argument("-x", "--exclude", action="append", default=[], metavar="REGEX",
+                        help="drop lines matching REGEX (repeatable)")
+    parser.add_argument("--framing", choices=list(FRAMERS), default="lines",
+                        help="how the byte stream is split into frames (default: lines)")
+    parser.add_argument("--length-header", type=int, choices=[1, 2, 4], default=2,
+                        help="header size in bytes for --framing length (default: 2)")
+    parser.add_argument("--length-byteorder", choices=["little", "big"], default="little",
+                        help="header byte order for --framing length (default: little)")
+    parser.add_argument("--encoding", default="utf-8",
+                        help="text encoding for --framing lines, any Python codec (default: utf-8)")
+    parser.add_argument("--decode-errors", choices=DECODE_ERRORS, default="replace",
+                        help="how undecodable bytes are shown: U+FFFD, \\xNN escapes, or dropped (default: replace)")
+    parser.add_argument("--decoder", metavar="MODULE:FUNCTION",
+                        help="callable turning each binary frame into a line (default: text or hex dump)")
+    parser.add_argument("-t", "--timestamps", choices=MODES, default="clock",
+                        help="arrival time prefix: wall clock (s, ms or us), delta from the previous line, "
+                             "time since start, or off (default: clock)")
+    parser.add_argument("--no-timestamps", action="store_const", const="off", dest="timestamps",
+                        help="same as --timestamps off")
+    parser.add_argument("--level", metavar="LEVELS",
+                        help="only keep ESP-IDF log lines of these levels, e.g. EW (- for other lines)")
+    parser.add_argument("--tag", action="append", default=[], metavar="TAG",
+                        help="only keep ESP-IDF log lines with this tag (repeatable)")
+    parser.add_argument("--idf-csv", metavar="FILE",
+                        help="also write the kept lines as parsed ESP-IDF records (arrival, port, tick, level, tag, message) to a CSV file")
+    parser.add_argument("--elf", metavar="FILE",
+                        help="firmware ELF to symbolize panic backtraces with (file:line needs pyelftools)")
+    parser.add_argument("--send", action="append", default=[], metavar="TEXT",
+                        help="send TEXT to the first port once connected (repeatable, sent in order)")
+    parser.add_argument("--macro", metavar="FILE",
+                        help="run a macro script (send / expect / sleep / timeout steps) after the --send lines; "
+                             "without --duration, exit once it is done")
+    parser.add_argument("--line-ending", choices=list(LINE_ENDINGS), default="crlf",
+                        help="appended to every sent line (default: crlf)")
+    parser.add_argument("--byte-delay", type=float, default=0.0, metavar="MS",
+                        help="pause after every transmitted byte, in milliseconds")
+    parser.add_argument("--line-delay", type=float, default=0.0, metavar="MS",
+                        help="pause after every transmitted line, in milliseconds")
+    parser.add_argument("--serve", metavar="[HOST:]PORT",
+                        help="serve each port's stream over TCP (further ports on the following TCP ports); "
+                             "what clients send is written to the device (default host: 127.0.0.1)")
+    parser.add_argument("--serve-mode", choices=BRIDGE_MODES, default="raw",
+                        help="send clients the raw bytes or only complete lines (default: raw)")
+    parser.add_argument("--client-buffer", type=int, default=256, metavar="KB",
+                        help="unsent data kept per TCP client before --slow-client applies (default: 256)")
+    parser.add_argument("--slow-client", choices=POLICIES, default="drop",
+                        help="drop a lagging client's oldest data, or disconnect it (default: drop)")
+    parser.add_argument("--serve-read-only", action="store_true", help="ignore data sent by TCP clients")
+    parser.add_argument("--archive", action="store_true",
+                        help="record each port's session and lines in the SQLite archive (see --archive-db)")
+    parser.add_argument("--archive-db", metavar="FILE",
+                        help="session archive database (default: sessions.db in the per-user data directory, "
+                             "e.g. ~/.local/share/esp_monitor)")
+    parser.add_argument("--list-sessions", action="store_true", help="list the archived sessions and exit")
+    parser.add_argument("--search", metavar="WORDS",
+                        help="print archived lines containing every word (\"word*\" matches a prefix) and exit")
+    parser.add_argument("--show-session", type=int, metavar="ID", help="print an archived session and exit")
+    parser.add_argument("--capture-dir", help="also stream raw bytes to rotating files in this directory")
+    parser.add_argument("--rotate-mb", type=int, default=64, help="capture segment size in MB (default: 64)")
+    parser.add_argument("--compression", choices=CaptureWriter.COMPRESSIONS, default="none",
+                        help="compression of closed capture segments")
+    parser.add_argument("--stats", metavar="FILE",
+                        help="write pipeline statistics on exit (CSV if FILE ends in .csv, JSON otherwise)")
+    parser.add_argument("--poll-interval", type=float, default=0.05, help="seconds between drains (default: 0.05)")
+    return parser
+
+
+def compile_filter(include, exclude):
+    """Build a predicate from include/exclude regexes, compiled once."""
+    include = [re.compile(pattern) for pattern in include]
+    exclude = [re.compile(pattern) for pattern in exclude]
+
+    def keep(line):
+        if include and not any(regex.search(line) for regex in include):
+            return False
+        return not any(regex.search(line) for regex in exclude)
+
+    return keep
+
+
+def parse_address(text):
+    """Split "[HOST:]PORT" into (host, port); raises ValueError."""
+    host, _, port = text.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def build_macro(sends, path):
+    """One Macro from the --send lines followed by the steps of the --macro file."""
+    steps = [("send", text) for text in sends]
+    name = "send"
+    if path:
+        macro = Macro.load(path)
+        steps += macro.steps
+        name = macro.name
+    return Macro(steps, name)
+
+
+def run_archive_query(args):
+    """Answer --list-sessions, --search and --show-session from the archive."""
+    import sqlite3
+    from .archive import DEFAULT_PATH, Archive, format_time
+
+    path = args.archive_db or DEFAULT_PATH
+    if not os.path.exists(path):
+        print(f"Error: no archive at {path} (record one with --archive or the GUI)", file=sys.stderr)
+        return 1
+    archive = Archive(path)
+    try:
+        if args.list_sessions:
+            for session_id, port, baud, started, ended, lines, banner in reversed(archive.sessions(limit=1000)):
+                banner = " | ".join(banner.splitlines())
+                print(f"{session_id:6d}  {format_time(started)}  {port}  {baud}  {lines} lines  {banner}".rstrip())
+        elif args.search:
+            ports = {}
+            for session_id, seq, stamp, text in archive.search(args.search, limit=1000):
+                if session_id not in ports:
+                    ports[session_id] = archive.session(session_id)[1]
+                print(f"#{session_id}:{seq} [{format_time(stamp)}] [{ports[session_id]}] {text}")
+        else:
+            session = archive.session(args.show_session)
+            if session is None:
+                print(f"Error: no session {args.show_session} in {path}", file=sys.stderr)
+                return 1
+            start = 0
+            while True:
+                page = archive.lines(args.show_session, start, 10000)
+                if not page:
+                    break
+                sys.stdout.write("".join(f"[{format_time(stamp)}] {text}\n" for _, stamp, text in page))
+                start = page[-1][0] + 1
+    except sqlite3.Error as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        archive.stop()
+    return 0
+
+
+def run_headless(args, decoder=None, out=None, keep=None, idf_file=None, started=None):
+    """Log ports until the duration elapses, a port fails, or SIGINT/SIGTERM arrives.
+
+    With --reconnect a failing port is retried with exponential backoff instead.
+    decoder, out, keep and idf_file are the already loaded --decoder, opened --output
+    (stdout if None), compiled --include/--exclude filter and opened --idf-csv file.
+    started is the time.perf_counter() taken first thing by the entry script; without
+    it the reported startup time leaves out the imports.
+    """
+    out = out or sys.stdout
+    keep = keep or compile_filter(args.include, args.exclude)
+    macro = None
+    if args.send or args.macro:
+        try:
+            macro = build_macro(args.send, args.macro)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+    framer_options = {"encoding": args.encoding, "errors": args.decode_errors}
+    if args.framing == "length":
+        framer_options = {"header_size": args.length_header, "byteorder": args.length_byteorder}
+    session = SessionManager()
+    symbols = None
+    if args.elf:
+        from .backtrace import BacktraceDecoder, SymbolIndex
+
+        started = time.perf_counter()
+        try:
+            symbols = SymbolIndex.load(args.elf)
+        except (OSError, ValueError) as e:
+            print(f"Error: cannot load {args.elf}: {e}", file=sys.stderr)
+            return 1
+        print(f"Symbols: {symbols.summary()} in {(time.perf_counter() - started) * 1000:.0f} ms", file=sys.stderr)
+    captures = {}  # requested port -> CaptureWriter, kept across reconnects
+    archive = None
+    archived = {}  # device -> ArchiveSession of the current connection
+    if args.archive:
+        import sqlite3
+        from .archive import DEFAULT_PATH, Archive
+
+        archive = Archive(args.archive_db or DEFAULT_PATH, stats=session.stats,
+                          on_message=lambda message: print(message, file=sys.stderr))
+        try:
+            archive.start()
+        except (sqlite3.Error, OSError) as e:
+            print(f"Error: cannot open archive {archive.path}: {e}", file=sys.stderr)
+            return 1
+    bridges = {}  # requested port -> Bridge, kept across reconnects so clients stay connected
+    transmitter = Transmitter(args.line_ending, args.byte_delay / 1000, args.line_delay / 1000, stats=session.stats)
+    watcher = PortWatcher() if args.reconnect else None
+    reconnector = Reconnector(stats=session.stats)
+    identities = {}  # device -> identity at connect time
+    origins = {}  # device -> port given on the command line, which may come back under another name
+    status = 0
+
+    def open_port(port, origin=None):
+        origin = origin or port
+        engine = session.add(port, args.baud, framer=make_framer(args.framing, **framer_options), decoder=decoder)
+        if symbols:
+            engine.backtrace = BacktraceDecoder(symbols)
+        if args.capture_dir:
+            capture = captures.get(origin)
+            if capture is None:
+                capture = captures[origin] = CaptureWriter(
+                    args.capture_dir, prefix=engine.name, max_bytes=args.rotate_mb * 1024 * 1024,
+                    compression=args.compression, on_message=lambda message: print(message, file=sys.stderr))
+                capture.start()
+            engine.capture = capture
+        if args.serve:
+            bridge = bridges.get(origin)
+            if bridge is None:
+                host, base = parse_address(args.serve)
+                bridge = Bridge(host, base + len(bridges) if base else 0, args.serve_mode,
+                                max_buffer=args.client_buffer * 1024, policy=args.slow_client,
+                                transmitter=transmitter, writable=not args.serve_read_only, stats=session.stats,
+                                on_message=lambda message: print(message, file=sys.stderr))
+                bridge.start()
+                bridges[origin] = bridge
+                print(f"Serving {origin} on {host}:{bridge.address[1]} ({args.serve_mode})", file=sys.stderr)
+            bridge.attach(engine)
+        if archive:
+            archived[port] = archive.open_session(port, args.baud)
+        if watcher:
+            identities[port] = watcher.identity_of(port)
+        origins[port] = origin
+        print(f"Connected to {port} ({args.baud} baud)", file=sys.stderr)
+        return engine
+
+    if watcher:
+        watcher.scan()  # Identities of the ports about to be opened
+        watcher.start()
+    for port in args.port + [replay_url(path, args.speed) for path in args.replay]:
+        try:
+            open_port(port)
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            status = 1
+            break
+    if status:
+        session.close()
+        if watcher:
+            watcher.stop()
+        for bridge in bridges.values():
+            bridge.stop()
+        for capture in captures.values():
+            capture.stop()
+        if archive:
+            archive.stop()
+        return status
+    startup_ms = (time.perf_counter() - (started or _IMPORTED_AT)) * 1000
+    print(f"Ready in {startup_ms:.1f} ms" + ("" if started else " (excluding imports)"), file=sys.stderr)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    deadline = time.monotonic() + args.duration if args.duration else None
+    prefix_ports = len(session) > 1
+    formatter = TimestampFormatter(args.timestamps)
+    last_stamp = None
+    parse_idf = bool(args.level or args.tag or idf_file)
+    idf_csv = None
+    if idf_file:
+        idf_csv = csv.writer(idf_file)
+        idf_csv.writerow(CSV_COLUMNS)
+        csv_formatter = TimestampFormatter("clock-us")
+    runner = None
+    if macro:
+        runner = MacroRunner(macro, transmitter, next(iter(session.engines.values())), stats=session.stats)
+
+    def write_lines(engines):
+        nonlocal last_stamp
+        batch = []
+        batch_stamps = []
+        for engine in engines:
+            lines, stamps, _ = engine.drain_lines()
+            if archive and engine.port in archived:
+                archive.add(archived[engine.port], lines, stamps)
+            if runner and engine is runner.engine and not runner.done:
+                for message in runner.poll(lines, stamps):
+                    print(message, file=sys.stderr)
+            records = parse_batch(lines) if parse_idf else ()
+            for line, stamp, record in zip(lines, stamps, records or [None] * len(lines)):
+                if record is not None:
+                    level, tick, tag, message, _ = record
+                    if args.level and level not in args.level or args.tag and tag not in args.tag:
+                        continue
+                if keep(line):
+                    batch.append(f"[{engine.name}] {line}" if prefix_ports else line)
+                    batch_stamps.append(stamp)
+                    if idf_csv:
+                        idf_csv.writerow(csv_row(stamp, engine.name, tick, level, tag, message, csv_formatter))
+        if batch:
+            batch = formatter.prefix_lines(batch, batch_stamps, last_stamp)
+            last_stamp = batch_stamps[-1]
+            out.write("\n".join(batch) + "\n")
+            out.flush()
+
+    try:
+        while not stop.wait(args.poll_interval):
+            errors = [(engine.port, engine.take_error()) for engine in session.engines.values()]
+            write_lines(session.engines.values())
+            failed = False
+            for port, error in errors:
+                if error is None:
+                    continue
+                if archive and port in archived:
+                    archive.end_session(archived.pop(port))
+                if isinstance(error, ReplayFinished):
+                    session.remove(port)
+                    print(error, file=sys.stderr)
+                    continue
+                print(f"Error reading data from {port}: {error}", file=sys.stderr)
+                if watcher and not is_replay(port):
+                    session.remove(port)
+                    reconnector.lost(port, identities.pop(port, port))
+                    print(f"Lost {port}, reconnecting...", file=sys.stderr)
+                else:
+                    failed = True
+            while transmitter.errors:
+                port, error = transmitter.errors.popleft()
+                print(f"Error writing to {port}: {error}", file=sys.stderr)
+            if runner and not runner.done:
+                if runner.engine.port not in session:
+                    runner.stop()
+                for message in runner.poll():  # Sleeps and timeouts also end without new lines
+                    print(message, file=sys.stderr)
+            if failed:
+                status = 1
+                break
+            if runner and runner.done and not deadline:
+                break
+            if archive:
+                archive.revive()  # The writer stops after repeated SQLite errors; retry it now and then
+            if reconnector.pending:
+                for port, identity, _ in reconnector.due(set(watcher.ports)):
+                    device = watcher.device_for(identity)
+                    try:
+                        if not device or device in session:
+                            raise OSError(f"{port} is not available")
+                        open_port(device, origins.get(port))
+                    except Exception:
+                        reconnector.failed(port)
+                        continue
+                    if device != port:
+                        origins.pop(port, None)  # The old name is gone; device carries the origin now
+                    gap, attempts = reconnector.succeeded(port)
+                    print(f"Reconnected to {device} after {gap * 1000:.0f} ms ({attempts} attempts)", file=sys.stderr)
+            if not len(session) and not reconnector.pending:
+                break  # Every replay has finished
+            if deadline and time.monotonic() >= deadline:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engines = list(session.engines.values())
+        if watcher:
+            watcher.stop()
+        transmitter.close()
+        session.close()
+        for bridge in bridges.values():
+            bridge.stop()
+        write_lines(engines)  # Whatever arrived before the ports closed
+        if args.stats:
+            session.stats.export(args.stats)
+        for capture in captures.values():
+            capture.stop()
+        if archive:
+            for record in archived.values():
+                archive.end_session(record)
+            archive.stop()
+    if runner and runner.error:
+        status = 1
+    return status
+
+
+def main(argv=None, started=None):
+    parser = build_parser()
+    args, qt_args = parser.parse_known_args(argv)
+    if args.list_sessions or args.search or args.show_session is not None:
+        return run_archive_query(args)
+    if not args.headless:
+        from .gui import run_gui  # PyQt6 is only imported when the GUI is requested
+        return run_gui(sys.argv[:1] + qt_args)
+    if qt_args:
+        parser.error(f"unrecognized arguments: {' '.join(qt_args)}")
+    if not args.port and not args.replay:
+        parser.error("--port or --replay is required with --headless")
+    try:
+        codecs.lookup(args.encoding)
+    except LookupError:
+        parser.error(f"unknown encoding: {args.encoding}")
+    if args.level and any(level not in LEVELS for level in args.level):
+        parser.error(f"--level takes level letters from {LEVELS}, got {args.level}")
+    if args.serve:
+        try:
+            parse_address(args.serve)
+        except ValueError:
+            parser.error(f"invalid --serve address: {args.serve}")
+    try:
+        keep = compile_filter(args.include, args.exclude)
+    except re.error as e:
+        parser.error(f"invalid --include/--exclude pattern {e.pattern!r}: {e}")
+    decoder = None
+    if args.decoder:
+        try:
+            decoder = load_decoder(args.decoder)
+        except (ImportError, AttributeError, ValueError) as e:
+            parser.error(f"invalid --decoder {args.decoder}: {e}")
+    out = None
+    if args.output:
+        try:
+            out = open(args.output, "a", encoding="utf-8")
+        except OSError as e:
+            parser.error(f"cannot open --output {args.output}: {e}")
+    idf_file = None
+    if args.idf_csv:
+        try:
+            idf_file = open(args.idf_csv, "w", encoding="utf-8", newline="")
+        except OSError as e:
+            if out:
+                out.close()
+            parser.error(f"cannot open --idf-csv {args.idf_csv}: {e}")
+    try:
+        return run_headless(args, decoder, out, keep, idf_file, started)
+    finally:
+        if out:
+            out.close()
+        if idf_file:
+            idf_file.close()
@@ -0,0 +1,211 @@
+"""Qt-free serial engine: port ownership, the reader thread, line assembly and capture."""
+import os
+import threading
+import time
+from collections import deque
+
+import serial
+
+from .framing import LineFramer, format_frame
+from .replay import ReplayPort, is_replay, parse_replay_url
+from .stats import PipelineStats
+
+
+class SerialEngine:
+    """Reads a serial port on a background thread and hands out decoded lines.
+
+    The reader thread only queues raw chunks stamped with time.monotonic_ns() at
+    arrival (and feeds the capture writer, if any); drain_lines() frames and decodes
+    them on the caller's thread, so the GUI flush timer and the headless loop share
+    the same path. Each line carries the stamp of the chunk that completed it. Binary framers (see framing)
+    turn each frame into a display line with decoder, or a hex dump by default.
+    """
+
+    def __init__(self, port, baud_rate, capture=None, queue_size=4096, framer=None, decoder=None, stats=None):
+        self.port = port
+        self.baud_rate = baud_rate
+        self.capture = capture  # CaptureWriter fed with every raw chunk
+        self.bridge = None  # Bridge serving the raw chunks over TCP, set by Bridge.attach()
+        self.hex_dump = None  # HexDump given the raw chunks as they are drained (Hex view)
+        self.backtrace = None  # BacktraceDecoder inserting symbolized panic addresses into the lines
+        self.serial_port = None
+        self.rx_queue = deque(maxlen=queue_size)  # (stamp, raw chunk) pushed by the reader thread
+        self.framer = framer or LineFramer()  # Keeps incomplete frames between drains
+        self.decoder = decoder  # Optional callable turning a binary frame into a line
+        self.dropped = 0  # Chunks discarded because the queue was full
+        self.error = None  # Set by the reader thread, collected with take_error()
+        self.reading_active = False
+        self._thread = None
+        self.stats = stats or PipelineStats()  # May be shared by every port of a session
+        # Written by whichever thread reads this port, so named after it; the drain
+        # and TX metrics below have one writer thread per session and are shared
+        name = self.name
+        self._read_bytes = self.stats.counter(f"read.{name}.bytes")
+        self._read_size = self.stats.histogram(f"read.{name}.size", "B")
+        self._read_latency = self.stats.histogram(f"read.{name}.latency", "ns")
+        self._queue_dropped = self.stats.counter(f"queue.{name}.dropped")
+        self._queue_depth = self.stats.histogram("queue.depth", "chunks")
+        self._decode_time = self.stats.histogram("decode.time", "ns")
+        self._decode_lines = self.stats.counter("decode.lines")
+        self._frame_errors = self.stats.counter("decode.frame_errors")
+        self._decoder_errors = self.stats.counter("decode.errors")
+        self._frame_errors_seen = 0
+        self._tx_bytes = self.stats.counter("tx.bytes")
+
+    @property
+    def is_open(self):
+        return bool(self.serial_port and self.serial_port.is_open)
+
+    @property
+    def name(self):
+        """Short port name used to prefix lines when several ports are monitored."""
+        if is_replay(self.port):
+            return os.path.basename(parse_replay_url(self.port)[0])
+        return os.path.basename(self.port)
+
+    def open(self, threaded=True):
+        """Open the port; raises serial.SerialException (OSError for a replay).
+
+        With threaded=False the port is opened non-blocking and the caller (a
+        SessionManager) is expected to call read_available() when it is readable.
+        A "replay:PATH" port plays back a capture instead (see replay).
+        """
+        if is_replay(self.port):
+            self.serial_port = ReplayPort.from_url(self.port)  # Always read by the engine's thread
+        else:
+            self.serial_port = serial.Serial(self.port, self.baud_rate, timeout=1 if threaded else 0)
+        self.rx_queue.clear()
+        self.framer.reset()
+        self.error = None
+        self.reading_active = True
+        if threaded:
+            self.start_thread()
+
+    def start_thread(self):
+        self._thread = threading.Thread(target=self._read_loop, name=f"reader-{self.port}", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Stop the reader thread and close the port."""
+        self.reading_active = False
+        if self.is_open:
+            self.serial_port.close()
+
+    def _read_loop(self):
+        backlog = getattr(self.serial_port, "max_backlog", None)
+        queue = self.rx_queue
+        while self.reading_active:
+            if backlog and len(queue) >= backlog:
+                time.sleep(0.005)  # A replay can wait for the consumer instead of dropping data
+                continue
+            try:
+                self.read_available()
+            except Exception as e:
+                if self.reading_active:
+                    self.error = e
+                break
+
+    def read_available(self):
+        """Read whatever the driver has buffered (at least one byte) and queue it."""
+        port = self.serial_port
+        started = time.monotonic_ns()
+        data = port.read(port.in_waiting or 1)
+        if data:
+            arrived = time.monotonic_ns()
+            self._read_latency.record(arrived - started)
+            self._read_size.record(len(data))
+            self._read_bytes.add(len(data))
+            self.feed(data, arrived)
+
+    def feed(self, data, stamp=None):
+        """Queue a raw chunk for drain_lines() and hand it to the capture writer and bridge.
+
+        stamp is the time.monotonic_ns() at which the chunk arrived (now by default).
+        """
+        stamp = stamp or time.monotonic_ns()
+        capture = self.capture
+        if capture:
+            capture.write(data, stamp)
+        bridge = self.bridge
+        if bridge:
+            bridge.write(data)
+        queue = self.rx_queue
+        if len(queue) == queue.maxlen:
+            self.dropped += 1  # deque discards the oldest chunk
+            self._queue_dropped.add()
+        queue.append((stamp, data))
+
+    def write(self, data):
+        """Write bytes to the port; called from the transmitter's thread, may block."""
+        self.serial_port.write(data)
+        self._tx_bytes.add(len(data))
+
+    def set_framer(self, framer):
+        """Switch framing; bytes of a frame in progress are discarded."""
+        self.framer = framer
+        self._frame_errors_seen = framer.errors
+
+    def take_error(self):
+        """Return and clear the last reader error, if any."""
+        error, self.error = self.error, None
+        return error
+
+    def drain_chunks(self):
+        """Pop every queued (stamp, chunk) pair."""
+        queue = self.rx_queue
+        chunks = []
+        while queue:
+            chunks.append(queue.popleft())
+        return chunks
+
+    def drain_lines(self):
+        """Pop queued chunks and return the complete, non-empty lines they contain.
+
+        Returns (lines, stamps, chunk_count), where stamps[i] is the arrival time of
+        the chunk that completed lines[i]; an incomplete trailing frame is kept for
+        the next call.
+        """
+        self._queue_depth.record(len(self.rx_queue))
+        chunks = self.drain_chunks()
+        if not chunks:
+            return [], [], 0
+        started = time.perf_counter_ns()
+        lines = []
+        stamps = []
+        dump = self.hex_dump
+        for stamp, data in chunks:
+            if dump is not None:
+                dump.extend(data)
+            decoded = self._decode(data)
+            if decoded:
+                lines.extend(decoded)
+                stamps.extend([stamp] * len(decoded))
+        if self.backtrace is not None and lines:
+            lines, stamps = self.backtrace.process(lines, stamps)
+        self._decode_time.record(time.perf_counter_ns() - started)
+        self._decode_lines.add(len(lines))
+        errors = self.framer.errors
+        if errors != self._frame_errors_seen:
+            self._frame_errors.add(errors - self._frame_errors_seen)
+            self._frame_errors_seen = errors
+        return lines, stamps, len(chunks)
+
+    def _decode_frame(self, frame):
+        """Run the user decoder on one frame; a frame it fails on gets the default formatting."""
+        try:
+            return self.decoder(frame)
+        except Exception:
+            self._decoder_errors.add()
+            return format_frame(frame)
+
+    def _decode(self, data):
+        frames = self.framer.feed(data)
+        if not frames:
+            return []
+        if not self.framer.text:
+            if self.decoder is None:
+                return [format_frame(frame) for frame in frames]
+            return [self._decode_frame(frame) for frame in frames]
+        lines = [line.strip() for line in frames]  # Already decoded by the line framer
+        return [line for line in lines if line]
+
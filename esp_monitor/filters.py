@@ -0,0 +1,210 @@
+"""Incremental regex filtering, highlighting and search over the scrollback.
+
+Every line appended to a LineBuffer has a sequence number. A PatternIndex keeps the
+sorted sequence numbers of the lines its regex matched; it is fed only the newly
+arrived batch and trimmed as old lines are evicted, so the regex runs once per line
+per pattern. Filter views, highlights and next/previous search are then answered
+from these indexes with merges and bisects instead of rescanning the history.
+"""
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+
+class PatternIndex:
+    """Sorted sequence numbers of the lines matching one regex."""
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.regex = re.compile(pattern)
+        self.seqs = array("q")
+        self._start = 0  # Entries before this belong to evicted lines
+        self.scanned_to = 0  # Sequence number of the first line not scanned yet
+
+    def __len__(self):
+        return len(self.seqs) - self._start
+
+    def __getitem__(self, index):
+        return self.seqs[self._start + index]
+
+    def __iter__(self):
+        return iter(self.seqs[self._start:])
+
+    def __contains__(self, seq):
+        position = bisect_left(self.seqs, seq, self._start)
+        return position < len(self.seqs) and self.seqs[position] == seq
+
+    def scan(self, lines, first_seq):
+        """Index the matches among lines numbered first_seq, first_seq + 1, ..."""
+        search = self.regex.search
+        self.seqs.extend(seq for seq, line in enumerate(lines, first_seq) if search(line))
+        self.scanned_to = first_seq + len(lines)
+
+    def trim(self, first_seq):
+        """Forget matches older than first_seq; compacts once half the array is dead."""
+        self._start = bisect_left(self.seqs, first_seq, self._start)
+        if self._start > len(self.seqs) // 2:
+            del self.seqs[:self._start]
+            self._start = 0
+
+    def next_after(self, seq):
+        """First match after seq, or None."""
+        position = bisect_right(self.seqs, seq, self._start)
+        return self.seqs[position] if position < len(self.seqs) else None
+
+    def previous_before(self, seq):
+        """Last match before seq, or None."""
+        position = bisect_left(self.seqs, seq, self._start)
+        return self.seqs[position - 1] if position > self._start else None
+
+    def rank(self, seq):
+        """Number of indexed matches strictly before seq."""
+        return bisect_left(self.seqs, seq, self._start) - self._start
+
+
+class FilterEngine:
+    """Keeps the filtered view of a LineBuffer up to date batch by batch.
+
+    include/exclude select which lines are visible; highlight rules map a regex to a
+    color; search is a separate pattern for next/previous navigation. Indexes of
+    recently used patterns are cached, so switching back to a filter is free.
+    """
+
+    CACHE_SIZE = 16
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.include = None  # PatternIndex or None
+        self.exclude = None
+        self.search = None
+        self.highlights = []  # [(PatternIndex, color)]
+        self.visible = None  # PatternIndex-like list of visible seqs, None when unfiltered
+        self._indexes = OrderedDict()  # pattern -> PatternIndex (LRU)
+
+    @property
+    def active(self):
+        return self.include is not None or self.exclude is not None
+
+    def index_for(self, pattern):
+        """Return the index for a pattern, scanning only lines it has not seen yet.
+
+        A new pattern is backfilled from the whole buffer once; a cached pattern that
+        sat unused only catches up on the lines appended meanwhile. Raises re.error
+        for invalid patterns.
+        """
+        index = self._indexes.get(pattern)
+        if index is None:
+            index = self._indexes[pattern] = PatternIndex(pattern)
+        self._indexes.move_to_end(pattern)
+        buffer = self.buffer
+        if index.scanned_to < buffer.total:
+            start = max(index.scanned_to, buffer.first_seq)
+            index.trim(buffer.first_seq)
+            index.scan(buffer.lines_from(start), start)
+        in_use = self._in_use()
+        for old in list(self._indexes):
+            if len(self._indexes) <= self.CACHE_SIZE:
+                break
+            if self._indexes[old] not in in_use:
+                del self._indexes[old]
+        return index
+
+    def _in_use(self):
+        used = [self.include, self.exclude, self.search] + [index for index, _ in self.highlights]
+        return [index for index in used if index is not None]
+
+    def set_filter(self, include, exclude):
+        """Set the include/exclude patterns ("" disables one) and rebuild the view from the indexes."""
+        self.include = self.index_for(include) if include else None
+        self.exclude = self.index_for(exclude) if exclude else None
+        if not self.active:
+            self.visible = None
+            return
+        first, end = self.buffer.first_seq, self.buffer.total
+        candidates = self.include if self.include is not None else range(first, end)
+        self.visible = _VisibleIndex(self._subtract(candidates, self.exclude))
+
+    def set_search(self, pattern):
+        self.search = self.index_for(pattern) if pattern else None
+
+    def add_highlight(self, pattern, color):
+        self.highlights.append((self.index_for(pattern), color))
+
+    def clear_highlights(self):
+        self.highlights = []
+
+    def highlight_for(self, seq):
+        """Color of the first highlight rule matching seq, or None."""
+        for index, color in self.highlights:
+            if seq in index:
+                return color
+        return None
+
+    def on_append(self, lines, first_seq):
+        """Index a newly appended batch.
+
+        Returns the seqs that become visible, to be passed to commit() once the view
+        is ready for the inserted rows, or None when no filter is active.
+        """
+        before = {}
+        for index in self._in_use():
+            if index not in before:
+                before[index] = len(index.seqs)
+                index.scan(lines, first_seq)
+        if self.visible is None:
+            return None
+        if self.include is not None:
+            candidates = self.include.seqs[before[self.include]:]
+        else:
+            candidates = range(first_seq, first_seq + len(lines))
+        exclude_new = None
+        if self.exclude is not None:
+            exclude_new = set(self.exclude.seqs[before[self.exclude]:])
+        return [seq for seq in candidates if not exclude_new or seq not in exclude_new]
+
+    def commit(self, added):
+        """Make the seqs returned by on_append() part of the filtered view."""
+        self.visible.seqs.extend(added)
+
+    def on_evict(self, first_seq):
+        """Drop index entries for evicted lines; returns the number of view rows removed."""
+        removed = 0
+        if self.visible is not None:
+            removed = self.visible.rank(first_seq)
+            self.visible.trim(first_seq)
+        for index in self._indexes.values():
+            index.trim(first_seq)
+        return removed
+
+    def reset(self):
+        """Forget all matches, e.g. after the buffer was cleared."""
+        for pattern, index in list(self._indexes.items()):
+            self._indexes[pattern] = fresh = PatternIndex(pattern)
+            fresh.scanned_to = self.buffer.total
+            if self.include is index:
+                self.include = fresh
+            if self.exclude is index:
+                self.exclude = fresh
+            if self.search is index:
+                self.search = fresh
+            self.highlights = [(fresh if old is index else old, color) for old, color in self.highlights]
+        if self.visible is not None:
+            self.visible = _VisibleIndex([])
+
+    @staticmethod
+    def _subtract(candidates, exclude):
+        if exclude is None:
+            return candidates
+        excluded = set(exclude)
+        return [seq for seq in candidates if seq not in excluded]
+
+
+class _VisibleIndex(PatternIndex):
+    """Sorted seqs of the visible lines; built from other indexes, never scanned."""
+
+    def __init__(self, seqs):
+        self.pattern = None
+        self.seqs = array("q", seqs)
+        self._start = 0
+        self.scanned_to = 0
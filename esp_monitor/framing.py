@@ -0,0 +1,215 @@
+"""Framing of the raw byte stream into lines or binary frames.
+
+Each binary framer keeps one reusable bytearray for the bytes that do not form a
+complete frame yet. Delimiters are located with bytearray.find and frames are cut out
+through a memoryview, so the Python-level work is per frame (or per COBS block), never
+per byte. The line framer decodes text incrementally and splits the decoded text.
+"""
+import codecs
+import importlib
+
+ENCODINGS = ["utf-8", "latin-1", "ascii", "cp1252", "shift_jis", "euc-jp", "utf-16-le"]
+DECODE_ERRORS = ["replace", "backslashreplace", "ignore"]  # "strict" would raise on boot noise
+
+
+class Framer:
+    """Base class: feed() raw bytes, get back a list of complete frames as bytes."""
+
+    text = False  # True when frames are lines of text rather than binary payloads
+
+    def __init__(self, max_frame=65536):
+        self.max_frame = max_frame
+        self.errors = 0  # Malformed or oversized frames that were discarded
+        self._buffer = bytearray()
+
+    def reset(self):
+        del self._buffer[:]
+
+    def feed(self, data):
+        raise NotImplementedError
+
+
+class DelimitedFramer(Framer):
+    """Frames terminated by a single delimiter byte, decoded by decode_frame()."""
+
+    delimiter = b"\n"
+
+    def feed(self, data):
+        buffer = self._buffer
+        buffer += data
+        frames = []
+        start = 0
+        view = memoryview(buffer)
+        try:
+            while True:
+                end = buffer.find(self.delimiter, start)
+                if end < 0:
+                    break
+                if end > start:  # Back-to-back delimiters carry no frame
+                    try:
+                        frames.append(self.decode_frame(view[start:end]))
+                    except ValueError:
+                        self.errors += 1
+                start = end + 1
+        finally:
+            view.release()  # The buffer cannot be resized while a view is exported
+        del buffer[:start]
+        if len(buffer) > self.max_frame:
+            self.errors += 1  # No delimiter in sight; drop the garbage and resync
+            del buffer[:]
+        return frames
+
+    def decode_frame(self, frame):
+        return bytes(frame)
+
+
+class LineFramer(Framer):
+    """Newline-terminated text lines (the classic serial monitor view), returned as str.
+
+    Each chunk goes through one incremental codecs decoder, so a multi-byte character
+    split across reads is decoded once its last byte arrives, and lines are split on
+    the decoded text (which also works for UTF-16). Bytes the encoding cannot decode
+    (ROM boot output at 74880 baud, line noise) are handled by the errors policy
+    instead of raising. Text without a newline is passed on as a line once it reaches
+    max_frame characters, so a stream that never ends a line cannot grow the buffer
+    without bound. Raises LookupError for an unknown encoding.
+    """
+
+    text = True
+
+    def __init__(self, encoding="utf-8", errors="replace", max_frame=65536):
+        super().__init__(max_frame=max_frame)
+        self.encoding = encoding
+        self.error_policy = errors
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors)
+        self._partial = ""  # Decoded text after the last newline
+
+    def reset(self):
+        self._decoder.reset()
+        self._partial = ""
+
+    def feed(self, data):
+        text = self._decoder.decode(data)
+        if "\n" not in text:
+            self._partial += text
+            lines = []
+        else:
+            lines = (self._partial + text).split("\n")
+            self._partial = lines.pop()
+        if self.max_frame and len(self._partial) >= self.max_frame:
+            lines.append(self._partial)  # No newline in sight; pass it on rather than grow forever
+            self._partial = ""
+        return lines
+
+
+class CobsFramer(DelimitedFramer):
+    """Consistent Overhead Byte Stuffing, frames terminated by 0x00."""
+
+    delimiter = b"\x00"
+
+    def decode_frame(self, frame):
+        # Copy block by block: each code byte gives the length of a zero-free run
+        out = bytearray()
+        size = len(frame)
+        index = 0
+        while index < size:
+            code = frame[index]
+            end = index + code
+            if code == 0 or end > size:
+                raise ValueError("invalid COBS frame")
+            out += frame[index + 1:end]
+            index = end
+            if code != 0xFF and index < size:
+                out.append(0)
+        return bytes(out)
+
+
+class SlipFramer(DelimitedFramer):
+    """RFC 1055 SLIP, frames terminated by 0xC0 with 0xDB escapes."""
+
+    delimiter = b"\xc0"
+
+    def decode_frame(self, frame):
+        frame = bytes(frame)
+        if b"\xdb" not in frame:
+            return frame
+        # ESC ESC_END must be undone before ESC ESC_ESC, or "DB DD DC" would decode wrongly
+        return frame.replace(b"\xdb\xdc", b"\xc0").replace(b"\xdb\xdd", b"\xdb")
+
+
+class LengthPrefixedFramer(Framer):
+    """Frames preceded by an unsigned length header of header_size bytes."""
+
+    def __init__(self, header_size=2, byteorder="little", max_frame=65536):
+        super().__init__(max_frame=max_frame)
+        self.header_size = header_size
+        self.byteorder = byteorder
+
+    def feed(self, data):
+        buffer = self._buffer
+        buffer += data
+        frames = []
+        start = 0
+        available = len(buffer)
+        header_size = self.header_size
+        view = memoryview(buffer)
+        try:
+            while available - start >= header_size:
+                length = int.from_bytes(view[start:start + header_size], self.byteorder)
+                if length > self.max_frame:
+                    # The stream is out of sync; there is no delimiter to recover on
+                    self.errors += 1
+                    start = available
+                    break
+                end = start + header_size + length
+                if end > available:
+                    break
+                frames.append(bytes(view[start + header_size:end]))
+                start = end
+        finally:
+            view.release()
+        del buffer[:start]
+        return frames
+
+
+FRAMERS = {
+    "lines": LineFramer,
+    "cobs": CobsFramer,
+    "slip": SlipFramer,
+    "length": LengthPrefixedFramer,
+}
+
+
+def make_framer(name, **options):
+    """Create a framer by name ("lines", "cobs", "slip" or "length").
+
+    encoding and errors only apply to "lines" and are ignored by the binary framers.
+    """
+    if name != "lines":
+        options.pop("encoding", None)
+        options.pop("errors", None)
+    try:
+        framer_class = FRAMERS[name]
+    except KeyError:
+        raise ValueError(f"unknown framing {name!r}") from None
+    return framer_class(**options)
+
+
+def format_frame(frame):
+    """Show printable UTF-8 frames as text and anything else as a hex dump."""
+    try:
+        text = frame.decode("utf-8")
+    except UnicodeDecodeError:
+        text = None
+    if text is not None and text.isprintable():
+        return text
+    return f"<{len(frame)} bytes> {frame.hex(' ')}"
+
+
+def load_decoder(spec):
+    """Import a user decoder given as "module:function"; it receives each frame as bytes."""
+    module_name, _, attribute = spec.partition(":")
+    if not module_name or not attribute:
+        raise ValueError(f"decoder must look like module:function, got {spec!r}")
+    module = importlib.import_module(module_name)
+    return getattr(module, attribute)
@@ -0,0 +1,2379 @@
+"""PyQt6 front end: the SerialMonitor window and its scrollback model."""
+import sys
+import threading  # Import threading for non-blocking file writes
+import time
+import os
+import re
+import sqlite3
+from collections import deque
+
+from PyQt6.QtWidgets import QApplication, QFileDialog, QWidget, QVBoxLayout, QTableView, QAbstractItemView, QHeaderView, QPushButton, QComboBox, QLabel, QHBoxLayout, QTabWidget, QGroupBox, QFormLayout, QLineEdit, QTableWidget, QTableWidgetItem
+from PyQt6.QtCore import QTimer, Qt, QAbstractListModel, QAbstractTableModel, QModelIndex
+from PyQt6.QtGui import QColor, QFont
+
+from .archive import DEFAULT_PATH as ARCHIVE_PATH, Archive, format_time
+from .backtrace import BacktraceDecoder, SymbolIndex
+from .bridge import MODES as BRIDGE_MODES, POLICIES as BRIDGE_POLICIES, Bridge
+from .buffer import LineBuffer
+from .capture import CaptureWriter
+from .filters import FilterEngine
+from .framing import DECODE_ERRORS, ENCODINGS, FRAMERS, make_framer
+from .hexdump import ROW_BYTES, HexDump
+from .idflog import ANSI_COLORS, LEVEL_COLORS, LEVELS, LogStore
+from .ports import PortWatcher, Reconnector
+from .replay import ReplayFinished, is_replay, replay_url
+from .session import SessionManager
+from .timestamps import MODES as TIMESTAMP_MODES, TimestampFormatter
+from .transmit import LINE_ENDINGS, Macro, MacroRunner, Transmitter
+
+try:
+    from .telemetry import TelemetryStore  # Needs numpy, which is optional
+    from .plot import PlotWidget
+except ImportError:
+    TelemetryStore = None
+
+
+class ArchiveModel(QAbstractListModel):
+    """List model over an archived session or search results, read from SQLite a page at a time.
+
+    A session is shown with one row per archived line; only the pages the view paints
+    are fetched, and at most MAX_PAGES of them are kept, so memory does not depend on
+    the session's length.
+    """
+
+    PAGE = 512
+    MAX_PAGES = 32
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.archive = None
+        self.session_id = None  # Session shown, or None for search results
+        self.results = []  # (session, seq, stamp, text, port) when showing search results
+        self._pages = {}  # page number -> [(seq, stamp, text)], oldest first
+        self._rows = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._rows
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        row = index.row()
+        if self.session_id is None:
+            session_id, seq, stamp, text, port = self.results[row]
+            return f"#{session_id}:{seq} [{format_time(stamp)}] [{port}] {text}"
+        line = self.line(row)
+        return f"[{format_time(line[1])}] {line[2]}" if line else ""
+
+    def line(self, row):
+        """(seq, stamp, text) of a session row, fetching its page if needed."""
+        number, offset = divmod(row, self.PAGE)
+        page = self._pages.get(number)
+        if page is None:
+            try:
+                page = self.archive.lines(self.session_id, number * self.PAGE, self.PAGE)
+            except sqlite3.Error:
+                page = []
+            if len(self._pages) >= self.MAX_PAGES:
+                del self._pages[next(iter(self._pages))]
+            self._pages[number] = page
+        return page[offset] if offset < len(page) else None
+
+    def show_session(self, archive, session_id, rows):
+        self.beginResetModel()
+        self.archive = archive
+        self.session_id = session_id
+        self.results = []
+        self._pages = {}
+        self._rows = rows
+        self.endResetModel()
+
+    def show_results(self, results):
+        self.beginResetModel()
+        self.session_id = None
+        self.results = results
+        self._pages = {}
+        self._rows = len(results)
+        self.endResetModel()
+
+
+class HexModel(QAbstractListModel):
+    """List model over a HexDump of one port: 16 bytes per row, formatted only when painted."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.dump = HexDump()
+        self.engine = None  # Engine whose raw bytes are shown
+        self._rows = 0  # Rows the view knows about
+        self._base = 0
+        self._total = 0
+        self._partial = 0  # Bytes in the last row at the last refresh, 0 if it was full
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._rows
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if index.isValid() and role == Qt.ItemDataRole.DisplayRole:
+            return self.dump.format_row(index.row())
+        return None
+
+    def set_engine(self, engine):
+        """Show another port's bytes from now on (the previous dump is dropped)."""
+        if engine is self.engine:
+            return
+        if self.engine is not None:
+            self.engine.hex_dump = None
+        if engine is None:
+            self.engine = None  # Keep showing what was received until another port is picked
+            return
+        self.beginResetModel()
+        self.engine = engine
+        self.dump = HexDump()
+        self._rows = self._base = self._total = self._partial = 0
+        engine.hex_dump = self.dump
+        self.endResetModel()
+
+    def refresh(self):
+        """Tell the view about the rows evicted and added since the last call; True if any."""
+        dump = self.dump
+        if dump.total == self._total:
+            return False
+        evicted = min(self._rows, (dump.base - self._base) // ROW_BYTES)
+        self._base = dump.base
+        if evicted:
+            self.beginRemoveRows(QModelIndex(), 0, evicted - 1)
+            self._rows -= evicted
+            self.endRemoveRows()
+        if self._rows and self._partial:  # The last row was partial and may have grown
+            last = self.index(self._rows - 1)
+            self.dataChanged.emit(last, last, [Qt.ItemDataRole.DisplayRole])
+        self._total = dump.total
+        self._partial = len(dump) % ROW_BYTES  # The stream offset is not row-aligned after clear()
+        rows = dump.rows
+        if rows > self._rows:
+            self.beginInsertRows(QModelIndex(), self._rows, rows - 1)
+            self._rows = rows
+            self.endInsertRows()
+        return True
+
+    def clear(self):
+        self.beginResetModel()
+        self.dump.clear()
+        self._rows = self._partial = 0
+        self._base = self.dump.base
+        self.endResetModel()
+
+
+class IdfLogModel(QAbstractTableModel):
+    """Table model over a LogStore of parsed ESP-IDF records, optionally filtered.
+
+    The filter is answered from the store's level and tag indexes; new batches are
+    matched on their own, so the view follows the stream without re-querying.
+    """
+
+    def __init__(self, formatter, headers, parent=None):
+        super().__init__(parent)
+        self.store = LogStore()
+        self.formatter = formatter  # Shared with the Monitor view
+        self.headers = headers
+        self.levels = None  # Filter: level letters, tag names, compiled message regex (None = any)
+        self.tags = None
+        self.pattern = None
+        self.visible = None  # Record numbers shown, None when unfiltered
+        self._rows = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._rows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.headers[section]
+        return None
+
+    def seq_at(self, row):
+        return self.store.first + row if self.visible is None else self.visible[row]
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        store = self.store
+        seq = self.seq_at(index.row())
+        if role == Qt.ItemDataRole.DisplayRole:
+            stamp, port, tick, level, tag, message, _ = store.record(seq)
+            column = index.column()
+            if column == 0:
+                if self.formatter.mode == "off":
+                    return ""
+                previous = store.stamps[seq - 1 - store.first] if seq > store.first else None
+                return self.formatter.format(stamp, previous)
+            return [None, port, str(tick) if tick >= 0 else "", level if level != "-" else "", tag, message][column]
+        if role == Qt.ItemDataRole.ForegroundRole:
+            i = seq - store.first
+            color = ANSI_COLORS.get(store.colors[i]) or LEVEL_COLORS.get(LEVELS[store.levels[i]])
+            return QColor(color) if color else None
+        return None
+
+    def append(self, lines, stamps, port):
+        """Parse and store a port's batch, then insert the rows that pass the filter."""
+        store = self.store
+        first = store.first
+        start = store.extend(lines, stamps, port)
+        if store.first != first:  # The oldest quarter was evicted; rebuild once
+            self.refilter()
+            return
+        added = None if self.visible is None else store.select(self.levels, self.tags, self.pattern, start)
+        count = store.total - start if added is None else len(added)
+        if not count:
+            return
+        self.beginInsertRows(QModelIndex(), self._rows, self._rows + count - 1)
+        if added is not None:
+            self.visible.extend(added)
+        self._rows += count
+        self.endInsertRows()
+
+    def set_filter(self, levels, tags, pattern):
+        self.levels, self.tags, self.pattern = levels, tags, pattern
+        self.refilter()
+
+    def refilter(self):
+        self.beginResetModel()
+        if self.levels is None and self.tags is None and self.pattern is None:
+            self.visible = None
+            self._rows = len(self.store)
+        else:
+            self.visible = self.store.select(self.levels, self.tags, self.pattern)
+            self._rows = len(self.visible)
+        self.endResetModel()
+
+    def clear(self):
+        self.store.clear()
+        self.refilter()
+
+    def set_headers(self, headers):
+        self.headers = headers
+        self.headerDataChanged.emit(Qt.Orientation.Horizontal, 0, len(headers) - 1)
+
+
+class LogModel(QAbstractListModel):
+    """List model over a LineBuffer; the view only asks for the rows it paints.
+
+    When a filter is active the rows are the FilterEngine's visible lines instead of
+    the whole buffer; highlight colors come from the engine's pattern indexes.
+    Timestamp prefixes are formatted from the stored arrival stamps as rows are painted.
+    """
+
+    def __init__(self, capacity, parent=None):
+        super().__init__(parent)
+        self.buffer = LineBuffer(capacity)
+        self.filters = FilterEngine(self.buffer)
+        self.formatter = TimestampFormatter("clock")
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        visible = self.filters.visible
+        return len(self.buffer) if visible is None else len(visible)
+
+    def seq_at(self, row):
+        """Sequence number of the line shown in a row."""
+        visible = self.filters.visible
+        return self.buffer.first_seq + row if visible is None else visible[row]
+
+    def row_of(self, seq):
+        """Row showing a sequence number, or -1 if it is filtered out or evicted."""
+        visible = self.filters.visible
+        if visible is None:
+            row = seq - self.buffer.first_seq
+            return row if 0 <= row < len(self.buffer) else -1
+        return visible.rank(seq) if seq in visible else -1
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            buffer = self.buffer
+            seq = self.seq_at(index.row())
+            line = buffer.get(seq)
+            if self.formatter.mode == "off":
+                return line
+            previous = buffer.stamp(seq - 1) if seq > buffer.first_seq else None
+            return f"{self.formatter.format(buffer.stamp(seq), previous)} {line}"
+        if role == Qt.ItemDataRole.BackgroundRole and self.filters.highlights:
+            color = self.filters.highlight_for(self.seq_at(index.row()))
+            if color:
+                background = QColor(color)
+                background.setAlpha(90)
+                return background
+        return None
+
+    def append_lines(self, lines, stamps):
+        """Append a batch of lines and their arrival stamps, evicting the oldest rows past the cap."""
+        buffer = self.buffer
+        filters = self.filters
+        lines = lines[-buffer.capacity:]
+        stamps = stamps[-buffer.capacity:]
+        if not lines:
+            return
+        evicted = max(0, len(buffer) + len(lines) - buffer.capacity)
+        if evicted:
+            new_first = buffer.first_seq + evicted
+            removed = evicted if filters.visible is None else filters.visible.rank(new_first)
+            if removed:
+                self.beginRemoveRows(QModelIndex(), 0, removed - 1)
+            buffer.drop_front(evicted)
+            filters.on_evict(new_first)
+            if removed:
+                self.endRemoveRows()
+        first = self.rowCount()
+        added = filters.on_append(lines, buffer.total)
+        count = len(lines) if added is None else len(added)
+        if count:
+            self.beginInsertRows(QModelIndex(), first, first + count - 1)
+        buffer.extend(lines, stamps)
+        if added:
+            filters.commit(added)
+        if count:
+            self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.buffer.clear()
+        self.filters.reset()
+        self.endResetModel()
+
+    def set_capacity(self, capacity):
+        self.beginResetModel()
+        self.buffer.resize(capacity)
+        self.filters.on_evict(self.buffer.first_seq)
+        self.endResetModel()
+
+    def set_filter(self, include, exclude):
+        """Show only lines matching include and not exclude; raises re.error."""
+        re.compile(include)
+        re.compile(exclude)
+        self.beginResetModel()
+        self.filters.set_filter(include, exclude)
+        self.endResetModel()
+
+    def highlights_changed(self):
+        if self.rowCount():
+            self.dataChanged.emit(self.index(0), self.index(self.rowCount() - 1),
+                                  [Qt.ItemDataRole.BackgroundRole])
+
+    def set_timestamp_mode(self, mode):
+        self.formatter.mode = mode
+        if self.rowCount():
+            self.dataChanged.emit(self.index(0), self.index(self.rowCount() - 1),
+                                  [Qt.ItemDataRole.DisplayRole])
+
+
+class SerialMonitor(QWidget):
+    def __init__(self):
+        super().__init__()
+        self.session = SessionManager()  # Connected ports, read on one selector thread
+        self.stats = self.session.stats  # Pipeline metrics shown on the Stats tab
+        self.frame_time = self.stats.histogram("ui.frame_time", "ns")
+        self.frame_lines = self.stats.histogram("ui.frame_lines", "lines")
+        self.lines_truncated = self.stats.counter("ui.lines_truncated")
+        self.auto_scroll = True
+        self.auto_reconnect = True  # Reopen ports that drop out (board reset, re-plug)
+        self.port_watcher = PortWatcher()  # Scans ports off the GUI thread
+        self.reconnector = Reconnector(stats=self.stats)
+        self.transmitter = Transmitter(stats=self.stats)  # TX queue, written by its own thread
+        self.macro_runner = None  # MacroRunner of the running macro or Send + Expect
+        self.port_identities = {}  # port -> VID/PID/serial identity at connect time
+        self._ports_version = -1  # Watcher version shown in the port selector
+        self.ui_messages = deque()  # Messages posted from worker threads
+        self.capturing = False  # Whether new connections get a CaptureWriter
+        self.captures = {}  # port -> CaptureWriter, fed directly by the reader
+        self.serving = False  # Whether new connections get a TCP Bridge
+        self.bridges = {}  # port -> Bridge, fed directly by the reader
+        self.archiving = False  # Whether connections are recorded in the session archive (opt-in)
+        self.archive = Archive(stats=self.stats, on_message=self.post_message)  # Started on the first recorded connection
+        self.archive_sessions = {}  # port -> ArchiveSession of the current connection
+        self.symbol_index = None  # SymbolIndex of the firmware ELF, set by the loader thread
+        self.backtrace_symbols = None  # The index the ports' BacktraceDecoders use
+        self.refresh_rate = 30  # UI flushes per second
+        self.scrollback_lines = 100000  # Line cap of the output ring buffer
+        self.framing = "lines"  # Framer used for ports (see framing.FRAMERS)
+        self.parse_idf = True  # Whether lines are parsed into the Logs tab's record store
+        self.encoding = "utf-8"  # Text encoding of the "lines" framer
+        self.decode_errors = "replace"  # What the decoder does with undecodable bytes
+        self.timestamp_mode = "clock"  # Line prefix (see timestamps.MODES)
+        self.highlight_colors = {"Red": "#ef4444", "Yellow": "#eab308", "Green": "#22c55e", "Blue": "#3b82f6"}
+        self.telemetry = TelemetryStore(stats=self.stats) if TelemetryStore else None  # Numeric channels for the Plot tab
+        self.flush_stats = {"frames": 0, "chunks": 0, "lines": 0, "since": time.monotonic()}
+        self.language = "en"  # Default language is English
+        self.translations = {
+            "en": {
+                "title": "ESP32 Serial Monitor",
+                "port_label": "Select Port:",
+                "baud_label": "Baud Rate:",
+                "connect": "Connect",
+                "disconnect": "Disconnect",
+                "clear_output": "Clear Output",
+                "save_output": "Save Output",
+                "auto_scroll": "Auto Scroll: On",
+                "status_ready": "Ready",
+                "status_connected": "Serial connection active.",
+                "status_disconnected": "Serial connection disconnected.",
+                "status_error": "Connection error.",
+                "output_saved": "Output saved to 'serial_output.txt'.",
+                "output_save_error": "Error saving output.",
+                "exit": "Exit",
+                "connection_status_waiting": "Connection Status: Waiting",
+                "connection_status_connected": "Connection Status: Connected",
+                "connection_status_disconnected": "Connection Status: Disconnected",
+                "connection_status_error": "Connection Status: Error",
+                "tooltip_port": "Select the port to connect.",
+                "tooltip_baud": "Select the baud rate for the connection.",
+                "tooltip_connect": "Connect to the selected port and baud rate.",
+                "tooltip_disconnect": "Disconnect the current connection.",
+                "tooltip_clear": "Clear the output area.",
+                "tooltip_save": "Save the output to a file.",
+                "tooltip_auto_scroll": "Toggle auto-scroll on/off.",
+                "auto_reconnect_on": "Auto Reconnect: On",
+                "auto_reconnect_off": "Auto Reconnect: Off",
+                "tooltip_auto_reconnect": "Reopen ports that drop out (board reset, re-plug), retrying with increasing delays.",
+                "port_added": "Port added: {port} ({description})",
+                "port_removed": "Port removed: {port}",
+                "reconnecting": "Lost {port}, reconnecting...",
+                "reconnected": "Reconnected to {port} after {gap:.0f} ms ({attempts} attempts)",
+                "reconnect_cancelled": "Stopped reconnecting to {port}.",
+                "send_label": "Send:",
+                "send": "Send",
+                "tooltip_send": "Queue the line for the selected port (or the first connected one).",
+                "expect_label": "Expect:",
+                "tooltip_expect": "Optional regex for the response; the round-trip time is measured and added to the Stats tab.",
+                "line_ending_label": "Line Ending:",
+                "run_macro": "Run Macro",
+                "stop_macro": "Stop Macro",
+                "tooltip_macro": "Run a script of send / expect / sleep / timeout steps.",
+                "macro_dialog": "Open Macro",
+                "send_not_connected": "Connect a port before sending.",
+                "tx_error": "Error writing to {port}: {error}",
+                "byte_delay_label": "TX Byte Delay (ms):",
+                "tooltip_byte_delay": "Pause after every transmitted byte, for targets that drop characters.",
+                "line_delay_label": "TX Line Delay (ms):",
+                "tooltip_line_delay": "Pause after every transmitted line.",
+                "tooltip_exit": "Close the application.",
+                "refresh_label": "UI Refresh (Hz):",
+                "tooltip_refresh": "How often received data is drawn to the output.",
+                "scrollback_label": "Scrollback Lines:",
+                "tooltip_scrollback": "Maximum number of lines kept in the output.",
+                "capture_group": "Capture",
+                "start_capture": "Start Capture",
+                "stop_capture": "Stop Capture",
+                "tooltip_capture": "Stream every received byte to rotating files on disk.",
+                "capture_rotate_size": "Rotate at (MB):",
+                "capture_rotate_time": "Rotate every (min):",
+                "capture_compression": "Compression:",
+                "capture_started": "Capturing to '{directory}'.",
+                "capture_stopped": "Capture stopped ({size} bytes written).",
+                "framing_label": "Framing:",
+                "encoding_label": "Encoding:",
+                "tooltip_encoding": "Character encoding of received text. Characters split across reads are decoded correctly.",
+                "decode_errors_label": "Invalid Bytes:",
+                "tooltip_decode_errors": "How bytes that are not valid in the encoding (boot ROM output, noise) are shown: as \ufffd, as \\xNN escapes, or not at all.",
+                "hex_clear": "Clear Hex",
+                "hex_source": "Showing: {port}",
+                "hex_no_source": "Connect a port to see its raw bytes.",
+                "timestamps_label": "Timestamps:",
+                "tooltip_timestamps": "Arrival time shown before each line: wall clock (s, ms or µs), delta from the previous line, or time since connect.",
+                "tooltip_framing": "How received bytes are split into lines or binary frames.",
+                "replay": "Replay Capture",
+                "start_bridge": "Start TCP Bridge",
+                "stop_bridge": "Stop TCP Bridge",
+                "tooltip_bridge": "Serve each port's stream on a local TCP port so other programs can read it (and write to the device).",
+                "bridge_group": "TCP Bridge",
+                "bridge_port": "First TCP port:",
+                "bridge_mode": "Stream:",
+                "bridge_buffer": "Client buffer (KB):",
+                "bridge_policy": "Slow clients:",
+                "bridge_writes": "Client writes:",
+                "bridge_started": "Serving {port} on {address} ({mode}).",
+                "bridge_stopped": "TCP bridge stopped.",
+                "bridge_error": "Could not serve {port}: {error}",
+                "tooltip_replay": "Play a recorded capture back through the monitor as if it were a port.",
+                "replay_speed_label": "Replay Speed:",
+                "tooltip_replay_speed": "1 = original timing, 10 = ten times faster, Max = as fast as possible.",
+                "replay_dialog": "Open Capture",
+                "plot_window": "Window (samples):",
+                "plot_clear": "Clear Plot",
+                "idf_columns": ["Time", "Port", "Tick (ms)", "Level", "Tag", "Message"],
+                "idf_levels": "Levels:",
+                "idf_other": "Other",
+                "tooltip_idf_levels": "Show records of the checked levels; Other is lines that are not ESP-IDF log lines.",
+                "idf_tags": "Tags:",
+                "tooltip_idf_tags": "Comma-separated tags to show, e.g. wifi, mqtt (empty shows all). Press Enter to apply.",
+                "idf_message": "Message:",
+                "tooltip_idf_message": "Regular expression searched in the message. Press Enter to apply.",
+                "idf_count": "{shown} of {total} records",
+                "idf_export": "Export CSV",
+                "idf_exported": "Log records saved to '{path}'.",
+                "idf_clear": "Clear Logs",
+                "elf_group": "Firmware ELF",
+                "elf_none": "No ELF loaded; panic backtraces are shown as raw addresses.",
+                "elf_load": "Load ELF...",
+                "tooltip_elf": "Symbolize Guru Meditation / Backtrace addresses with this firmware's functions and source lines.",
+                "elf_dialog": "Select Firmware ELF",
+                "elf_loading": "Indexing {name}...",
+                "elf_loaded": "Symbols: {summary} in {ms:.0f} ms",
+                "elf_error": "Cannot load {name}: {error}",
+                "archive_on": "Session Archive: On",
+                "archive_off": "Session Archive: Off",
+                "tooltip_archive": "Record every connection and its lines in {path}, searchable on the History tab.",
+                "archive_error": "Session archive unavailable: {error}",
+                "history_search": "Search:",
+                "tooltip_history_search": "Words that must all appear in a line; end a word with * to match a prefix. Press Enter to search every session.",
+                "history_refresh": "Refresh",
+                "history_columns": ["ID", "Port", "Baud", "Started", "Ended", "Lines", "Firmware"],
+                "history_hint": "Double-click a session to open it, or a search result to jump to it.",
+                "history_session": "Session #{id} on {port}: {lines} lines",
+                "history_results": "{count} newest lines matching '{query}' ({ms:.1f} ms)",
+                "history_empty": "No archive yet.",
+                "idf_parse_on": "ESP-IDF Log Parsing: On",
+                "idf_parse_off": "ESP-IDF Log Parsing: Off",
+                "tooltip_idf_parse": "Split received lines into level, tick, tag and message for the Logs tab. Turn off to save CPU at very high line rates.",
+                "plot_waiting": "Waiting for key=value or CSV data...",
+                "plot_unavailable": "Install numpy to enable plotting.",
+                "filter_include": "Include:",
+                "filter_exclude": "Exclude:",
+                "filter_apply": "Filter",
+                "tooltip_filter": "Show only lines matching Include and not matching Exclude (regular expressions).",
+                "filter_invalid": "Invalid regular expression: {error}",
+                "search_label": "Search:",
+                "search_previous": "Previous",
+                "search_next": "Next",
+                "search_matches": "{count} matches",
+                "search_none": "No more matches",
+                "highlight_label": "Highlight:",
+                "highlight_add": "Add",
+                "highlight_clear": "Clear Highlights",
+                "stats_export_json": "Export JSON",
+                "stats_export_csv": "Export CSV",
+                "stats_exported": "Statistics saved to '{path}'.",
+                "stats_export_error": "Error saving statistics",
+                "batch_stats": "Batching: {lines:.1f} lines / {chunks:.1f} chunks per frame, {dropped} dropped"
+            },
+            "jp": {
+                "title": "ESP32 シリアルモニター",
+                "port_label": "ポートを選択:",
+                "baud_label": "ボーレート:",
+                "connect": "接続",
+                "disconnect": "切断",
+                "clear_output": "出力をクリア",
+                "save_output": "出力を保存",
+                "auto_scroll": "自動スクロール: オン",
+                "status_ready": "準備完了",
+                "status_connected": "シリアル接続がアクティブです。",
+                "status_disconnected": "シリアル接続が切断されました。",
+                "status_error": "接続エラー。",
+                "output_saved": "出力が 'serial_output.txt' に保存されました。",
+                "output_save_error": "出力の保存中にエラーが発生しました。",
+                "exit": "終了",
+                "connection_status_waiting": "接続状況: 待機中",
+                "connection_status_connected": "接続状況: 接続済み",
+                "connection_status_disconnected": "接続状況: 切断済み",
+                "connection_status_error": "接続状況: エラー",
+                "tooltip_port": "接続するポートを選択してください。",
+                "tooltip_baud": "接続のボーレートを選択してください。",
+                "tooltip_connect": "選択したポートとボーレートに接続します。",
+                "tooltip_disconnect": "現在の接続を切断します。",
+                "tooltip_clear": "出力エリアをクリアします。",
+                "tooltip_save": "出力をファイルに保存します。",
+                "tooltip_auto_scroll": "自動スクロールのオン/オフを切り替えます。",
+                "auto_reconnect_on": "自動再接続: オン",
+                "auto_reconnect_off": "自動再接続: オフ",
+                "tooltip_auto_reconnect": "切断されたポート (ボードのリセット、抜き差し) を、間隔を広げながら再接続します。",
+                "port_added": "ポート追加: {port} ({description})",
+                "port_removed": "ポート削除: {port}",
+                "reconnecting": "{port} が切断されました。再接続中...",
+                "reconnected": "{port} に再接続しました ({gap:.0f} ms 後、{attempts} 回目)",
+                "reconnect_cancelled": "{port} への再接続を中止しました。",
+                "send_label": "送信:",
+                "send": "送信",
+                "tooltip_send": "選択したポート (または最初に接続したポート) に行を送信キューに追加します。",
+                "expect_label": "応答:",
+                "tooltip_expect": "応答の正規表現 (任意)。往復時間を計測して統計タブに追加します。",
+                "line_ending_label": "改行コード:",
+                "run_macro": "マクロ実行",
+                "stop_macro": "マクロ停止",
+                "tooltip_macro": "send / expect / sleep / timeout のステップからなるスクリプトを実行します。",
+                "macro_dialog": "マクロを開く",
+                "send_not_connected": "送信する前にポートに接続してください。",
+                "tx_error": "{port} への書き込みエラー: {error}",
+                "byte_delay_label": "送信バイト間隔 (ms):",
+                "tooltip_byte_delay": "文字を取りこぼすターゲットのため、送信バイトごとに待機します。",
+                "line_delay_label": "送信行間隔 (ms):",
+                "tooltip_line_delay": "送信行ごとに待機します。",
+                "tooltip_exit": "アプリケーションを閉じます。",
+                "refresh_label": "画面更新 (Hz):",
+                "tooltip_refresh": "受信データを出力に描画する頻度です。",
+                "scrollback_label": "スクロールバック行数:",
+                "tooltip_scrollback": "出力に保持する最大行数です。",
+                "capture_group": "キャプチャ",
+                "start_capture": "キャプチャ開始",
+                "stop_capture": "キャプチャ停止",
+                "tooltip_capture": "受信したすべてのバイトをローテーションするファイルに保存します。",
+                "capture_rotate_size": "ローテーションサイズ (MB):",
+                "capture_rotate_time": "ローテーション間隔 (分):",
+                "capture_compression": "圧縮:",
+                "capture_started": "'{directory}' にキャプチャ中。",
+                "capture_stopped": "キャプチャを停止しました ({size} バイト書き込み)。",
+                "framing_label": "フレーミング:",
+                "encoding_label": "文字コード:",
+                "tooltip_encoding": "受信テキストの文字コードです。読み取りをまたぐ文字も正しくデコードされます。",
+                "decode_errors_label": "無効なバイト:",
+                "tooltip_decode_errors": "文字コードとして無効なバイト (ブートROM出力、ノイズ) の表示方法: \ufffd、\\xNN エスケープ、または表示しない。",
+                "hex_clear": "16進表示をクリア",
+                "hex_source": "表示中: {port}",
+                "hex_no_source": "ポートに接続すると生データが表示されます。",
+                "timestamps_label": "タイムスタンプ:",
+                "tooltip_timestamps": "各行の前に表示する受信時刻: 時計 (秒、ミリ秒、マイクロ秒)、前の行からの差分、または接続からの経過時間。",
+                "tooltip_framing": "受信バイトを行またはバイナリフレームに分割する方法です。",
+                "replay": "キャプチャ再生",
+                "start_bridge": "TCPブリッジ開始",
+                "stop_bridge": "TCPブリッジ停止",
+                "tooltip_bridge": "各ポートのストリームをローカルTCPポートで配信し、他のプログラムから読み取り (およびデバイスへの書き込み) ができるようにします。",
+                "bridge_group": "TCPブリッジ",
+                "bridge_port": "最初のTCPポート:",
+                "bridge_mode": "ストリーム:",
+                "bridge_buffer": "クライアントバッファ (KB):",
+                "bridge_policy": "遅いクライアント:",
+                "bridge_writes": "クライアントの書き込み:",
+                "bridge_started": "{port} を {address} で配信中 ({mode})。",
+                "bridge_stopped": "TCPブリッジを停止しました。",
+                "bridge_error": "{port} を配信できません: {error}",
+                "tooltip_replay": "記録したキャプチャをポートと同じようにモニターで再生します。",
+                "replay_speed_label": "再生速度:",
+                "tooltip_replay_speed": "1 = 元のタイミング、10 = 10倍速、Max = 最大速度。",
+                "replay_dialog": "キャプチャを開く",
+                "plot_window": "表示範囲 (サンプル):",
+                "plot_clear": "プロットをクリア",
+                "idf_columns": ["時刻", "ポート", "ティック (ms)", "レベル", "タグ", "メッセージ"],
+                "idf_levels": "レベル:",
+                "idf_other": "その他",
+                "tooltip_idf_levels": "チェックしたレベルのレコードを表示します。「その他」は ESP-IDF ログ形式でない行です。",
+                "idf_tags": "タグ:",
+                "tooltip_idf_tags": "表示するタグをカンマ区切りで指定します (例: wifi, mqtt)。空欄ですべて表示。Enter で適用。",
+                "idf_message": "メッセージ:",
+                "tooltip_idf_message": "メッセージ内を検索する正規表現。Enter で適用。",
+                "idf_count": "{total} 件中 {shown} 件",
+                "idf_export": "CSV にエクスポート",
+                "idf_exported": "ログレコードを '{path}' に保存しました。",
+                "idf_clear": "ログをクリア",
+                "elf_group": "ファームウェア ELF",
+                "elf_none": "ELF が読み込まれていません。パニック時のバックトレースはアドレスのまま表示されます。",
+                "elf_load": "ELF を読み込む...",
+                "tooltip_elf": "Guru Meditation / Backtrace のアドレスを、このファームウェアの関数名とソース行に変換します。",
+                "elf_dialog": "ファームウェア ELF を選択",
+                "elf_loading": "{name} のインデックスを作成中...",
+                "elf_loaded": "シンボル: {summary} ({ms:.0f} ms)",
+                "elf_error": "{name} を読み込めません: {error}",
+                "archive_on": "セッションアーカイブ: オン",
+                "archive_off": "セッションアーカイブ: オフ",
+                "tooltip_archive": "すべての接続と受信行を {path} に記録し、履歴タブで検索できるようにします。",
+                "archive_error": "セッションアーカイブを使用できません: {error}",
+                "history_search": "検索:",
+                "tooltip_history_search": "行に含まれるべき単語 (すべて一致)。単語の末尾に * を付けると前方一致。Enter ですべてのセッションを検索。",
+                "history_refresh": "更新",
+                "history_columns": ["ID", "ポート", "ボーレート", "開始", "終了", "行数", "ファームウェア"],
+                "history_hint": "セッションをダブルクリックで表示、検索結果をダブルクリックでその位置へ移動します。",
+                "history_session": "セッション #{id} ({port}): {lines} 行",
+                "history_results": "'{query}' に一致する最新 {count} 行 ({ms:.1f} ms)",
+                "history_empty": "アーカイブはまだありません。",
+                "idf_parse_on": "ESP-IDF ログ解析: オン",
+                "idf_parse_off": "ESP-IDF ログ解析: オフ",
+                "tooltip_idf_parse": "受信行をレベル、ティック、タグ、メッセージに分割してログタブに表示します。非常に高い行レートでは CPU 節約のためオフにできます。",
+                "plot_waiting": "key=value または CSV データを待機中...",
+                "plot_unavailable": "プロットを有効にするには numpy をインストールしてください。",
+                "filter_include": "含む:",
+                "filter_exclude": "除外:",
+                "filter_apply": "フィルター",
+                "tooltip_filter": "「含む」に一致し「除外」に一致しない行のみを表示します (正規表現)。",
+                "filter_invalid": "無効な正規表現: {error}",
+                "search_label": "検索:",
+                "search_previous": "前へ",
+                "search_next": "次へ",
+                "search_matches": "{count} 件一致",
+                "search_none": "これ以上一致はありません",
+                "highlight_label": "ハイライト:",
+                "highlight_add": "追加",
+                "highlight_clear": "ハイライトをクリア",
+                "stats_export_json": "JSON にエクスポート",
+                "stats_export_csv": "CSV にエクスポート",
+                "stats_exported": "統計を '{path}' に保存しました。",
+                "stats_export_error": "統計の保存中にエラーが発生しました",
+                "batch_stats": "バッチ: 1フレームあたり {lines:.1f} 行 / {chunks:.1f} チャンク, 破棄 {dropped}"
+            }
+        }
+        self.current_theme = "dark"  # Default theme
+        self.themes = {
+            "dark": """
+                QWidget {
+                    background-color: #0a0a0a;
+                    color: #e0e0e0;
+                    font-family: 'Segoe UI', Arial, sans-serif;
+                }
+                QLabel {
+                    font-size: 14px;
+                    padding: 5px;
+                    color: #4d9ef9;
+                    font-weight: 500;
+                }
+                QComboBox, QLineEdit {
+                    background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
+                        stop:0 #1a1a1a, stop:1 #252525);
+                    border: 1px solid #2c4766;
+                    border-radius: 6px;
+                    padding: 8px;
+                    min-width: 180px;
+                    font-size: 13px;
+                    selection-background-color: #1d4ed8;
+                }
+                QTextEdit, QTableView {
+                    background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
+                        stop:0 #0f0f0f, stop:1 #1a1a1a);
+                    border: 2px solid #1e3a5f;
+                    border-radius: 8px;
+                    padding: 15px;
+                    font-family: 'JetBrains Mono', 'Consolas', monospace;
+                    font-size: 14px;
+                    line-height: 1.5;
+                    selection-background-color: #1d4ed8;
+                }
+                QPushButton {
+                    padding: 12px 25px;
+                    border-radius: 8px;
+                    font-size: 14px;
+                    font-weight: bold;
+                    border: none;
+                    background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
+                        stop:0 #1e40af, stop:1 #3b82f6);
+                    color: white;
+                }
+            """,
+            "light": """
+                QWidget {
+                    background-color: #ffffff;
+                    color: #000000;
+                    font-family: 'Segoe UI', Arial, sans-serif;
+                }
+                QLabel {
+                    font-size: 14px;
+                    padding: 5px;
+                    color: #333333;
+                    font-weight: 500;
+                }
+                QComboBox, QLineEdit {
+                    background-color: #f0f0f0;
+                    border: 1px solid #cccccc;
+                    border-radius: 6px;
+                    padding: 8px;
+                    min-width: 180px;
+                    font-size: 13px;
+                    selection-background-color: #0078d7;
+                }
+                QTextEdit, QTableView {
+                    background-color: #f9f9f9;
+                    border: 1px solid #cccccc;
+                    border-radius: 8px;
+                    padding: 15px;
+                    font-family: 'JetBrains Mono', 'Consolas', monospace;
+                    font-size: 14px;
+                    line-height: 1.5;
+                    selection-background-color: #0078d7;
+                }
+                QPushButton {
+                    padding: 12px 25px;
+                    border-radius: 8px;
+                    font-size: 14px;
+                    font-weight: bold;
+                    border: none;
+                    background-color: #0078d7;
+                    color: white;
+                }
+                QPushButton:hover {
+                    background-color: #005a9e;
+                }
+            """,
+            "blue": """
+                QWidget {
+                    background-color: #001f3f;
+                    color: #ffffff;
+                    font-family: 'Segoe UI', Arial, sans-serif;
+                }
+                QLabel {
+                    font-size: 14px;
+                    padding: 5px;
+                    color: #7fdbff;
+                    font-weight: 500;
+                }
+                QComboBox, QLineEdit {
+                    background-color: #003366;
+                    border: 1px solid #00509e;
+                    border-radius: 6px;
+                    padding: 8px;
+                    min-width: 180px;
+                    font-size: 13px;
+                    selection-background-color: #0078d7;
+                }
+                QTextEdit, QTableView {
+                    background-color: #00264d;
+                    border: 1px solid #00509e;
+                    border-radius: 8px;
+                    padding: 15px;
+                    font-family: 'JetBrains Mono', 'Consolas', monospace;
+                    font-size: 14px;
+                    line-height: 1.5;
+                    selection-background-color: #0078d7;
+                }
+                QPushButton {
+                    padding: 12px 25px;
+                    border-radius: 8px;
+                    font-size: 14px;
+                    font-weight: bold;
+                    border: none;
+                    background-color: #0078d7;
+                    color: white;
+                }
+                QPushButton:hover {
+                    background-color: #005a9e;
+                }
+            """
+        }
+        self.initUI()
+        self.port_watcher.start()
+
+    def refresh_ports(self):
+        """Fill the port selector from the watcher's cached scan, keeping the selection."""
+        current = self.port_selector.currentText()
+        items = self.port_watcher.devices()
+        items += [self.port_selector.itemText(i) for i in range(self.port_selector.count())
+                  if is_replay(self.port_selector.itemText(i))]
+        self.port_selector.blockSignals(True)
+        self.port_selector.clear()
+        self.port_selector.addItems(items)
+        if current in items:
+            self.port_selector.setCurrentText(current)
+        self.port_selector.blockSignals(False)
+
+    def check_ports(self):
+        """Apply port list changes and retry lost ports (called by the flush timer)."""
+        t = self.translations[self.language]
+        watcher = self.port_watcher
+        if watcher.version != self._ports_version:
+            self._ports_version = watcher.version
+            self.refresh_ports()
+            while watcher.events:
+                event, info = watcher.events.popleft()
+                if event == "added":
+                    self.append_output(t["port_added"].format(port=info.device, description=info.description))
+                else:
+                    self.append_output(t["port_removed"].format(port=info.device))
+        if not self.reconnector.pending:
+            return
+        present = set(watcher.ports)
+        for port_name, identity, options in self.reconnector.due(present):
+            device = watcher.device_for(identity)
+            engine = None
+            if device and device not in self.session:
+                engine = self.connect_port(device, options["baud_rate"], quiet=True, origin=port_name)
+            if engine is None:
+                self.reconnector.failed(port_name)
+                continue
+            gap, attempts = self.reconnector.succeeded(port_name)
+            self.append_output(t["reconnected"].format(port=device, gap=gap * 1000, attempts=attempts))
+
+    def initUI(self):
+        self.setWindowTitle(self.translations[self.language]["title"])
+        self.setGeometry(100, 100, 900, 700)
+
+        layout = QVBoxLayout()
+        layout.setSpacing(15)
+        layout.setContentsMargins(20, 20, 20, 20)
+
+        # Header
+        header = QLabel(self.translations[self.language]["title"])
+        header.setStyleSheet("""
+            QLabel {
+                font-size: 24px;
+                font-weight: bold;
+                color: #4d9ef9;
+                padding: 10px;
+                text-align: center;
+            }
+        """)
+        header.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(header)
+
+        # Tabs for Settings and Monitor
+        tabs = QTabWidget()
+        tabs.setStyleSheet("QTabWidget::pane { border: 1px solid #444; }")
+        layout.addWidget(tabs)
+
+        # Settings Tab
+        settings_tab = QWidget()
+        settings_layout = QVBoxLayout()
+        settings_tab.setLayout(settings_layout)
+
+        # Port and Baud Rate Group
+        port_baud_group = QGroupBox(self.translations[self.language]["title"])
+        port_baud_layout = QFormLayout()
+        self.port_label = QLabel(self.translations[self.language]["port_label"])
+        self.port_selector = QComboBox()
+        self.port_selector.setToolTip(self.translations[self.language]["tooltip_port"])
+        self.refresh_ports()
+        port_baud_layout.addRow(self.port_label, self.port_selector)
+
+        self.baud_label = QLabel(self.translations[self.language]["baud_label"])
+        self.baud_selector = QComboBox()
+        self.baud_selector.setToolTip(self.translations[self.language]["tooltip_baud"])
+        self.baud_selector.addItems(["115200", "9600", "19200", "38400", "57600", "115200"])
+        port_baud_layout.addRow(self.baud_label, self.baud_selector)
+
+        self.refresh_label = QLabel(self.translations[self.language]["refresh_label"])
+        self.refresh_selector = QComboBox()
+        self.refresh_selector.setToolTip(self.translations[self.language]["tooltip_refresh"])
+        self.refresh_selector.addItems(["10", "20", "30", "60"])
+        self.refresh_selector.setCurrentText(str(self.refresh_rate))
+        self.refresh_selector.currentTextChanged.connect(self.change_refresh_rate)
+        port_baud_layout.addRow(self.refresh_label, self.refresh_selector)
+
+        self.scrollback_label = QLabel(self.translations[self.language]["scrollback_label"])
+        self.scrollback_selector = QComboBox()
+        self.scrollback_selector.setToolTip(self.translations[self.language]["tooltip_scrollback"])
+        self.scrollback_selector.addItems(["10000", "100000", "1000000"])
+        self.scrollback_selector.setCurrentText(str(self.scrollback_lines))
+        self.scrollback_selector.currentTextChanged.connect(self.change_scrollback)
+        port_baud_layout.addRow(self.scrollback_label, self.scrollback_selector)
+
+        self.framing_label = QLabel(self.translations[self.language]["framing_label"])
+        self.framing_selector = QComboBox()
+        self.framing_selector.setToolTip(self.translations[self.language]["tooltip_framing"])
+        self.framing_selector.addItems(list(FRAMERS))
+        self.framing_selector.currentTextChanged.connect(self.change_framing)
+        port_baud_layout.addRow(self.framing_label, self.framing_selector)
+
+        self.encoding_label = QLabel(self.translations[self.language]["encoding_label"])
+        self.encoding_selector = QComboBox()
+        self.encoding_selector.setToolTip(self.translations[self.language]["tooltip_encoding"])
+        self.encoding_selector.addItems(ENCODINGS)
+        self.encoding_selector.setCurrentText(self.encoding)
+        self.encoding_selector.currentTextChanged.connect(self.change_encoding)
+        port_baud_layout.addRow(self.encoding_label, self.encoding_selector)
+
+        self.decode_errors_label = QLabel(self.translations[self.language]["decode_errors_label"])
+        self.decode_errors_selector = QComboBox()
+        self.decode_errors_selector.setToolTip(self.translations[self.language]["tooltip_decode_errors"])
+        self.decode_errors_selector.addItems(DECODE_ERRORS)
+        self.decode_errors_selector.setCurrentText(self.decode_errors)
+        self.decode_errors_selector.currentTextChanged.connect(self.change_decode_errors)
+        port_baud_layout.addRow(self.decode_errors_label, self.decode_errors_selector)
+
+        self.timestamps_label = QLabel(self.translations[self.language]["timestamps_label"])
+        self.timestamps_selector = QComboBox()
+        self.timestamps_selector.setToolTip(self.translations[self.language]["tooltip_timestamps"])
+        self.timestamps_selector.addItems(TIMESTAMP_MODES)
+        self.timestamps_selector.setCurrentText(self.timestamp_mode)
+        self.timestamps_selector.currentTextChanged.connect(self.change_timestamp_mode)
+        port_baud_layout.addRow(self.timestamps_label, self.timestamps_selector)
+
+        self.byte_delay_label = QLabel(self.translations[self.language]["byte_delay_label"])
+        self.byte_delay_selector = QComboBox()
+        self.byte_delay_selector.setToolTip(self.translations[self.language]["tooltip_byte_delay"])
+        self.byte_delay_selector.addItems(["0", "1", "2", "5", "10"])
+        self.byte_delay_selector.currentTextChanged.connect(self.change_tx_pacing)
+        port_baud_layout.addRow(self.byte_delay_label, self.byte_delay_selector)
+
+        self.line_delay_label = QLabel(self.translations[self.language]["line_delay_label"])
+        self.line_delay_selector = QComboBox()
+        self.line_delay_selector.setToolTip(self.translations[self.language]["tooltip_line_delay"])
+        self.line_delay_selector.addItems(["0", "10", "50", "100", "500"])
+        self.line_delay_selector.currentTextChanged.connect(self.change_tx_pacing)
+        port_baud_layout.addRow(self.line_delay_label, self.line_delay_selector)
+
+        self.replay_speed_label = QLabel(self.translations[self.language]["replay_speed_label"])
+        self.replay_speed_selector = QComboBox()
+        self.replay_speed_selector.setToolTip(self.translations[self.language]["tooltip_replay_speed"])
+        self.replay_speed_selector.addItems(["1", "2", "10", "100", "Max"])
+        port_baud_layout.addRow(self.replay_speed_label, self.replay_speed_selector)
+
+        port_baud_group.setLayout(port_baud_layout)
+        settings_layout.addWidget(port_baud_group)
+
+        # Buttons Group
+        buttons_group = QGroupBox("Actions")
+        buttons_layout = QHBoxLayout()
+        self.connect_button = QPushButton(self.translations[self.language]["connect"])
+        self.connect_button.setToolTip(self.translations[self.language]["tooltip_connect"])
+        self.connect_button.clicked.connect(self.connect_serial)
+        buttons_layout.addWidget(self.connect_button)
+
+        self.disconnect_button = QPushButton(self.translations[self.language]["disconnect"])
+        self.disconnect_button.setToolTip(self.translations[self.language]["tooltip_disconnect"])
+        self.disconnect_button.clicked.connect(self.disconnect_serial)
+        buttons_layout.addWidget(self.disconnect_button)
+
+        self.clear_button = QPushButton(self.translations[self.language]["clear_output"])
+        self.clear_button.setToolTip(self.translations[self.language]["tooltip_clear"])
+        self.clear_button.clicked.connect(self.clear_output)
+        buttons_layout.addWidget(self.clear_button)
+
+        self.save_button = QPushButton(self.translations[self.language]["save_output"])
+        self.save_button.setToolTip(self.translations[self.language]["tooltip_save"])
+        self.save_button.clicked.connect(self.save_output)
+        buttons_layout.addWidget(self.save_button)
+
+        self.capture_button = QPushButton(self.translations[self.language]["start_capture"])
+        self.capture_button.setToolTip(self.translations[self.language]["tooltip_capture"])
+        self.capture_button.clicked.connect(self.toggle_capture)
+        buttons_layout.addWidget(self.capture_button)
+
+        self.replay_button = QPushButton(self.translations[self.language]["replay"])
+        self.replay_button.setToolTip(self.translations[self.language]["tooltip_replay"])
+        self.replay_button.clicked.connect(self.open_replay)
+        buttons_layout.addWidget(self.replay_button)
+
+        self.bridge_button = QPushButton(self.translations[self.language]["start_bridge"])
+        self.bridge_button.setToolTip(self.translations[self.language]["tooltip_bridge"])
+        self.bridge_button.clicked.connect(self.toggle_bridge)
+        buttons_layout.addWidget(self.bridge_button)
+
+        buttons_group.setLayout(buttons_layout)
+        settings_layout.addWidget(buttons_group)
+
+        # Capture Group
+        self.capture_group = QGroupBox(self.translations[self.language]["capture_group"])
+        capture_layout = QFormLayout()
+        self.capture_size_label = QLabel(self.translations[self.language]["capture_rotate_size"])
+        self.capture_size_selector = QComboBox()
+        self.capture_size_selector.addItems(["16", "64", "256", "1024"])
+        self.capture_size_selector.setCurrentText("64")
+        capture_layout.addRow(self.capture_size_label, self.capture_size_selector)
+
+        self.capture_time_label = QLabel(self.translations[self.language]["capture_rotate_time"])
+        self.capture_time_selector = QComboBox()
+        self.capture_time_selector.addItems(["Off", "15", "60", "240"])
+        capture_layout.addRow(self.capture_time_label, self.capture_time_selector)
+
+        self.capture_compression_label = QLabel(self.translations[self.language]["capture_compression"])
+        self.capture_compression_selector = QComboBox()
+        self.capture_compression_selector.addItems(CaptureWriter.COMPRESSIONS)
+        capture_layout.addRow(self.capture_compression_label, self.capture_compression_selector)
+
+        self.capture_group.setLayout(capture_layout)
+        settings_layout.addWidget(self.capture_group)
+
+        # Firmware ELF for decoding panic backtraces
+        self.elf_group = QGroupBox(self.translations[self.language]["elf_group"])
+        elf_layout = QHBoxLayout()
+        self.elf_label = QLabel(self.translations[self.language]["elf_none"])
+        elf_layout.addWidget(self.elf_label, 1)
+        self.elf_button = QPushButton(self.translations[self.language]["elf_load"])
+        self.elf_button.setToolTip(self.translations[self.language]["tooltip_elf"])
+        self.elf_button.clicked.connect(self.load_elf)
+        elf_layout.addWidget(self.elf_button)
+        self.elf_group.setLayout(elf_layout)
+        settings_layout.addWidget(self.elf_group)
+
+        # TCP Bridge Group
+        self.bridge_group = QGroupBox(self.translations[self.language]["bridge_group"])
+        bridge_layout = QFormLayout()
+        self.bridge_port_label = QLabel(self.translations[self.language]["bridge_port"])
+        self.bridge_port_selector = QComboBox()
+        self.bridge_port_selector.addItems(["5555", "6000", "7000", "8000"])
+        bridge_layout.addRow(self.bridge_port_label, self.bridge_port_selector)
+
+        self.bridge_mode_label = QLabel(self.translations[self.language]["bridge_mode"])
+        self.bridge_mode_selector = QComboBox()
+        self.bridge_mode_selector.addItems(BRIDGE_MODES)
+        bridge_layout.addRow(self.bridge_mode_label, self.bridge_mode_selector)
+
+        self.bridge_buffer_label = QLabel(self.translations[self.language]["bridge_buffer"])
+        self.bridge_buffer_selector = QComboBox()
+        self.bridge_buffer_selector.addItems(["64", "256", "1024", "4096"])
+        self.bridge_buffer_selector.setCurrentText("256")
+        bridge_layout.addRow(self.bridge_buffer_label, self.bridge_buffer_selector)
+
+        self.bridge_policy_label = QLabel(self.translations[self.language]["bridge_policy"])
+        self.bridge_policy_selector = QComboBox()
+        self.bridge_policy_selector.addItems(BRIDGE_POLICIES)
+        bridge_layout.addRow(self.bridge_policy_label, self.bridge_policy_selector)
+
+        self.bridge_writes_label = QLabel(self.translations[self.language]["bridge_writes"])
+        self.bridge_writes_selector = QComboBox()
+        self.bridge_writes_selector.addItems(["allow", "ignore"])
+        bridge_layout.addRow(self.bridge_writes_label, self.bridge_writes_selector)
+
+        self.bridge_group.setLayout(bridge_layout)
+        settings_layout.addWidget(self.bridge_group)
+
+        # Auto Scroll Checkbox
+        self.auto_scroll_checkbox = QPushButton(self.translations[self.language]["auto_scroll"])
+        self.auto_scroll_checkbox.setCheckable(True)
+        self.auto_scroll_checkbox.setChecked(self.auto_scroll)
+        self.auto_scroll_checkbox.setToolTip(self.translations[self.language]["tooltip_auto_scroll"])
+        self.auto_scroll_checkbox.clicked.connect(self.toggle_auto_scroll)
+        settings_layout.addWidget(self.auto_scroll_checkbox)
+
+        self.auto_reconnect_button = QPushButton(self.translations[self.language]["auto_reconnect_on"])
+        self.auto_reconnect_button.setCheckable(True)
+        self.auto_reconnect_button.setChecked(self.auto_reconnect)
+        self.auto_reconnect_button.setToolTip(self.translations[self.language]["tooltip_auto_reconnect"])
+        self.auto_reconnect_button.clicked.connect(self.toggle_auto_reconnect)
+        settings_layout.addWidget(self.auto_reconnect_button)
+
+        self.archive_button = QPushButton(self.translations[self.language]["archive_on" if self.archiving else "archive_off"])
+        self.archive_button.setCheckable(True)
+        self.archive_button.setChecked(self.archiving)
+        self.archive_button.setToolTip(self.translations[self.language]["tooltip_archive"].format(path=ARCHIVE_PATH))
+        self.archive_button.clicked.connect(self.toggle_archive)
+        settings_layout.addWidget(self.archive_button)
+
+        self.idf_parse_button = QPushButton(self.translations[self.language]["idf_parse_on"])
+        self.idf_parse_button.setCheckable(True)
+        self.idf_parse_button.setChecked(self.parse_idf)
+        self.idf_parse_button.setToolTip(self.translations[self.language]["tooltip_idf_parse"])
+        self.idf_parse_button.clicked.connect(self.toggle_idf_parsing)
+        settings_layout.addWidget(self.idf_parse_button)
+
+        # Theme and Language Group
+        theme_language_group = QGroupBox("Preferences")
+        theme_language_layout = QFormLayout()
+        theme_selector = QComboBox()
+        theme_selector.addItems(["Dark", "Light", "Blue"])
+        theme_selector.setToolTip("Select the application theme.")
+        theme_selector.currentIndexChanged.connect(self.change_theme)
+        theme_language_layout.addRow("Theme:", theme_selector)
+
+        language_selector = QComboBox()
+        language_selector.addItems(["English", "日本語"])
+        language_selector.setToolTip("Select the application language.")
+        language_selector.currentIndexChanged.connect(self.change_language)
+        theme_language_layout.addRow("Language:", language_selector)
+
+        theme_language_group.setLayout(theme_language_layout)
+        settings_layout.addWidget(theme_language_group)
+
+        tabs.addTab(settings_tab, "Settings")
+
+        # Monitor Tab
+        monitor_tab = QWidget()
+        monitor_layout = QVBoxLayout()
+        monitor_tab.setLayout(monitor_layout)
+
+        self.log_model = LogModel(self.scrollback_lines, self)
+        self.log_model.set_timestamp_mode(self.timestamp_mode)
+
+        # Filter, search and highlight bar
+        t = self.translations[self.language]
+        filter_layout = QHBoxLayout()
+        self.include_label = QLabel(t["filter_include"])
+        filter_layout.addWidget(self.include_label)
+        self.include_input = QLineEdit()
+        self.include_input.returnPressed.connect(self.apply_filter)
+        filter_layout.addWidget(self.include_input)
+        self.exclude_label = QLabel(t["filter_exclude"])
+        filter_layout.addWidget(self.exclude_label)
+        self.exclude_input = QLineEdit()
+        self.exclude_input.returnPressed.connect(self.apply_filter)
+        filter_layout.addWidget(self.exclude_input)
+        self.filter_button = QPushButton(t["filter_apply"])
+        self.filter_button.setToolTip(t["tooltip_filter"])
+        self.filter_button.clicked.connect(self.apply_filter)
+        filter_layout.addWidget(self.filter_button)
+        monitor_layout.addLayout(filter_layout)
+
+        search_layout = QHBoxLayout()
+        self.search_label = QLabel(t["search_label"])
+        search_layout.addWidget(self.search_label)
+        self.search_input = QLineEdit()
+        self.search_input.returnPressed.connect(self.find_next)
+        search_layout.addWidget(self.search_input)
+        self.search_previous_button = QPushButton(t["search_previous"])
+        self.search_previous_button.clicked.connect(self.find_previous)
+        search_layout.addWidget(self.search_previous_button)
+        self.search_next_button = QPushButton(t["search_next"])
+        self.search_next_button.clicked.connect(self.find_next)
+        search_layout.addWidget(self.search_next_button)
+        self.search_status_label = QLabel("")
+        search_layout.addWidget(self.search_status_label)
+
+        self.highlight_label = QLabel(t["highlight_label"])
+        search_layout.addWidget(self.highlight_label)
+        self.highlight_input = QLineEdit()
+        self.highlight_input.returnPressed.connect(self.add_highlight)
+        search_layout.addWidget(self.highlight_input)
+        self.highlight_color_selector = QComboBox()
+        self.highlight_color_selector.addItems(list(self.highlight_colors))
+        search_layout.addWidget(self.highlight_color_selector)
+        self.highlight_add_button = QPushButton(t["highlight_add"])
+        self.highlight_add_button.clicked.connect(self.add_highlight)
+        search_layout.addWidget(self.highlight_add_button)
+        self.highlight_clear_button = QPushButton(t["highlight_clear"])
+        self.highlight_clear_button.clicked.connect(self.clear_highlights)
+        search_layout.addWidget(self.highlight_clear_button)
+        monitor_layout.addLayout(search_layout)
+
+        # A single-column table with fixed row heights: unlike QListView, it never walks
+        # every row on insert, so appending and scrolling to the bottom stay constant-time
+        self.output = QTableView()
+        self.output.setModel(self.log_model)
+        self.output.setShowGrid(False)
+        self.output.setWordWrap(False)
+        self.output.horizontalHeader().hide()
+        self.output.horizontalHeader().setStretchLastSection(True)
+        self.output.verticalHeader().hide()
+        self.output.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.output.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.output.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.output.setToolTip("Serial data will appear here.")
+        monitor_layout.addWidget(self.output)
+
+        # Send bar: lines are queued for the transmitter thread, never written from here
+        send_layout = QHBoxLayout()
+        self.send_label = QLabel(t["send_label"])
+        send_layout.addWidget(self.send_label)
+        self.send_input = QLineEdit()
+        self.send_input.setToolTip(t["tooltip_send"])
+        self.send_input.returnPressed.connect(self.send_command)
+        send_layout.addWidget(self.send_input, 3)
+        self.expect_label = QLabel(t["expect_label"])
+        send_layout.addWidget(self.expect_label)
+        self.expect_input = QLineEdit()
+        self.expect_input.setToolTip(t["tooltip_expect"])
+        self.expect_input.returnPressed.connect(self.send_command)
+        send_layout.addWidget(self.expect_input, 1)
+        self.line_ending_label = QLabel(t["line_ending_label"])
+        send_layout.addWidget(self.line_ending_label)
+        self.line_ending_selector = QComboBox()
+        self.line_ending_selector.addItems(list(LINE_ENDINGS))
+        self.line_ending_selector.setCurrentText(self.transmitter.line_ending)
+        self.line_ending_selector.currentTextChanged.connect(self.change_line_ending)
+        send_layout.addWidget(self.line_ending_selector)
+        self.send_button = QPushButton(t["send"])
+        self.send_button.setToolTip(t["tooltip_send"])
+        self.send_button.clicked.connect(self.send_command)
+        send_layout.addWidget(self.send_button)
+        self.macro_button = QPushButton(t["run_macro"])
+        self.macro_button.setToolTip(t["tooltip_macro"])
+        self.macro_button.clicked.connect(self.toggle_macro)
+        send_layout.addWidget(self.macro_button)
+        monitor_layout.addLayout(send_layout)
+
+        self.status_bar = QLabel(self.translations[self.language]["status_ready"])
+        self.status_bar.setStyleSheet("color: #9da5b4; font-size: 14px; padding: 5px;")
+        monitor_layout.addWidget(self.status_bar)
+
+        self.batch_stats_label = QLabel("")
+        self.batch_stats_label.setStyleSheet("color: #9da5b4; font-size: 12px; padding: 5px;")
+        monitor_layout.addWidget(self.batch_stats_label)
+
+        tabs.addTab(monitor_tab, "Monitor")
+
+        # Plot Tab
+        plot_tab = QWidget()
+        plot_layout = QVBoxLayout()
+        plot_tab.setLayout(plot_layout)
+        if self.telemetry:
+            plot_controls = QHBoxLayout()
+            self.plot_window_label = QLabel(self.translations[self.language]["plot_window"])
+            plot_controls.addWidget(self.plot_window_label)
+            self.plot_window_selector = QComboBox()
+            self.plot_window_selector.addItems(["1000", "10000", "100000", "1000000"])
+            self.plot_window_selector.setCurrentText("100000")
+            self.plot_window_selector.currentTextChanged.connect(self.change_plot_window)
+            plot_controls.addWidget(self.plot_window_selector)
+            plot_controls.addStretch()
+            self.plot_clear_button = QPushButton(self.translations[self.language]["plot_clear"])
+            self.plot_clear_button.clicked.connect(self.telemetry.clear)
+            plot_controls.addWidget(self.plot_clear_button)
+            plot_layout.addLayout(plot_controls)
+
+            self.plot = PlotWidget(self.telemetry, self.translations[self.language]["plot_waiting"])
+            plot_layout.addWidget(self.plot)
+        else:
+            self.plot = None
+            plot_layout.addWidget(QLabel(self.translations[self.language]["plot_unavailable"]))
+        tabs.addTab(plot_tab, "Plot")
+
+        # Stats Tab
+        stats_tab = QWidget()
+        stats_layout = QVBoxLayout()
+        stats_tab.setLayout(stats_layout)
+        self.stats_table = QTableWidget(0, len(self.stats.FIELDS) - 1)
+        self.stats_table.setHorizontalHeaderLabels([field for field in self.stats.FIELDS if field != "kind"])
+        self.stats_table.verticalHeader().setVisible(False)
+        stats_layout.addWidget(self.stats_table)
+        stats_buttons = QHBoxLayout()
+        stats_buttons.addStretch()
+        self.stats_json_button = QPushButton(self.translations[self.language]["stats_export_json"])
+        self.stats_json_button.clicked.connect(lambda: self.export_stats("pipeline_stats.json"))
+        stats_buttons.addWidget(self.stats_json_button)
+        self.stats_csv_button = QPushButton(self.translations[self.language]["stats_export_csv"])
+        self.stats_csv_button.clicked.connect(lambda: self.export_stats("pipeline_stats.csv"))
+        stats_buttons.addWidget(self.stats_csv_button)
+        stats_layout.addLayout(stats_buttons)
+        tabs.addTab(stats_tab, "Stats")
+
+        # Logs Tab: parsed ESP-IDF records filtered by level, tag and message
+        logs_tab = QWidget()
+        logs_layout = QVBoxLayout()
+        logs_tab.setLayout(logs_layout)
+        logs_controls = QHBoxLayout()
+        self.idf_levels_label = QLabel(t["idf_levels"])
+        logs_controls.addWidget(self.idf_levels_label)
+        self.idf_level_buttons = {}
+        for level in "EWIDV-":
+            button = QPushButton(t["idf_other"] if level == "-" else level)
+            button.setCheckable(True)
+            button.setChecked(True)
+            button.setToolTip(t["tooltip_idf_levels"])
+            button.clicked.connect(self.apply_idf_filter)
+            logs_controls.addWidget(button)
+            self.idf_level_buttons[level] = button
+        self.idf_tags_label = QLabel(t["idf_tags"])
+        logs_controls.addWidget(self.idf_tags_label)
+        self.idf_tags_input = QLineEdit()
+        self.idf_tags_input.setPlaceholderText("wifi, mqtt")
+        self.idf_tags_input.setToolTip(t["tooltip_idf_tags"])
+        self.idf_tags_input.returnPressed.connect(self.apply_idf_filter)
+        logs_controls.addWidget(self.idf_tags_input, 1)
+        self.idf_message_label = QLabel(t["idf_message"])
+        logs_controls.addWidget(self.idf_message_label)
+        self.idf_message_input = QLineEdit()
+        self.idf_message_input.setToolTip(t["tooltip_idf_message"])
+        self.idf_message_input.returnPressed.connect(self.apply_idf_filter)
+        logs_controls.addWidget(self.idf_message_input, 1)
+        logs_layout.addLayout(logs_controls)
+
+        self.idf_model = IdfLogModel(self.log_model.formatter, t["idf_columns"], self)
+        self.idf_view = QTableView()
+        self.idf_view.setModel(self.idf_model)
+        self.idf_view.setShowGrid(False)
+        self.idf_view.setWordWrap(False)
+        self.idf_view.horizontalHeader().setStretchLastSection(True)
+        self.idf_view.verticalHeader().hide()
+        self.idf_view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.idf_view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.idf_view.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        logs_layout.addWidget(self.idf_view)
+
+        logs_buttons = QHBoxLayout()
+        self.idf_count_label = QLabel("")
+        logs_buttons.addWidget(self.idf_count_label)
+        logs_buttons.addStretch()
+        self.idf_clear_button = QPushButton(t["idf_clear"])
+        self.idf_clear_button.clicked.connect(self.clear_idf_logs)
+        logs_buttons.addWidget(self.idf_clear_button)
+        self.idf_export_button = QPushButton(t["idf_export"])
+        self.idf_export_button.clicked.connect(self.export_idf_csv)
+        logs_buttons.addWidget(self.idf_export_button)
+        logs_layout.addLayout(logs_buttons)
+        tabs.addTab(logs_tab, "Logs")
+
+        # History Tab: archived sessions, browsed a page at a time and searched through FTS
+        history_tab = QWidget()
+        history_layout = QVBoxLayout()
+        history_tab.setLayout(history_layout)
+        history_controls = QHBoxLayout()
+        self.history_search_label = QLabel(t["history_search"])
+        history_controls.addWidget(self.history_search_label)
+        self.history_search_input = QLineEdit()
+        self.history_search_input.setPlaceholderText("wifi disconnect*")
+        self.history_search_input.setToolTip(t["tooltip_history_search"])
+        self.history_search_input.returnPressed.connect(self.search_history)
+        history_controls.addWidget(self.history_search_input, 1)
+        self.history_refresh_button = QPushButton(t["history_refresh"])
+        self.history_refresh_button.clicked.connect(self.refresh_history)
+        history_controls.addWidget(self.history_refresh_button)
+        history_layout.addLayout(history_controls)
+        self.history_sessions = QTableWidget(0, len(t["history_columns"]))
+        self.history_sessions.setHorizontalHeaderLabels(t["history_columns"])
+        self.history_sessions.verticalHeader().setVisible(False)
+        self.history_sessions.horizontalHeader().setStretchLastSection(True)
+        self.history_sessions.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.history_sessions.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.history_sessions.cellDoubleClicked.connect(self.open_history_session)
+        history_layout.addWidget(self.history_sessions, 1)
+        self.history_status_label = QLabel(t["history_hint"])
+        history_layout.addWidget(self.history_status_label)
+        self.history_model = ArchiveModel(self)
+        self.history_view = QTableView()
+        self.history_view.setModel(self.history_model)
+        self.history_view.setShowGrid(False)
+        self.history_view.setWordWrap(False)
+        self.history_view.horizontalHeader().hide()
+        self.history_view.horizontalHeader().setStretchLastSection(True)
+        self.history_view.verticalHeader().hide()
+        self.history_view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.history_view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.history_view.doubleClicked.connect(self.open_history_result)
+        history_layout.addWidget(self.history_view, 2)
+        tabs.addTab(history_tab, "History")
+        tabs.currentChanged.connect(lambda index: tabs.widget(index) is history_tab and self.refresh_history())
+
+        # Hex Tab: raw bytes of one port, only the visible rows are formatted
+        hex_tab = QWidget()
+        hex_layout = QVBoxLayout()
+        hex_tab.setLayout(hex_layout)
+        hex_controls = QHBoxLayout()
+        self.hex_source_label = QLabel(self.translations[self.language]["hex_no_source"])
+        hex_controls.addWidget(self.hex_source_label)
+        hex_controls.addStretch()
+        self.hex_clear_button = QPushButton(self.translations[self.language]["hex_clear"])
+        hex_controls.addWidget(self.hex_clear_button)
+        hex_layout.addLayout(hex_controls)
+        self.hex_model = HexModel(self)
+        self.hex_clear_button.clicked.connect(self.hex_model.clear)
+        self.hex_view = QTableView()
+        self.hex_view.setModel(self.hex_model)
+        self.hex_view.setShowGrid(False)
+        self.hex_view.setWordWrap(False)
+        self.hex_view.horizontalHeader().hide()
+        self.hex_view.horizontalHeader().setStretchLastSection(True)
+        self.hex_view.verticalHeader().hide()
+        self.hex_view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.hex_view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.hex_view.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        hex_layout.addWidget(self.hex_view)
+        tabs.addTab(hex_tab, "Hex")
+        self.port_selector.currentTextChanged.connect(self.update_hex_source)
+
+        # Connection Status Label
+        self.connection_status_label = QLabel(self.translations[self.language]["connection_status_waiting"])
+        self.connection_status_label.setStyleSheet("color: #9da5b4; font-size: 16px; font-weight: bold;")
+        layout.addWidget(self.connection_status_label)
+
+        # Exit Button
+        self.quit_button = QPushButton(self.translations[self.language]["exit"])
+        self.quit_button.setToolTip(self.translations[self.language]["tooltip_exit"])
+        self.quit_button.clicked.connect(self.close)
+        layout.addWidget(self.quit_button)
+
+        self.setLayout(layout)
+
+        # Apply the default theme
+        self.apply_theme(self.current_theme)
+
+        # Drain the reader queue on a fixed frame clock instead of per line
+        self.flush_timer = QTimer(self)
+        self.flush_timer.timeout.connect(self.flush_output)
+        self.flush_timer.start(1000 // self.refresh_rate)
+
+    def apply_theme(self, theme_name):
+        """Apply the selected theme."""
+        self.setStyleSheet(self.themes[theme_name])
+        self.output.ensurePolished()
+        self.output.verticalHeader().setDefaultSectionSize(self.output.fontMetrics().height() + 4)
+        self.history_view.ensurePolished()
+        self.history_view.verticalHeader().setDefaultSectionSize(self.history_view.fontMetrics().height() + 4)
+        self.idf_view.ensurePolished()
+        self.idf_view.verticalHeader().setDefaultSectionSize(self.idf_view.fontMetrics().height() + 4)
+        self.hex_view.ensurePolished()
+        self.hex_view.verticalHeader().setDefaultSectionSize(self.hex_view.fontMetrics().height() + 4)
+
+    def change_theme(self, index):
+        """Change the application theme."""
+        theme_names = ["dark", "light", "blue"]
+        self.current_theme = theme_names[index]
+        self.apply_theme(self.current_theme)
+
+    def update_ui_text(self):
+        """Update UI text based on the selected language."""
+        t = self.translations[self.language]
+        self.setWindowTitle(t["title"])
+        self.port_label.setText(t["port_label"])
+        self.baud_label.setText(t["baud_label"])
+        self.connect_button.setText(t["connect"])
+        self.disconnect_button.setText(t["disconnect"])
+        self.clear_button.setText(t["clear_output"])
+        self.save_button.setText(t["save_output"])
+        self.capture_button.setText(t["stop_capture"] if self.capturing else t["start_capture"])
+        self.capture_group.setTitle(t["capture_group"])
+        self.capture_size_label.setText(t["capture_rotate_size"])
+        self.capture_time_label.setText(t["capture_rotate_time"])
+        self.capture_compression_label.setText(t["capture_compression"])
+        self.auto_scroll_checkbox.setText(t["auto_scroll"])
+        self.auto_reconnect_button.setText(t["auto_reconnect_on"] if self.auto_reconnect else t["auto_reconnect_off"])
+        self.idf_parse_button.setText(t["idf_parse_on"] if self.parse_idf else t["idf_parse_off"])
+        self.idf_parse_button.setToolTip(t["tooltip_idf_parse"])
+        self.archive_button.setText(t["archive_on"] if self.archiving else t["archive_off"])
+        self.archive_button.setToolTip(t["tooltip_archive"].format(path=ARCHIVE_PATH))
+        self.elf_group.setTitle(t["elf_group"])
+        self.elf_button.setText(t["elf_load"])
+        self.elf_button.setToolTip(t["tooltip_elf"])
+        if self.backtrace_symbols is None:
+            self.elf_label.setText(t["elf_none"])
+        self.history_search_label.setText(t["history_search"])
+        self.history_search_input.setToolTip(t["tooltip_history_search"])
+        self.history_refresh_button.setText(t["history_refresh"])
+        self.history_sessions.setHorizontalHeaderLabels(t["history_columns"])
+        if self.history_model.rowCount() == 0:
+            self.history_status_label.setText(t["history_hint"])
+        self.idf_levels_label.setText(t["idf_levels"])
+        for button in self.idf_level_buttons.values():
+            button.setToolTip(t["tooltip_idf_levels"])
+        self.idf_level_buttons["-"].setText(t["idf_other"])
+        self.idf_tags_label.setText(t["idf_tags"])
+        self.idf_tags_input.setToolTip(t["tooltip_idf_tags"])
+        self.idf_message_label.setText(t["idf_message"])
+        self.idf_message_input.setToolTip(t["tooltip_idf_message"])
+        self.idf_clear_button.setText(t["idf_clear"])
+        self.idf_export_button.setText(t["idf_export"])
+        self.idf_model.set_headers(t["idf_columns"])
+        self.quit_button.setText(t["exit"])
+        self.connection_status_label.setText(t["connection_status_waiting"])
+        self.status_bar.setText(t["status_ready"])
+        self.port_selector.setToolTip(t["tooltip_port"])
+        self.baud_selector.setToolTip(t["tooltip_baud"])
+        self.refresh_label.setText(t["refresh_label"])
+        self.refresh_selector.setToolTip(t["tooltip_refresh"])
+        self.scrollback_label.setText(t["scrollback_label"])
+        self.scrollback_selector.setToolTip(t["tooltip_scrollback"])
+        self.framing_label.setText(t["framing_label"])
+        self.framing_selector.setToolTip(t["tooltip_framing"])
+        self.encoding_label.setText(t["encoding_label"])
+        self.encoding_selector.setToolTip(t["tooltip_encoding"])
+        self.decode_errors_label.setText(t["decode_errors_label"])
+        self.decode_errors_selector.setToolTip(t["tooltip_decode_errors"])
+        self.hex_clear_button.setText(t["hex_clear"])
+        self.update_hex_source()
+        self.timestamps_label.setText(t["timestamps_label"])
+        self.timestamps_selector.setToolTip(t["tooltip_timestamps"])
+        self.byte_delay_label.setText(t["byte_delay_label"])
+        self.byte_delay_selector.setToolTip(t["tooltip_byte_delay"])
+        self.line_delay_label.setText(t["line_delay_label"])
+        self.line_delay_selector.setToolTip(t["tooltip_line_delay"])
+        self.send_label.setText(t["send_label"])
+        self.send_input.setToolTip(t["tooltip_send"])
+        self.expect_label.setText(t["expect_label"])
+        self.expect_input.setToolTip(t["tooltip_expect"])
+        self.line_ending_label.setText(t["line_ending_label"])
+        self.send_button.setText(t["send"])
+        self.send_button.setToolTip(t["tooltip_send"])
+        self.macro_button.setText(t["stop_macro"] if self.macro_running() else t["run_macro"])
+        self.macro_button.setToolTip(t["tooltip_macro"])
+        self.replay_speed_label.setText(t["replay_speed_label"])
+        self.replay_speed_selector.setToolTip(t["tooltip_replay_speed"])
+        self.replay_button.setText(t["replay"])
+        self.replay_button.setToolTip(t["tooltip_replay"])
+        self.include_label.setText(t["filter_include"])
+        self.exclude_label.setText(t["filter_exclude"])
+        self.filter_button.setText(t["filter_apply"])
+        self.filter_button.setToolTip(t["tooltip_filter"])
+        self.search_label.setText(t["search_label"])
+        self.search_previous_button.setText(t["search_previous"])
+        self.search_next_button.setText(t["search_next"])
+        self.highlight_label.setText(t["highlight_label"])
+        self.highlight_add_button.setText(t["highlight_add"])
+        self.highlight_clear_button.setText(t["highlight_clear"])
+        self.stats_json_button.setText(t["stats_export_json"])
+        self.stats_csv_button.setText(t["stats_export_csv"])
+        if self.plot:
+            self.plot_window_label.setText(t["plot_window"])
+            self.plot_clear_button.setText(t["plot_clear"])
+            self.plot.waiting_text = t["plot_waiting"]
+        self.connect_button.setToolTip(t["tooltip_connect"])
+        self.disconnect_button.setToolTip(t["tooltip_disconnect"])
+        self.clear_button.setToolTip(t["tooltip_clear"])
+        self.save_button.setToolTip(t["tooltip_save"])
+        self.capture_button.setToolTip(t["tooltip_capture"])
+        self.bridge_button.setText(t["stop_bridge"] if self.serving else t["start_bridge"])
+        self.bridge_button.setToolTip(t["tooltip_bridge"])
+        self.bridge_group.setTitle(t["bridge_group"])
+        self.bridge_port_label.setText(t["bridge_port"])
+        self.bridge_mode_label.setText(t["bridge_mode"])
+        self.bridge_buffer_label.setText(t["bridge_buffer"])
+        self.bridge_policy_label.setText(t["bridge_policy"])
+        self.bridge_writes_label.setText(t["bridge_writes"])
+        self.auto_scroll_checkbox.setToolTip(t["tooltip_auto_scroll"])
+        self.auto_reconnect_button.setToolTip(t["tooltip_auto_reconnect"])
+        self.quit_button.setToolTip(t["tooltip_exit"])
+
+    def change_refresh_rate(self, text):
+        """Change how many times per second queued data is flushed to the output."""
+        self.refresh_rate = int(text)
+        self.flush_timer.setInterval(1000 // self.refresh_rate)
+
+    def change_scrollback(self, text):
+        """Change how many lines the output keeps."""
+        self.scrollback_lines = int(text)
+        self.log_model.set_capacity(self.scrollback_lines)
+
+    def make_port_framer(self):
+        return make_framer(self.framing, encoding=self.encoding, errors=self.decode_errors)
+
+    def change_framing(self, name):
+        """Switch every connected port (and future ones) to another framer."""
+        self.framing = name
+        for engine in self.session.engines.values():
+            engine.set_framer(self.make_port_framer())
+
+    def change_encoding(self, name):
+        """Decode text from every port with another encoding; a partial line is discarded."""
+        self.encoding = name
+        self.change_framing(self.framing)
+
+    def change_decode_errors(self, name):
+        self.decode_errors = name
+        self.change_framing(self.framing)
+
+    def update_hex_source(self, _=None):
+        """Show the raw bytes of the selected port in the Hex tab, or of the first connected one."""
+        engine = self.tx_engine()
+        self.hex_model.set_engine(engine)
+        t = self.translations[self.language]
+        self.hex_source_label.setText(t["hex_source"].format(port=engine.port) if engine else t["hex_no_source"])
+
+    def change_timestamp_mode(self, mode):
+        """Change how arrival times are shown; rows are reformatted as they are repainted."""
+        self.timestamp_mode = mode
+        self.log_model.set_timestamp_mode(mode)
+
+    def change_plot_window(self, text):
+        """Change how many samples per channel the plot shows."""
+        self.plot.window = int(text)
+        self.plot.update()
+
+    def change_language(self, index):
+        """Change the application language."""
+        self.language = "en" if index == 0 else "jp"
+        self.update_ui_text()
+
+    def connect_serial(self):
+        """Connect to the selected serial port, alongside any ports already connected."""
+        port_name = self.port_selector.currentText()
+        baud_rate = int(self.baud_selector.currentText())
+
+        if not port_name:
+            self.append_output("Please select a port to connect!")
+            return
+        if port_name in self.session:
+            self.append_output(f"{port_name} is already connected.")
+            return
+        if port_name in self.reconnector:
+            self.reconnector.cancel(port_name)  # Connecting by hand replaces the retries
+
+        if not len(self.session):
+            self.log_model.formatter.origin = time.monotonic_ns()  # "elapsed" counts from here
+        self.connect_port(port_name, baud_rate)
+
+    def connect_port(self, port_name, baud_rate, quiet=False, origin=None):
+        """Open a port and start reading it; returns the engine, or None on failure.
+
+        With quiet=True (reconnect attempts) a failure is not reported in the output.
+        origin is the name the port was lost under, which a re-plugged device may not
+        keep; its capture and bridge are carried over to the new connection.
+        """
+        try:
+            engine = self.session.add(port_name, baud_rate, framer=self.make_port_framer())
+        except Exception as e:
+            if not quiet:
+                self.append_output(f"Error: {e}")
+                self.connection_status_label.setText(self.translations[self.language]["connection_status_error"])
+                self.connection_status_label.setStyleSheet("color: #ef4444; font-size: 16px; font-weight: bold;")
+                self.status_bar.setText(self.translations[self.language]["status_error"])
+            return None
+        self.port_identities[port_name] = self.port_watcher.identity_of(port_name)
+        origin = origin or port_name
+        capture = self.captures.pop(origin, None)  # Kept by detach_port() while reconnecting
+        if capture:
+            self.captures[port_name] = capture
+            engine.capture = capture
+        elif self.capturing:
+            self.start_port_capture(engine)
+        if self.archiving:
+            self.start_port_archive(port_name, baud_rate)
+        self.append_output(f"Connected to {port_name} ({baud_rate} baud)")
+        self.update_hex_source()
+        bridge = self.bridges.pop(origin, None)
+        if bridge:
+            self.bridges[port_name] = bridge
+            bridge.attach(engine)  # Its clients stay connected across the reconnect
+        elif self.serving:
+            self.start_port_bridge(engine)
+        self.connection_status_label.setText(self.translations[self.language]["connection_status_connected"])
+        self.connection_status_label.setStyleSheet("color: #22c55e; font-size: 16px; font-weight: bold;")
+        self.update_status_bar()
+        return engine
+
+    def open_replay(self):
+        """Pick a capture file and connect it as a replay port."""
+        t = self.translations[self.language]
+        path, _ = QFileDialog.getOpenFileName(self, t["replay_dialog"], "captures",
+                                              "Captures (*.log *.log.gz *.log.zst *.txt);;All files (*)")
+        if not path:
+            return
+        speed = self.replay_speed_selector.currentText()
+        port_name = replay_url(path, 0 if speed == "Max" else float(speed))
+        self.port_selector.addItem(port_name)  # So Disconnect can stop it like any port
+        self.port_selector.setCurrentText(port_name)
+        self.connect_serial()
+
+    def disconnect_serial(self, port_name=None):
+        """Disconnect from the selected serial port (or the given one)."""
+        if not isinstance(port_name, str):
+            port_name = self.port_selector.currentText()  # Called from the button
+        if self.reconnector.cancel(port_name):
+            self.stop_port_outputs(port_name)
+            self.append_output(self.translations[self.language]["reconnect_cancelled"].format(port=port_name))
+            return
+        try:
+            engine = self.session.remove(port_name)
+            if engine:
+                self.stop_port_outputs(port_name)
+                record = self.archive_sessions.pop(port_name, None)
+                if record:
+                    self.archive.end_session(record)
+                self.append_output(f"Disconnected from {port_name}.")
+                if engine is self.hex_model.engine:
+                    self.update_hex_source()
+                if not len(self.session):
+                    self.connection_status_label.setText(self.translations[self.language]["connection_status_disconnected"])
+                    self.connection_status_label.setStyleSheet("color: #9da5b4; font-size: 16px; font-weight: bold;")
+                self.update_status_bar()
+            else:
+                self.append_output("Already disconnected.")
+        except Exception as e:
+            self.append_output(f"Error during disconnection: {e}")
+
+    def stop_port_outputs(self, port_name):
+        """Stop the port's CaptureWriter and Bridge, if it has them."""
+        capture = self.captures.pop(port_name, None)
+        if capture:
+            capture.stop()
+        bridge = self.bridges.pop(port_name, None)
+        if bridge:
+            bridge.stop()
+
+    def detach_port(self, port_name):
+        """Close a port lost to a read error, keeping its capture and bridge for connect_port()."""
+        engine = self.session.remove(port_name)
+        if engine is None:
+            return
+        engine.capture = None
+        bridge = self.bridges.get(port_name)
+        if bridge:
+            bridge.detach()
+        record = self.archive_sessions.pop(port_name, None)
+        if record:
+            self.archive.end_session(record)  # A reconnect starts a new archived session
+        if engine is self.hex_model.engine:
+            self.update_hex_source()
+        if not len(self.session):
+            self.connection_status_label.setText(self.translations[self.language]["connection_status_disconnected"])
+            self.connection_status_label.setStyleSheet("color: #9da5b4; font-size: 16px; font-weight: bold;")
+        self.update_status_bar()
+
+    def update_status_bar(self):
+        """Show which ports are connected."""
+        t = self.translations[self.language]
+        if len(self.session):
+            self.status_bar.setText(f"{t['status_connected']} ({', '.join(self.session.engines)})")
+        else:
+            self.status_bar.setText(t["status_disconnected"])
+
+    def flush_output(self):
+        """Drain every port's queued chunks and insert them into the output with one model edit."""
+        started = time.perf_counter_ns()
+        batch = []
+        chunk_count = 0
+        prefix_ports = len(self.session) > 1  # Interleaved view: tag lines with their port
+        batch_stamps = []
+        failed = []
+        macro_lines, macro_stamps = [], []
+        runner = self.macro_runner if self.macro_running() else None
+        if self.symbol_index is not self.backtrace_symbols:  # A new ELF was indexed
+            self.backtrace_symbols = self.symbol_index
+            self.elf_label.setText(os.path.basename(self.symbol_index.path))
+        symbols = self.backtrace_symbols
+        for engine in list(self.session.engines.values()):
+            if symbols is not None and (engine.backtrace is None or engine.backtrace.index is not symbols):
+                engine.backtrace = BacktraceDecoder(symbols)  # Also covers ports connected since
+            error = engine.take_error()
+            lines, stamps, chunks = engine.drain_lines()
+            if runner and engine is runner.engine:
+                macro_lines, macro_stamps = lines, stamps  # Before the port prefix
+            if self.parse_idf and lines:
+                self.idf_model.append(lines, stamps, engine.name)
+            if self.telemetry and lines:
+                self.telemetry.submit(lines, engine.name)  # Parsed on the telemetry thread, keyed by port
+            record = self.archive_sessions.get(engine.port)
+            if record and lines:
+                self.archive.add(record, lines, stamps)  # Written by the archive's thread
+            if prefix_ports and lines:
+                lines = [f"[{engine.name}] {line}" for line in lines]
+            batch.extend(lines)
+            batch_stamps.extend(stamps)
+            chunk_count += chunks
+            if error is not None:
+                failed.append((engine, error))
+
+        if chunk_count:
+            if batch:
+                self.append_lines(batch, batch_stamps)
+            self.flush_stats["frames"] += 1
+            self.flush_stats["chunks"] += chunk_count
+            self.flush_stats["lines"] += len(batch)
+            if self.parse_idf:
+                self.update_idf_count()
+        if self.archiving:
+            self.archive.revive()  # The writer stops after repeated SQLite errors; retry it now and then
+        for engine, error in failed:  # After the port's last lines
+            port_name = engine.port
+            if isinstance(error, ReplayFinished):
+                self.append_output(str(error))
+                self.disconnect_serial(port_name)
+                continue
+            self.append_output(f"Error reading data from {port_name}: {error}")
+            identity = self.port_identities.pop(port_name, port_name)
+            if self.auto_reconnect and not is_replay(port_name):
+                self.detach_port(port_name)
+                self.reconnector.lost(port_name, identity, baud_rate=engine.baud_rate)
+                self.append_output(self.translations[self.language]["reconnecting"].format(port=port_name))
+            else:
+                self.disconnect_serial(port_name)
+        while self.ui_messages:
+            self.append_output(self.ui_messages.popleft())
+        self.check_ports()
+        if runner:
+            self.poll_macro(macro_lines, macro_stamps)
+        t = self.translations[self.language]
+        while self.transmitter.errors:
+            port_name, error = self.transmitter.errors.popleft()
+            self.append_output(t["tx_error"].format(port=port_name, error=error))
+
+        if self.plot:
+            self.plot.refresh()
+        if self.hex_model.refresh() and self.auto_scroll:
+            self.hex_view.scrollToBottom()
+        if chunk_count:
+            self.frame_time.record(time.perf_counter_ns() - started)
+            self.frame_lines.record(len(batch))
+        self.update_batch_stats()
+
+    def append_lines(self, lines, stamps):
+        """Append a batch of lines (with arrival stamps) to the output as a single model edit."""
+        overflow = len(lines) - self.log_model.buffer.capacity
+        if overflow > 0:
+            self.lines_truncated.add(overflow)  # Never reached the scrollback
+        self.log_model.append_lines(lines, stamps)
+        if self.auto_scroll:
+            self.output.scrollToBottom()
+
+    def update_batch_stats(self):
+        """Report how many lines and chunks were coalesced per frame, once per second."""
+        stats = self.flush_stats
+        now = time.monotonic()
+        if now - stats["since"] < 1.0:
+            return
+        frames = stats["frames"] or 1
+        self.batch_stats_label.setText(self.translations[self.language]["batch_stats"].format(
+            lines=stats["lines"] / frames, chunks=stats["chunks"] / frames, dropped=sum(engine.dropped for engine in self.session.engines.values())))
+        self.flush_stats = {"frames": 0, "chunks": 0, "lines": 0, "since": now}
+        self.update_stats_table()
+
+    def update_stats_table(self):
+        """Refresh the Stats tab from a snapshot of the pipeline metrics."""
+        rows = self.stats.snapshot()
+        columns = [field for field in self.stats.FIELDS if field != "kind"]
+        self.stats_table.setRowCount(len(rows))
+        for row_index, row in enumerate(rows):
+            for column_index, field in enumerate(columns):
+                value = row.get(field, "")
+                if isinstance(value, float):
+                    value = f"{value:.1f}"
+                self.stats_table.setItem(row_index, column_index, QTableWidgetItem(str(value)))
+
+    def export_stats(self, path):
+        """Write the whole-run pipeline statistics for regression tracking."""
+        t = self.translations[self.language]
+        try:
+            self.stats.export(path)
+            self.append_output(t["stats_exported"].format(path=path))
+        except Exception as e:
+            self.append_output(f"{t['stats_export_error']}: {e}")
+
+    def apply_filter(self):
+        """Apply the include/exclude regexes to the output."""
+        try:
+            self.log_model.set_filter(self.include_input.text(), self.exclude_input.text())
+        except re.error as e:
+            self.status_bar.setText(self.translations[self.language]["filter_invalid"].format(error=e))
+            return
+        if self.auto_scroll:
+            self.output.scrollToBottom()
+
+    def find_next(self):
+        self.find_match(backwards=False)
+
+    def find_previous(self):
+        self.find_match(backwards=True)
+
+    def find_match(self, backwards):
+        """Jump to the next or previous line matching the search regex, using its index."""
+        t = self.translations[self.language]
+        filters = self.log_model.filters
+        try:
+            filters.set_search(self.search_input.text())
+        except re.error as e:
+            self.search_status_label.setText(t["filter_invalid"].format(error=e))
+            return
+        index = filters.search
+        if index is None:
+            self.search_status_label.setText("")
+            return
+        current = self.output.currentIndex()
+        if current.isValid():
+            seq = self.log_model.seq_at(current.row())
+        else:
+            seq = self.log_model.buffer.total if backwards else self.log_model.buffer.first_seq - 1
+        row = -1
+        while row < 0:
+            seq = index.previous_before(seq) if backwards else index.next_after(seq)
+            if seq is None:
+                self.search_status_label.setText(t["search_none"])
+                return
+            row = self.log_model.row_of(seq)  # -1 while the match is filtered out
+        if self.auto_scroll:  # Stay on the match instead of following new data
+            self.auto_scroll_checkbox.setChecked(False)
+            self.toggle_auto_scroll()
+        model_index = self.log_model.index(row)
+        self.output.setCurrentIndex(model_index)
+        self.output.scrollTo(model_index, QAbstractItemView.ScrollHint.PositionAtCenter)
+        self.search_status_label.setText(t["search_matches"].format(count=len(index)))
+
+    def add_highlight(self):
+        """Highlight lines matching the highlight regex in the selected color."""
+        pattern = self.highlight_input.text()
+        if not pattern:
+            return
+        try:
+            color = self.highlight_colors[self.highlight_color_selector.currentText()]
+            self.log_model.filters.add_highlight(pattern, color)
+        except re.error as e:
+            self.status_bar.setText(self.translations[self.language]["filter_invalid"].format(error=e))
+            return
+        self.highlight_input.clear()
+        self.log_model.highlights_changed()
+
+    def clear_highlights(self):
+        self.log_model.filters.clear_highlights()
+        self.log_model.highlights_changed()
+
+    def clear_output(self):
+        """Clear the output area."""
+        self.log_model.clear()
+
+    def toggle_auto_scroll(self):
+        """Toggle auto-scroll functionality."""
+        self.auto_scroll = not self.auto_scroll
+        status = "Açık" if self.auto_scroll else "Kapalı"
+        self.auto_scroll_checkbox.setText(f"Otomatik Kaydırma: {status}")
+
+    def tx_engine(self):
+        """Engine that sends go to: the selected port if connected, else the first one."""
+        engines = self.session.engines
+        return engines.get(self.port_selector.currentText()) or next(iter(engines.values()), None)
+
+    def send_command(self):
+        """Queue the Send line; with an Expect regex, time the round trip to the response."""
+        t = self.translations[self.language]
+        engine = self.tx_engine()
+        if engine is None:
+            self.append_output(t["send_not_connected"])
+            return
+        text = self.send_input.text()
+        pattern = self.expect_input.text()
+        if pattern and not self.macro_running():
+            try:
+                macro = Macro([("send", text), ("expect", re.compile(pattern))], name="send")
+            except re.error as e:
+                self.append_output(t["filter_invalid"].format(error=e))
+                return
+            self.start_macro(macro, engine)
+        else:
+            self.transmitter.send_line(engine, text)
+        self.append_output(f"> {text}")
+        self.send_input.clear()
+
+    def macro_running(self):
+        return self.macro_runner is not None and not self.macro_runner.done
+
+    def toggle_macro(self):
+        """Run a macro script against the TX port, or stop the running one."""
+        t = self.translations[self.language]
+        if self.macro_running():
+            self.macro_runner.stop()
+            self.transmitter.clear()
+            self.append_output(f"{self.macro_runner.macro.name}: stopped")
+            self.macro_button.setText(t["run_macro"])
+            return
+        engine = self.tx_engine()
+        if engine is None:
+            self.append_output(t["send_not_connected"])
+            return
+        path, _ = QFileDialog.getOpenFileName(self, t["macro_dialog"], "", "Macros (*.txt *.macro);;All files (*)")
+        if not path:
+            return
+        try:
+            macro = Macro.load(path)
+        except (OSError, ValueError) as e:
+            self.append_output(f"Error: {e}")
+            return
+        macro.name = os.path.basename(path)
+        self.start_macro(macro, engine)
+
+    def start_macro(self, macro, engine):
+        self.macro_runner = MacroRunner(macro, self.transmitter, engine, stats=self.stats)
+        self.macro_button.setText(self.translations[self.language]["stop_macro"])
+        self.poll_macro()  # Sends up to the first expect or sleep right away
+
+    def poll_macro(self, lines=(), stamps=()):
+        """Advance the running macro with newly received lines (called by the flush timer)."""
+        runner = self.macro_runner
+        if runner.engine.port not in self.session:
+            runner.stop()
+        for message in runner.poll(lines, stamps):
+            self.append_output(message)
+        if runner.done:
+            self.macro_button.setText(self.translations[self.language]["run_macro"])
+
+    def change_line_ending(self, name):
+        self.transmitter.line_ending = name
+
+    def change_tx_pacing(self, _=None):
+        """Apply the TX byte and line delays (milliseconds) to the transmitter."""
+        self.transmitter.byte_delay = int(self.byte_delay_selector.currentText()) / 1000
+        self.transmitter.line_delay = int(self.line_delay_selector.currentText()) / 1000
+
+    def toggle_auto_reconnect(self):
+        """Turn automatic reconnection on or off; turning it off stops pending retries."""
+        t = self.translations[self.language]
+        self.auto_reconnect = not self.auto_reconnect
+        self.auto_reconnect_button.setText(t["auto_reconnect_on"] if self.auto_reconnect else t["auto_reconnect_off"])
+        if not self.auto_reconnect:
+            for port_name in list(self.reconnector.pending):
+                self.reconnector.cancel(port_name)
+                self.stop_port_outputs(port_name)
+                self.append_output(t["reconnect_cancelled"].format(port=port_name))
+
+    def toggle_idf_parsing(self):
+        t = self.translations[self.language]
+        self.parse_idf = not self.parse_idf
+        self.idf_parse_button.setText(t["idf_parse_on"] if self.parse_idf else t["idf_parse_off"])
+
+    def apply_idf_filter(self):
+        """Filter the Logs tab by the checked levels, the listed tags and the message regex."""
+        checked = "".join(level for level, button in self.idf_level_buttons.items() if button.isChecked())
+        levels = None if len(checked) == len(self.idf_level_buttons) else checked
+        tags = {tag.strip() for tag in self.idf_tags_input.text().split(",") if tag.strip()} or None
+        try:
+            pattern = re.compile(self.idf_message_input.text()) if self.idf_message_input.text() else None
+        except re.error as e:
+            self.idf_count_label.setText(self.translations[self.language]["filter_invalid"].format(error=e))
+            return
+        self.idf_model.set_filter(levels, tags, pattern)
+        self.update_idf_count()
+
+    def clear_idf_logs(self):
+        self.idf_model.clear()
+        self.update_idf_count()
+
+    def update_idf_count(self):
+        self.idf_count_label.setText(self.translations[self.language]["idf_count"].format(
+            shown=self.idf_model.rowCount(), total=len(self.idf_model.store)))
+
+    def export_idf_csv(self):
+        """Save the records shown in the Logs tab as CSV without blocking the UI."""
+        model = self.idf_model
+        visible = model.visible[:] if model.visible is not None else None
+        formatter = model.formatter.copy()
+        formatter.mode = "clock-us"
+        args = (model.store.copy(), visible, formatter, "idf_log.csv")
+        threading.Thread(target=self.write_idf_csv, args=args, daemon=True).start()
+
+    def write_idf_csv(self, store, seqs, formatter, path):
+        """Write a LogStore snapshot to path (runs on a worker thread)."""
+        try:
+            with open(path, "w", encoding="utf-8", newline="") as file:
+                store.write_csv(file, seqs, formatter)
+            self.post_message(self.translations[self.language]["idf_exported"].format(path=os.path.abspath(path)))
+        except Exception as e:
+            self.post_message(f"Error: {e}")
+
+    def post_message(self, message):
+        """Queue a message from a worker thread; it is shown on the next flush."""
+        self.ui_messages.append(message)
+
+    def toggle_capture(self):
+        """Start or stop streaming received data to disk, one file series per port."""
+        t = self.translations[self.language]
+        if self.capturing:
+            self.capturing = False
+            written = 0
+            for port_name in list(self.captures):
+                capture = self.captures.pop(port_name)
+                engine = self.session.engines.get(port_name)
+                if engine:
+                    engine.capture = None
+                capture.stop()
+                written += capture.bytes_written
+            self.append_output(t["capture_stopped"].format(size=written))
+            self.capture_button.setText(t["start_capture"])
+            return
+
+        self.capturing = True
+        for engine in self.session.engines.values():
+            self.start_port_capture(engine)
+        self.append_output(t["capture_started"].format(directory=os.path.abspath("captures")))
+        self.capture_button.setText(t["stop_capture"])
+
+    def start_port_capture(self, engine):
+        """Attach a CaptureWriter configured from the Capture settings to a port."""
+        rotate_minutes = self.capture_time_selector.currentText()
+        capture = CaptureWriter(
+            "captures",
+            prefix=engine.name,
+            max_bytes=int(self.capture_size_selector.currentText()) * 1024 * 1024,
+            max_seconds=None if rotate_minutes == "Off" else int(rotate_minutes) * 60,
+            compression=self.capture_compression_selector.currentText(),
+            on_message=self.post_message,
+        )
+        capture.start()
+        self.captures[engine.port] = capture
+        engine.capture = capture
+
+    def load_elf(self):
+        """Pick the firmware ELF and index it on a worker thread (or load its cached index)."""
+        t = self.translations[self.language]
+        path, _ = QFileDialog.getOpenFileName(self, t["elf_dialog"], "", "ELF files (*.elf);;All files (*)")
+        if not path:
+            return
+        self.append_output(t["elf_loading"].format(name=os.path.basename(path)))
+        threading.Thread(target=self.index_elf, args=(path,), daemon=True).start()
+
+    def index_elf(self, path):
+        """Build or load the symbol index (runs on a worker thread); the flush timer attaches it."""
+        t = self.translations[self.language]
+        started = time.perf_counter()
+        try:
+            index = SymbolIndex.load(path)
+        except (OSError, ValueError) as e:
+            self.post_message(t["elf_error"].format(name=os.path.basename(path), error=e))
+            return
+        self.symbol_index = index
+        self.post_message(t["elf_loaded"].format(summary=index.summary(), ms=(time.perf_counter() - started) * 1000))
+
+    def toggle_archive(self):
+        """Start or stop recording connections in the session archive."""
+        t = self.translations[self.language]
+        self.archiving = not self.archiving
+        if self.archiving:
+            for engine in self.session.engines.values():
+                if not self.start_port_archive(engine.port, engine.baud_rate):
+                    return  # Switched off again; reported once
+        else:
+            for record in self.archive_sessions.values():
+                self.archive.end_session(record)
+            self.archive_sessions.clear()
+            self.archive.stop()
+        self.archive_button.setChecked(self.archiving)
+        self.archive_button.setText(t["archive_on"] if self.archiving else t["archive_off"])
+
+    def start_port_archive(self, port_name, baud_rate):
+        """Open an archive session for a new connection, starting the archive's writer if needed.
+
+        Returns False if the archive cannot be used; archiving is then switched off so
+        that later connections do not retry.
+        """
+        t = self.translations[self.language]
+        if not self.archive.running:
+            try:
+                self.archive.start()
+            except (sqlite3.Error, OSError) as e:
+                self.append_output(t["archive_error"].format(error=e))
+                self.archiving = False
+                self.archive_button.setChecked(False)
+                self.archive_button.setText(t["archive_off"])
+                return False
+        self.archive_sessions[port_name] = self.archive.open_session(port_name, baud_rate)
+        return True
+
+    def refresh_history(self):
+        """Reload the newest archived sessions into the History tab."""
+        t = self.translations[self.language]
+        if not os.path.exists(self.archive.path):
+            self.history_status_label.setText(t["history_empty"])
+            return
+        try:
+            sessions = self.archive.sessions()
+        except sqlite3.Error as e:
+            self.history_status_label.setText(t["archive_error"].format(error=e))
+            return
+        self.history_sessions.setRowCount(len(sessions))
+        for row, (session_id, port, baud, started, ended, lines, banner) in enumerate(sessions):
+            banner_lines = banner.splitlines()
+            values = [session_id, port, baud, format_time(started), format_time(ended), lines,
+                      banner_lines[-1] if banner_lines else ""]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(str(value))
+                if column == 6 and banner:
+                    item.setToolTip(banner)
+                self.history_sessions.setItem(row, column, item)
+
+    def open_history_session(self, row, column=0):
+        self.show_history_session(int(self.history_sessions.item(row, 0).text()))
+
+    def show_history_session(self, session_id, seq=0):
+        """Show an archived session in the History view, scrolled to line seq."""
+        t = self.translations[self.language]
+        try:
+            session = self.archive.session(session_id)
+        except sqlite3.Error as e:
+            self.history_status_label.setText(t["archive_error"].format(error=e))
+            return
+        if session is None:
+            return
+        self.history_model.show_session(self.archive, session_id, session[5])
+        self.history_status_label.setText(t["history_session"].format(id=session_id, port=session[1], lines=session[5]))
+        if seq:
+            self.history_view.scrollTo(self.history_model.index(seq), QAbstractItemView.ScrollHint.PositionAtCenter)
+            self.history_view.selectRow(seq)
+
+    def search_history(self):
+        """Search every archived session for the words in the search field."""
+        t = self.translations[self.language]
+        query = self.history_search_input.text().strip()
+        if not query or not os.path.exists(self.archive.path):
+            return
+        started = time.perf_counter()
+        try:
+            ports = {}
+            rows = []
+            for session_id, seq, stamp, text in self.archive.search(query):
+                if session_id not in ports:
+                    ports[session_id] = self.archive.session(session_id)[1]
+                rows.append((session_id, seq, stamp, text, ports[session_id]))
+        except sqlite3.Error as e:
+            self.history_status_label.setText(t["archive_error"].format(error=e))
+            return
+        self.history_model.show_results(rows)
+        self.history_status_label.setText(t["history_results"].format(
+            count=len(rows), query=query, ms=(time.perf_counter() - started) * 1000))
+
+    def open_history_result(self, index):
+        """Open the session of a double-clicked search result at that line."""
+        if self.history_model.session_id is None and index.isValid():
+            session_id, seq = self.history_model.results[index.row()][:2]
+            self.show_history_session(session_id, seq)
+
+    def toggle_bridge(self):
+        """Start or stop serving every connected port over local TCP."""
+        t = self.translations[self.language]
+        if self.serving:
+            self.serving = False
+            for port_name in list(self.bridges):
+                self.bridges.pop(port_name).stop()
+            self.append_output(t["bridge_stopped"])
+            self.bridge_button.setText(t["start_bridge"])
+            return
+
+        self.serving = True
+        for engine in self.session.engines.values():
+            self.start_port_bridge(engine)
+        self.bridge_button.setText(t["stop_bridge"])
+
+    def start_port_bridge(self, engine):
+        """Serve a port on the first free TCP port from the one configured in the Bridge settings."""
+        t = self.translations[self.language]
+        used = {bridge.address[1] for bridge in self.bridges.values()}
+        first = int(self.bridge_port_selector.currentText())
+        error = None
+        for tcp_port in range(first, first + 64):
+            if tcp_port in used:
+                continue
+            bridge = Bridge(
+                "127.0.0.1", tcp_port,
+                mode=self.bridge_mode_selector.currentText(),
+                max_buffer=int(self.bridge_buffer_selector.currentText()) * 1024,
+                policy=self.bridge_policy_selector.currentText(),
+                transmitter=self.transmitter,
+                writable=self.bridge_writes_selector.currentText() == "allow",
+                stats=self.stats,
+                on_message=self.post_message,
+            )
+            try:
+                bridge.start()
+            except OSError as e:
+                error = e  # Taken by another program; try the next one
+                continue
+            bridge.attach(engine)
+            self.bridges[engine.port] = bridge
+            host, tcp_port = bridge.address
+            self.append_output(t["bridge_started"].format(port=engine.port, address=f"{host}:{tcp_port}", mode=bridge.mode))
+            return
+        self.append_output(t["bridge_error"].format(port=engine.port, error=error))
+
+    def save_output(self):
+        """Save the current scrollback to a text file without blocking the UI."""
+        buffer = self.log_model.buffer
+        lines = list(buffer)  # Snapshot of line references, not of the text
+        args = (lines, buffer.stamps(), self.log_model.formatter.copy())
+        threading.Thread(target=self.write_snapshot, args=args, daemon=True).start()
+
+    def write_snapshot(self, lines, stamps, formatter):
+        """Write a scrollback snapshot to disk, formatting timestamps (runs on a worker thread)."""
+        t = self.translations[self.language]
+        try:
+            lines = formatter.prefix_lines(lines, stamps)
+            with open("serial_output.txt", "w", encoding="utf-8") as file:
+                file.writelines(line + "\n" for line in lines)
+            self.post_message(t["output_saved"])
+        except Exception as e:
+            self.post_message(f"{t['output_save_error']}: {e}")
+
+    def append_output(self, message):
+        """Append a message to the output area with a timestamp."""
+        try:
+            self.append_lines([message], [time.monotonic_ns()])
+        except Exception as e:
+            print(f"Error appending output: {e}")
+
+    def closeEvent(self, event):
+        """Handle application close event."""
+        try:
+            self.flush_timer.stop()
+            self.port_watcher.stop()
+            self.transmitter.close()
+            self.session.close()  # Stop the reader
+            if self.telemetry:
+                self.telemetry.close()
+            for capture in self.captures.values():
+                capture.stop()
+            self.captures.clear()
+            for bridge in self.bridges.values():
+                bridge.stop()
+            self.bridges.clear()
+            for record in self.archive_sessions.values():
+                self.archive.end_session(record)
+            self.archive_sessions.clear()
+            self.archive.stop()  # Commits what is still queued
+            event.accept()
+        except Exception as e:
+            self.append_output(f"Error during close: {e}")
+            event.ignore()
+
+
+def run_gui(argv=None):
+    """Create the application window and run the Qt event loop."""
+    app = QApplication(argv if argv is not None else sys.argv)
+    window = SerialMonitor()
+    window.show()
+    return app.exec()
@@ -0,0 +1,68 @@
+"""Bounded raw-byte store with hex + ASCII row formatting for the Hex view.
+
+Rows are formatted on demand, only for what the view paints or in bulk for export,
+with bytes.hex() and a translate() table instead of a per-byte loop.
+"""
+
+ROW_BYTES = 16
+_ASCII = bytes(byte if 0x20 <= byte < 0x7F else 0x2E for byte in range(256))  # Unprintable -> "."
+
+
+class HexDump:
+    """Keeps the last capacity bytes of a stream and formats them as hex dump rows.
+
+    When the store is full, whole rows are dropped from the front (cheap on a
+    bytearray) and base advances, so row n always shows the 16 bytes at stream
+    offset base + 16 * n and rows never shift under the view.
+    """
+
+    def __init__(self, capacity=16 * 1024 * 1024):
+        self.capacity = max(ROW_BYTES, capacity // ROW_BYTES * ROW_BYTES)
+        self.data = bytearray()
+        self.base = 0  # Stream offset of data[0]
+        self.total = 0  # Bytes received so far
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def rows(self):
+        return -(-len(self.data) // ROW_BYTES)
+
+    def extend(self, chunk):
+        data = self.data
+        data += chunk
+        self.total += len(chunk)
+        excess = len(data) - self.capacity
+        if excess > 0:
+            excess = -(-excess // ROW_BYTES) * ROW_BYTES
+            del data[:excess]
+            self.base += excess
+
+    def clear(self):
+        self.data = bytearray()
+        self.base = self.total  # Rows restart at the current stream offset
+
+    def format_row(self, row):
+        """One row: offset, 16 hex bytes in two groups of eight, and the printable ASCII."""
+        return self.format_rows(row, 1)[0]
+
+    def format_rows(self, first=0, count=None):
+        """Rows first .. first + count - 1 (all remaining rows by default).
+
+        The whole range is converted with one hex() and one translate() call; each
+        row is then only string slicing.
+        """
+        last = self.rows if count is None else min(self.rows, first + count)
+        start = first * ROW_BYTES
+        block = bytes(self.data[start:last * ROW_BYTES])
+        hex_text = block.hex(" ")  # Three characters per byte
+        ascii_text = block.translate(_ASCII).decode("ascii")
+        rows = []
+        offset = self.base + start
+        for index in range(0, last - first):
+            row_hex = hex_text[index * 48:index * 48 + 47]
+            row_hex = f"{row_hex[:23]}  {row_hex[24:]}" if len(row_hex) > 23 else row_hex
+            row_ascii = ascii_text[index * ROW_BYTES:(index + 1) * ROW_BYTES]
+            rows.append(f"{offset + index * ROW_BYTES:08x}  {row_hex:<48}  |{row_ascii}|")
+        return rows
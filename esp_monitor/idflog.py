@@ -0,0 +1,242 @@
+"""ESP-IDF log records parsed from the line stream into a columnar store.
+
+ESP-IDF prints log lines such as
+
+    \x1b[0;32mI (1234) wifi: connected to ap\x1b[0m
+
+that is an optional ANSI color, the level letter, the time since boot in ms (or
+HH:MM:SS.mmm with the system time source), the tag and the message. LogStore keeps
+each field in its own compact column and indexes records by level and by tag, so a
+query such as "W and E from wifi" only visits the records it returns.
+"""
+import csv
+import re
+from array import array
+from bisect import bisect_left
+from itertools import chain
+
+LEVELS = "-EWIDV"  # Level ids; "-" (0) is for lines that are not ESP-IDF log lines
+_LEVEL_IDS = bytes.maketrans(LEVELS.encode("ascii"), bytes(range(len(LEVELS))))
+ANSI_RE = re.compile(r"\x1b\[([0-9;]*)m")
+RESET = "\x1b[0m"  # What ESP-IDF ends every colored line with
+LOG_RE = re.compile(r"([EWIDV]) \((\d+|\d+:\d\d:\d\d\.\d+)\) ([^:]*): ?(.*)")
+# The same over a joined batch, including the leading color: one match per line, with
+# empty fields for other lines
+BATCH_LOG_RE = re.compile(r"^(?:\x1b\[(?:\d*;)*(3[0-7])m)?"
+                          r"(?:([EWIDV]) \((\d+|\d+:\d\d:\d\d\.\d+)\) ([^:\n]*): ?)?(.*)$", re.MULTILINE)
+LINE_COLOR_RE = re.compile(r"(?:\x1b\[(?:\d*;)*(3[0-7])m)?")  # Color a line starts with
+ANSI_COLORS = {  # SGR foreground code -> display color
+    30: "#6b7280", 31: "#ef4444", 32: "#22c55e", 33: "#eab308",
+    34: "#3b82f6", 35: "#a855f7", 36: "#06b6d4", 37: "#d1d5db",
+}
+LEVEL_COLORS = {"E": "#ef4444", "W": "#eab308"}  # For lines printed without colors
+CSV_COLUMNS = ["arrival", "port", "tick_ms", "level", "tag", "message"]
+
+
+def parse_line(line):
+    """Split a line into (level, tick_ms, tag, message, color).
+
+    ANSI sequences are removed; color is the SGR foreground code the line starts with
+    (0 if none). Lines that are not ESP-IDF log lines come back as ("-", -1, "", line, color).
+    """
+    color = 0
+    if "\x1b" in line:
+        code = LINE_COLOR_RE.match(line).group(1)
+        color = int(code) if code else 0
+        line = ANSI_RE.sub("", line)
+    match = LOG_RE.match(line)
+    if match is None:
+        return "-", -1, "", line, color
+    level, tick, tag, message = match.groups()
+    if ":" in tick:
+        hours, minutes, seconds = tick.split(":")
+        tick = (int(hours) * 3600 + int(minutes) * 60) * 1000 + round(float(seconds) * 1000)
+    return level, int(tick), tag, message, color
+
+
+def parse_batch(lines):
+    """parse_line() for a whole batch: [(level, tick, tag, message, color)].
+
+    The batch is joined and matched with one findall, so the per-line work left in
+    Python is unpacking the groups; ANSI codes are only searched for in messages
+    that still contain an escape (the usual trailing reset).
+    """
+    matches = BATCH_LOG_RE.findall("\n".join(lines))
+    if len(matches) != len(lines):
+        return [parse_line(line) for line in lines]  # A line with an embedded line break
+    records = []
+    append = records.append
+    for color, level, tick, tag, message in matches:
+        color = int(color) if color else 0
+        if "\x1b" in message:
+            if message.endswith(RESET):
+                message = message[:-len(RESET)]
+            if "\x1b" in message:
+                message = ANSI_RE.sub("", message)
+                if not level:  # Other escapes before the header, e.g. bold; parse the clean text
+                    append(parse_line(message)[:4] + (color,))
+                    continue
+        if not level:
+            append(("-", -1, "", message, color))
+        elif ":" in tick:
+            append(parse_line(f"{level} ({tick}) {tag}: {message}")[:4] + (color,))
+        else:
+            append((level, int(tick), tag, message, color))
+    return records
+
+
+class LogStore:
+    """Columnar storage of parsed log records with per-level and per-tag indexes.
+
+    Records are numbered like LineBuffer lines: the numbers survive eviction, and the
+    indexes are sorted arrays of them. Levels, tags and ports are stored as small
+    integers (tags and ports through interning tables), so a million records cost a
+    few MB besides the message strings. Past capacity the oldest quarter is dropped.
+    """
+
+    def __init__(self, capacity=1_000_000):
+        self.capacity = capacity
+        self.first = 0  # Number of the oldest record held
+        self.levels = array("B")
+        self.ticks = array("q")
+        self.tags = array("I")
+        self.ports = array("H")
+        self.colors = array("B")
+        self.stamps = array("q")  # Arrival time.monotonic_ns()
+        self.messages = []
+        self.tag_names = [""]
+        self.port_names = [""]
+        self._tag_ids = {"": 0}
+        self._port_ids = {"": 0}
+        self.by_level = [array("q") for _ in LEVELS]
+        self.by_tag = [array("q")]
+
+    def __len__(self):
+        return len(self.messages)
+
+    @property
+    def total(self):
+        """Records appended so far; the next one gets this number."""
+        return self.first + len(self.messages)
+
+    def tag_id(self, tag):
+        tag_id = self._tag_ids.get(tag)
+        if tag_id is None:
+            tag_id = self._tag_ids[tag] = len(self.tag_names)
+            self.tag_names.append(tag)
+            self.by_tag.append(array("q"))
+        return tag_id
+
+    def extend(self, lines, stamps, port=""):
+        """Parse and append a batch of lines received on port; returns the first new record number."""
+        first_new = self.total
+        port_id = self._port_ids.get(port)
+        if port_id is None:
+            port_id = self._port_ids[port] = len(self.port_names)
+            self.port_names.append(port)
+        records = parse_batch(lines)
+        if not records:
+            return first_new
+        levels, ticks, tags, messages, colors = zip(*records)
+        level_ids = "".join(levels).encode("ascii").translate(_LEVEL_IDS)
+        tag_ids = self._tag_ids
+        tag_numbers = [tag_ids[tag] if tag in tag_ids else self.tag_id(tag) for tag in tags]
+        by_level = self.by_level
+        by_tag = self.by_tag
+        for seq, level_id, tag_number in zip(range(first_new, first_new + len(records)), level_ids, tag_numbers):
+            by_level[level_id].append(seq)
+            by_tag[tag_number].append(seq)
+        self.levels.frombytes(level_ids)
+        self.ticks.extend(ticks)
+        self.tags.extend(tag_numbers)
+        self.colors.extend(colors)
+        self.messages.extend(messages)
+        self.ports.extend([port_id] * len(lines))
+        self.stamps.extend(stamps)
+        if len(self.messages) > self.capacity:
+            self._evict(len(self.messages) - self.capacity * 3 // 4)
+        return first_new
+
+    def _evict(self, count):
+        """Drop the oldest count records from every column and index."""
+        for column in (self.levels, self.ticks, self.tags, self.ports, self.colors, self.stamps, self.messages):
+            del column[:count]
+        self.first += count
+        for index in chain(self.by_level, self.by_tag):
+            del index[:bisect_left(index, self.first)]
+
+    def clear(self):
+        self._evict(len(self.messages))
+
+    def record(self, seq):
+        """(arrival stamp, port, tick, level, tag, message, color) of a record."""
+        i = seq - self.first
+        return (self.stamps[i], self.port_names[self.ports[i]], self.ticks[i], LEVELS[self.levels[i]],
+                self.tag_names[self.tags[i]], self.messages[i], self.colors[i])
+
+    def select(self, levels=None, tags=None, pattern=None, start=None):
+        """Sorted array of the record numbers matching every given condition.
+
+        levels is a string of level letters ("EW", "-" for non-log lines), tags a
+        collection of tag names and pattern a compiled regex searched in the message;
+        None means any. Records before start are skipped, which is how new batches are
+        matched. The smaller of the level and tag index unions is used as the candidate
+        list and checked against the other column, so selective queries stay cheap.
+        """
+        start = self.first if start is None else max(start, self.first)
+        level_ids = None if levels is None else {LEVELS.index(level) for level in levels if level in LEVELS}
+        tag_ids = None if tags is None else {self._tag_ids[tag] for tag in tags if tag in self._tag_ids}
+        first = self.first
+        level_parts = None if level_ids is None else self._parts([self.by_level[i] for i in level_ids], start)
+        tag_parts = None if tag_ids is None else self._parts([self.by_tag[i] for i in tag_ids], start)
+        candidates = None
+        if level_parts is not None and tag_parts is not None:
+            # Walk the smaller side and check the other condition in its column
+            if sum(map(len, tag_parts)) < sum(map(len, level_parts)):
+                column, wanted, parts = self.levels, level_ids, tag_parts
+            else:
+                column, wanted, parts = self.tags, tag_ids, level_parts
+            candidates = [seq for seq in self._merge(parts) if column[seq - first] in wanted]
+        elif level_parts is not None or tag_parts is not None:
+            candidates = self._merge(level_parts if level_parts is not None else tag_parts)
+        if candidates is None:
+            candidates = range(start, self.total)
+        if pattern is not None:
+            search = pattern.search
+            messages = self.messages
+            candidates = [seq for seq in candidates if search(messages[seq - first])]
+        return array("q", candidates)
+
+    @staticmethod
+    def _parts(indexes, start):
+        return [index[bisect_left(index, start):] for index in indexes]
+
+    @staticmethod
+    def _merge(parts):
+        if len(parts) == 1:
+            return parts[0]
+        return array("q", sorted(chain.from_iterable(parts)))  # Timsort merges the sorted runs
+
+    def copy(self):
+        """Snapshot of the records (without indexes) that a worker thread can export."""
+        other = LogStore(self.capacity)
+        other.first = self.first
+        for name in ("levels", "ticks", "tags", "ports", "colors", "stamps"):
+            setattr(other, name, getattr(self, name)[:])
+        other.messages = self.messages[:]
+        other.tag_names = self.tag_names[:]
+        other.port_names = self.port_names[:]
+        return other
+
+    def write_csv(self, file, seqs=None, formatter=None):
+        """Write records (all by default) as CSV rows; formatter turns arrival stamps into text."""
+        writer = csv.writer(file)
+        writer.writerow(CSV_COLUMNS)
+        seqs = range(self.first, self.total) if seqs is None else seqs
+        writer.writerows(csv_row(*self.record(seq)[:6], formatter) for seq in seqs)
+
+
+def csv_row(stamp, port, tick, level, tag, message, formatter=None):
+    """One CSV row in CSV_COLUMNS order."""
+    arrival = formatter.format(stamp).strip("[]") if formatter else stamp
+    return [arrival, port, tick if tick >= 0 else "", level if level != "-" else "", tag, message]
@@ -0,0 +1,68 @@
+"""Plot tab widget drawing TelemetryStore snapshots with min/max decimation."""
+import numpy as np
+from PyQt6.QtCore import QPointF, Qt
+from PyQt6.QtGui import QColor, QPainter, QPen, QPolygonF
+from PyQt6.QtWidgets import QWidget
+
+COLORS = ["#3b82f6", "#22c55e", "#ef4444", "#eab308", "#a855f7", "#06b6d4", "#f97316", "#ec4899"]
+
+
+class PlotWidget(QWidget):
+    """Draws every telemetry channel as one min/max polyline per pixel column.
+
+    Once a pixel column spans telemetry.BLOCK samples the store decimates from its per-block
+    minima and maxima, so a frame reads about width + window / BLOCK values: a
+    million-sample window costs a few thousand reads, not a million.
+    """
+
+    def __init__(self, store, waiting_text="", parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.window = 100000  # Samples shown per channel
+        self.waiting_text = waiting_text
+        self._drawn_version = -1
+        self.setMinimumHeight(240)
+
+    def refresh(self):
+        """Schedule a repaint only if new samples arrived since the last one."""
+        if self.store.version != self._drawn_version:
+            self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        text_color = self.palette().color(self.foregroundRole())
+        area = self.rect().adjusted(60, 10, -10, -10)
+        self._drawn_version = self.store.version
+        if area.width() <= 0 or area.height() <= 0:
+            return
+        snapshot = self.store.snapshot(self.window, area.width())
+        painter.setPen(QPen(text_color))
+        if not snapshot:
+            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, self.waiting_text)
+            return
+
+        low = min(float(minima.min()) for _, minima, _, _ in snapshot.values() if len(minima))
+        high = max(float(maxima.max()) for _, _, maxima, _ in snapshot.values() if len(maxima))
+        if high == low:
+            high, low = high + 1.0, low - 1.0
+        y_scale = area.height() / (high - low)
+        x_scale = area.width() / self.window
+
+        painter.drawRect(area)
+        painter.drawText(4, area.top() + 12, f"{high:.6g}")
+        painter.drawText(4, area.bottom(), f"{low:.6g}")
+
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, False)
+        for index, (name, (positions, minima, maxima, last)) in enumerate(snapshot.items()):
+            color = QColor(COLORS[index % len(COLORS)])
+            if len(positions):
+                # Interleave (x, min), (x, max) so each bucket becomes a vertical stroke
+                xs = np.repeat(area.left() + positions * x_scale, 2)
+                ys = np.empty(len(xs))
+                ys[0::2] = area.bottom() - (minima - low) * y_scale
+                ys[1::2] = area.bottom() - (maxima - low) * y_scale
+                polygon = QPolygonF([QPointF(x, y) for x, y in zip(xs.tolist(), ys.tolist())])
+                painter.setPen(QPen(color, 1))
+                painter.drawPolyline(polygon)
+            painter.setPen(QPen(color))
+            painter.drawText(area.left() + 8, area.top() + 16 * (index + 1), f"{name} = {last:.6g}")
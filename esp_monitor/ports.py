@@ -0,0 +1,170 @@
+"""Background port discovery and automatic reconnection with exponential backoff."""
+import threading
+import time
+from collections import deque
+
+import serial.tools.list_ports
+
+
+def port_identity(info):
+    """Stable key for a port: USB VID/PID/serial number (and interface) when known, else the device path.
+
+    A board that is re-plugged or resets into the bootloader keeps its identity even
+    if the OS gives it another device name.
+    """
+    if info.vid is not None:
+        return (info.vid, info.pid, info.serial_number, getattr(info, "interface", None))
+    return info.device
+
+
+class PortWatcher:
+    """Polls the system's serial ports on a background thread and caches the result.
+
+    comports() walks sysfs or the registry and can take tens of milliseconds, so it
+    never runs on the caller's thread. Scans are diffed by identity: version only
+    changes, and events ("added"/"removed", info) are only queued, when ports come or go
+    (the first scan only fills the cache).
+    """
+
+    def __init__(self, interval=0.5, list_ports=None):
+        self.interval = interval
+        self._list_ports = list_ports or serial.tools.list_ports.comports
+        self.ports = {}  # identity -> ListPortInfo from the last scan, replaced as a whole
+        self.events = deque(maxlen=256)
+        self.version = 0
+        self.scans = 0
+        self.error = None  # Last comports() failure, if any
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="port-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            self.scan()
+            if self._stop_event.wait(self.interval):
+                break
+
+    def scan(self):
+        """List the ports once and record what changed; returns True on a change."""
+        try:
+            infos = self._list_ports()
+        except Exception as e:
+            self.error = e
+            return False
+        self.scans += 1
+        previous = self.ports
+        current = {port_identity(info): info for info in infos}
+        removed = [info for key, info in previous.items()
+                   if key not in current or current[key].device != info.device]
+        added = [info for key, info in current.items()
+                 if key not in previous or previous[key].device != info.device]
+        if not added and not removed:
+            return False
+        self.ports = current
+        if self.scans > 1:
+            self.events.extend(("removed", info) for info in removed)
+            self.events.extend(("added", info) for info in added)
+        self.version += 1
+        return True
+
+    def devices(self):
+        """Device names of the cached ports, sorted."""
+        return sorted(info.device for info in self.ports.values())
+
+    def identity_of(self, device):
+        """Identity of the port currently named device (the name itself if unknown)."""
+        for key, info in self.ports.items():
+            if info.device == device:
+                return key
+        return device
+
+    def device_for(self, identity):
+        """Current device name of a port identity, or None while it is absent."""
+        info = self.ports.get(identity)
+        if info is not None:
+            return info.device
+        return identity if isinstance(identity, str) else None
+
+
+class Reconnector:
+    """Exponential-backoff schedule for ports that dropped out.
+
+    The caller reports a lost port with lost(), asks due() which ports to try now,
+    and reports each attempt with failed() or succeeded(). A port whose identity
+    shows up in the watcher again is tried at once instead of waiting out its delay.
+    The drop-to-reopen gap is recorded in the "reconnect.gap" histogram.
+    """
+
+    def __init__(self, initial=0.1, maximum=5.0, stats=None):
+        self.initial = initial
+        self.maximum = maximum
+        self.pending = {}  # port -> _Lost
+        if stats is not None:
+            self._gap = stats.histogram("reconnect.gap", "ns")
+            self._attempts = stats.counter("reconnect.attempts")
+        else:
+            self._gap = self._attempts = None
+
+    def __contains__(self, port):
+        return port in self.pending
+
+    def lost(self, port, identity, **options):
+        """Start retrying port; options are kept for the caller (baud rate, ...)."""
+        self.pending[port] = _Lost(identity, self.initial, options)
+
+    def cancel(self, port):
+        return self.pending.pop(port, None) is not None
+
+    def due(self, present=()):
+        """Return [(port, identity, options)] to try now; present holds identities that are available."""
+        now = time.monotonic()
+        ready = []
+        for port, lost in self.pending.items():
+            is_present = lost.identity in present
+            appeared = is_present and not lost.seen_present
+            lost.seen_present = is_present
+            if now >= lost.next_try or appeared:
+                ready.append((port, lost.identity, lost.options))
+        return ready
+
+    def failed(self, port):
+        lost = self.pending.get(port)
+        if lost is None:
+            return
+        lost.attempts += 1
+        if self._attempts is not None:
+            self._attempts.add()
+        lost.next_try = time.monotonic() + lost.delay
+        lost.delay = min(lost.delay * 2, self.maximum)
+
+    def succeeded(self, port):
+        """Stop retrying port; returns (gap in seconds, attempts)."""
+        lost = self.pending.pop(port, None)
+        if lost is None:
+            return 0.0, 0
+        gap = time.monotonic_ns() - lost.lost_at
+        if self._gap is not None:
+            self._gap.record(gap)
+            self._attempts.add()
+        return gap / 1e9, lost.attempts + 1
+
+
+class _Lost:
+    def __init__(self, identity, delay, options):
+        self.identity = identity
+        self.options = options
+        self.lost_at = time.monotonic_ns()
+        self.delay = delay
+        self.next_try = time.monotonic() + delay
+        self.attempts = 0
+        self.seen_present = False  # Whether the port's reappearance already triggered a try
@@ -0,0 +1,209 @@
+"""Replay of recorded captures through the normal engine, framing and display path.
+
+A replay is opened like any other port, with a name of the form
+"replay:PATH[?speed=N]": SerialEngine.open() then creates a ReplayPort instead of a
+serial.Serial. Chunks are released at the times recorded in the capture's index,
+N times faster (speed=1 is real time), or as fast as they are read with speed=0.
+Uncompressed captures are memory-mapped, compressed ones are streamed, so even
+large files are never loaded whole.
+"""
+import gzip
+import mmap
+import os
+import sys
+import time
+from array import array
+
+from .capture import INDEX_HEADER, INDEX_MAGIC, INDEX_SUFFIX
+
+try:
+    import zstandard  # Optional: reading .zst capture segments
+except ImportError:
+    zstandard = None
+
+SCHEME = "replay:"
+MAX_READ = 64 * 1024  # Upper bound for one read(), keeps drains bounded at speed=0
+
+
+class ReplayFinished(EOFError):
+    """Raised by ReplayPort.read() once the whole capture has been played."""
+
+
+def is_replay(port):
+    return port.startswith(SCHEME)
+
+
+def replay_url(path, speed=1.0):
+    """Port name that SerialEngine opens as a replay of path."""
+    return f"{SCHEME}{path}?speed={speed:g}"
+
+
+def parse_replay_url(port):
+    """Split a replay port name into (path, speed)."""
+    path, _, query = port[len(SCHEME):].partition("?")
+    speed = 1.0
+    for option in query.split("&"):
+        key, _, value = option.partition("=")
+        if key == "speed":
+            speed = float(value)
+    return path, speed
+
+
+def index_path(path):
+    """Sidecar index of a capture segment; compressed segments share the .log's index."""
+    for suffix in (".gz", ".zst"):
+        if path.endswith(suffix):
+            path = path[:-len(suffix)]
+    return path + INDEX_SUFFIX
+
+
+def load_index(path):
+    """Return the capture's uint64 index words (memory-mapped when possible), or None."""
+    try:
+        with open(index_path(path), "rb") as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None  # No index, or an empty one
+    size = len(mapped) // 8 * 8
+    if sys.byteorder == "little":
+        words = memoryview(mapped)[:size].cast("Q")
+    else:
+        words = array("Q", mapped[:size])
+        words.byteswap()
+        mapped.close()
+    if len(words) < INDEX_HEADER or words[0] != INDEX_MAGIC:
+        release_index(words)
+        return None
+    return words
+
+
+def release_index(words):
+    """Unmap an index returned by load_index()."""
+    if isinstance(words, memoryview):
+        mapped = words.obj
+        words.release()
+        mapped.close()
+
+
+def open_source(path):
+    """A file-like object with read(n) over the capture's raw bytes."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise OSError("zstandard is required to replay .zst captures")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return open(path, "rb")  # mmap cannot map an empty file
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class ReplayPort:
+    """Stand-in for serial.Serial that plays back a capture.
+
+    Implements what SerialEngine uses: read(), write(), in_waiting, is_open and close(). It has
+    no file descriptor, so a SessionManager reads it on the engine's own thread.
+    Without an index (e.g. a plain saved log) the file is played as fast as possible.
+    """
+
+    max_backlog = 32  # Queued chunks at which the engine pauses reading instead of dropping data
+
+    def __init__(self, path, speed=1.0, timeout=1):
+        self.path = path
+        self.speed = speed
+        self.timeout = timeout
+        self._source = open_source(path)
+        self._index = load_index(path)
+        self._chunks = (len(self._index) - INDEX_HEADER) // 2 if self._index is not None else 0
+        self._chunk = 0  # Chunk containing the next byte to read
+        self._position = 0  # Offset of the next byte to read
+        self._started = None  # monotonic_ns() when playback started
+        self._finished = False
+        self.is_open = True
+
+    @classmethod
+    def from_url(cls, port, timeout=1):
+        path, speed = parse_replay_url(port)
+        return cls(path, speed, timeout)
+
+    @property
+    def started_wall_ns(self):
+        """Wall-clock time at which the capture started, or None without an index."""
+        return self._index[1] if self._index is not None else None
+
+    def _offset(self, chunk):
+        return self._index[INDEX_HEADER + 2 * chunk]
+
+    def _due_in(self, chunk):
+        """Nanoseconds until chunk is due (<= 0 when it may be read)."""
+        if not self.speed or chunk >= self._chunks:
+            return 0
+        now = time.monotonic_ns()
+        if self._started is None:
+            self._started = now
+        first = self._index[INDEX_HEADER + 1]
+        elapsed = (self._index[INDEX_HEADER + 2 * chunk + 1] - first) / self.speed
+        return self._started + elapsed - now
+
+    def _chunk_end(self, chunk):
+        """Offset just past chunk, or None for the last chunk (read to the end of the file)."""
+        return self._offset(chunk + 1) if chunk + 1 < self._chunks else None
+
+    @property
+    def in_waiting(self):
+        """Bytes that are due now, capped at MAX_READ; a chunk of unknown length counts as MAX_READ."""
+        if self._finished or self._due_in(self._chunk) > 0:
+            return 0
+        chunk = self._chunk
+        end = self._chunk_end(chunk)
+        while end is not None and end - self._position < MAX_READ and self._due_in(chunk + 1) <= 0:
+            chunk += 1
+            end = self._chunk_end(chunk)
+        return MAX_READ if end is None else min(end - self._position, MAX_READ)
+
+    def read(self, size=1):
+        """Return up to size bytes that are due, waiting at most timeout for the next chunk."""
+        if not self.is_open:
+            raise ValueError("replay is closed")
+        if self._finished:
+            raise ReplayFinished(f"Replay of {os.path.basename(self.path)} finished")
+        deadline = time.monotonic() + (self.timeout or 0)
+        while True:
+            wait = self._due_in(self._chunk) / 1e9
+            if wait <= 0:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self.is_open:
+                return b""
+            time.sleep(min(wait, remaining, 0.05))  # Wake up regularly to notice close()
+        parts = []
+        size = min(size, MAX_READ)
+        while size > 0 and self._due_in(self._chunk) <= 0:
+            end = self._chunk_end(self._chunk)
+            take = size if end is None else min(size, end - self._position)
+            data = self._source.read(take)
+            if not data:
+                self._finished = True
+                break
+            parts.append(data)
+            self._position += len(data)
+            size -= len(data)
+            if end is not None and self._position >= end:
+                self._chunk += 1
+        if not parts and self._finished:
+            raise ReplayFinished(f"Replay of {os.path.basename(self.path)} finished")
+        return b"".join(parts)
+
+    def write(self, data):
+        """A recording cannot answer; transmitted data is discarded."""
+        return len(data)
+
+    def close(self):
+        if not self.is_open:
+            return
+        self.is_open = False
+        self._source.close()
+        if self._index is not None:
+            release_index(self._index)
+            self._index = None
@@ -0,0 +1,126 @@
+"""Many serial ports multiplexed on a single selector thread."""
+import selectors
+import socket
+import threading
+from collections import deque
+
+from .engine import SerialEngine
+from .stats import PipelineStats
+
+
+class SessionManager:
+    """Owns several SerialEngines and reads them all from one event loop.
+
+    Ports are registered with a selector on their file descriptors, so the reader
+    thread sleeps until any port has data and CPU cost follows the byte rate rather
+    than the number of ports. Ports without a file descriptor (replays, and every
+    port with pyserial on Windows) fall back to the engine's own blocking reader
+    thread, so on Windows each port still costs a thread.
+    """
+
+    def __init__(self, stats=None):
+        self.engines = {}  # port -> SerialEngine, in connection order
+        self.stats = stats or PipelineStats()  # Shared by every engine of the session
+        self._selector = selectors.DefaultSelector()
+        self._pending = deque()  # (action, engine) applied on the selector thread
+        self._wake_recv, self._wake_send = socket.socketpair()
+        self._wake_recv.setblocking(False)
+        self._selector.register(self._wake_recv, selectors.EVENT_READ, None)
+        self._running = False
+        self._thread = None
+
+    def __len__(self):
+        return len(self.engines)
+
+    def __contains__(self, port):
+        return port in self.engines
+
+    def add(self, port, baud_rate, **options):
+        """Open a port and start reading it; raises serial.SerialException.
+
+        Extra keyword arguments (capture, framer, decoder, ...) go to SerialEngine.
+        """
+        if port in self.engines:
+            raise ValueError(f"{port} is already connected")
+        options.setdefault("stats", self.stats)
+        engine = SerialEngine(port, baud_rate, **options)
+        engine.open(threaded=False)
+        try:
+            engine.serial_port.fileno()
+        except (AttributeError, OSError):
+            # No pollable descriptor on this platform. The port was opened non-blocking for
+            # the selector; the reader thread needs reads that wait, or it spins.
+            engine.serial_port.timeout = 1
+            engine.start_thread()
+        else:
+            self._submit("add", engine)
+        self.engines[port] = engine
+        return engine
+
+    def remove(self, port):
+        """Stop reading a port and close it."""
+        engine = self.engines.pop(port, None)
+        if engine is None:
+            return None
+        if engine._thread:
+            engine.close()  # Read by its own thread, not registered with the selector
+        else:
+            engine.reading_active = False
+            self._submit("remove", engine)
+        return engine
+
+    def close(self):
+        """Close every port and stop the selector thread."""
+        for port in list(self.engines):
+            self.remove(port)
+        self._running = False
+        self._wake()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _submit(self, action, engine):
+        self._pending.append((action, engine))
+        if not self._running:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="serial-selector", daemon=True)
+            self._thread.start()
+        self._wake()
+
+    def _wake(self):
+        try:
+            self._wake_send.send(b"\0")
+        except OSError:
+            pass  # Wake-up socket buffer is full; the loop is already due to run
+
+    def _apply_pending(self):
+        while self._pending:
+            action, engine = self._pending.popleft()
+            if action == "add":
+                self._selector.register(engine.serial_port.fileno(), selectors.EVENT_READ, engine)
+            else:
+                try:
+                    self._selector.unregister(engine.serial_port.fileno())
+                except (KeyError, ValueError, OSError):
+                    pass
+                engine.close()
+
+    def _run(self):
+        while self._running:
+            self._apply_pending()
+            for key, _ in self._selector.select(timeout=1.0):
+                engine = key.data
+                if engine is None:
+                    try:
+                        self._wake_recv.recv(4096)
+                    except OSError:
+                        pass
+                    continue
+                try:
+                    engine.read_available()
+                except Exception as e:
+                    if engine.reading_active:
+                        engine.error = e
+                    engine.reading_active = False
+                    self._selector.unregister(key.fd)
+        self._apply_pending()
@@ -0,0 +1,155 @@
+"""Pipeline instrumentation: counters and log2 histograms with JSON/CSV export.
+
+Recording is a couple of integer updates without locks, so each metric must have
+a single writer thread. Metrics written by a port's reader or a bridge's thread are
+created per port or bridge (read.COM3.bytes, bridge.5555.sent); the shared ones are
+only written by one thread per session (the drain loop, the TX thread). Readers take
+snapshots that may be a sample or two behind, which is fine for monitoring.
+"""
+import csv
+import io
+import json
+import time
+
+
+class Counter:
+    """Monotonic count, e.g. bytes read or chunks dropped."""
+
+    kind = "counter"
+
+    def __init__(self):
+        self.value = 0
+
+    def add(self, amount=1):
+        self.value += amount
+
+    def summary(self):
+        return {"count": self.value}
+
+
+class Histogram:
+    """Distribution of non-negative integers in power-of-two buckets.
+
+    Bucket i holds values v with v.bit_length() == i, so recording is O(1) and
+    percentiles are accurate to a factor of two, reported as the bucket's upper bound.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, unit=""):
+        self.unit = unit
+        self.buckets = [0] * 65
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def record(self, value):
+        value = int(value)
+        if value < 0:
+            value = 0
+        self.buckets[value.bit_length()] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, fraction):
+        if not self.count:
+            return 0
+        rank = fraction * self.count
+        seen = 0
+        for bit_length, hits in enumerate(self.buckets):
+            seen += hits
+            if seen >= rank:
+                return min((1 << bit_length) - 1, self.max)
+        return self.max
+
+    def distribution(self):
+        """Non-empty buckets as [(upper bound, count)], for plotting or export."""
+        return [((1 << bit_length) - 1, hits) for bit_length, hits in enumerate(self.buckets) if hits]
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0,
+            "min": self.min or 0,
+            "p50": self.percentile(0.50),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+            "unit": self.unit,
+        }
+
+
+class PipelineStats:
+    """Named metrics for every stage: read, decode, queue, render and drops."""
+
+    FIELDS = ["name", "kind", "count", "rate", "mean", "min", "p50", "p99", "max", "unit"]
+
+    def __init__(self):
+        self.metrics = {}
+        self.started = time.monotonic()
+        self._last_counts = {}
+        self._last_time = self.started
+
+    def counter(self, name):
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = self.metrics[name] = Counter()
+        return metric
+
+    def histogram(self, name, unit=""):
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = self.metrics[name] = Histogram(unit)
+        return metric
+
+    def snapshot(self):
+        """Return one dict per metric; rate is per second since the previous snapshot."""
+        now = time.monotonic()
+        elapsed = max(now - self._last_time, 1e-9)
+        rows = []
+        for name, metric in list(self.metrics.items()):
+            row = {"name": name, "kind": metric.kind}
+            row.update(metric.summary())
+            count = row["count"]
+            row["rate"] = (count - self._last_counts.get(name, 0)) / elapsed
+            self._last_counts[name] = count
+            rows.append(row)
+        self._last_time = now
+        return rows
+
+    def totals(self):
+        """Whole-run summary without disturbing the rolling rates."""
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        rows = []
+        for name, metric in list(self.metrics.items()):
+            row = {"name": name, "kind": metric.kind}
+            row.update(metric.summary())
+            row["rate"] = row["count"] / elapsed
+            rows.append(row)
+        return rows
+
+    def to_json(self):
+        """Totals plus the bucket counts of every histogram."""
+        metrics = self.totals()
+        for row in metrics:
+            metric = self.metrics[row["name"]]
+            if metric.kind == "histogram":
+                row["buckets"] = metric.distribution()
+        return json.dumps({"elapsed": time.monotonic() - self.started, "metrics": metrics}, indent=2)
+
+    def to_csv(self):
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=self.FIELDS, extrasaction="ignore", restval="")
+        writer.writeheader()
+        writer.writerows(self.totals())
+        return output.getvalue()
+
+    def export(self, path):
+        """Write the totals as CSV if path ends in .csv, JSON otherwise."""
+        content = self.to_csv() if path.lower().endswith(".csv") else self.to_json()
+        with open(path, "w", encoding="utf-8", newline="") as file:
+            file.write(content)
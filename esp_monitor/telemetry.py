@@ -0,0 +1,229 @@
+"""Numeric telemetry extracted from the line stream into per-channel NumPy ring buffers.
+
+Lines such as ``temp=23.4,rpm=1200`` or bare CSV rows (``1.0,2.5,3``) are parsed a
+whole batch at a time: one regex pass over the joined batch and one NumPy conversion
+per channel, on a worker thread so the GUI only ever reads decimated snapshots.
+Channels are kept per port, so two boards printing ``temp=`` stay apart.
+"""
+import re
+import threading
+from collections import deque
+
+import numpy as np
+
+_NUMBER = r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+KEY_VALUE_RE = re.compile(r"([A-Za-z_][\w.]*)\s*=\s*(" + _NUMBER + r")")
+CSV_ROW_RE = re.compile(r"^[ \t]*" + _NUMBER + r"(?:[ \t]*,[ \t]*" + _NUMBER + r")+[ \t]*$", re.MULTILINE)
+BLOCK = 256  # Samples summarized by one precomputed (min, max) pair
+
+
+class ChannelRing:
+    """Preallocated float64 ring buffer holding the newest samples of one channel.
+
+    Alongside the samples it keeps the minimum and maximum of every completed block
+    of BLOCK samples, so wide windows can be decimated from the block summaries.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = -(-capacity // BLOCK) * BLOCK  # Blocks never straddle the wrap
+        self.values = np.empty(self.capacity, dtype=np.float64)
+        self.block_min = np.empty(self.capacity // BLOCK, dtype=np.float64)
+        self.block_max = np.empty(self.capacity // BLOCK, dtype=np.float64)
+        self.head = 0  # Next slot to write
+        self.size = 0
+        self.written = 0  # Samples appended so far; written // BLOCK blocks are complete
+        self.last = float("nan")
+
+    def extend(self, samples):
+        """Append a 1-D array of samples with at most two slice copies, then summarize the blocks it completed."""
+        count = len(samples)
+        if not count:
+            return
+        self.last = float(samples[-1])
+        done = self.written // BLOCK
+        if count >= self.capacity:
+            # Keep the stream's block alignment: the newest sample lands before the new head
+            self.written += count
+            self.head = self.written % self.capacity
+            self.values[:] = np.roll(samples[-self.capacity:], self.head)
+            self.size = self.capacity
+        else:
+            first = min(count, self.capacity - self.head)
+            self.values[self.head:self.head + first] = samples[:first]
+            self.values[:count - first] = samples[first:]
+            self.head = (self.head + count) % self.capacity
+            self.size = min(self.capacity, self.size + count)
+            self.written += count
+        blocks = len(self.block_min)
+        completed = np.arange(max(done, self.written // BLOCK - blocks), self.written // BLOCK) % blocks
+        if len(completed):
+            rows = self.values.reshape(blocks, BLOCK)[completed]
+            self.block_min[completed] = rows.min(axis=1)
+            self.block_max[completed] = rows.max(axis=1)
+
+    def ordered(self, count=None):
+        """Return the newest count samples (default: all), oldest first."""
+        count = self.size if count is None else min(count, self.size)
+        start = (self.head - count) % self.capacity
+        if start + count <= self.capacity:
+            return self.values[start:start + count]
+        return np.concatenate((self.values[start:], self.values[:self.head]))
+
+    def recent(self, window, buckets):
+        """Copy what decimating the newest window samples into buckets needs.
+
+        Returns (minima, maxima, step), oldest first, where each pair covers step
+        samples. Windows that put at least BLOCK samples in every bucket are read
+        from the block summaries (the newest, incomplete block from the samples), so
+        the copy is window / BLOCK pairs rather than window samples.
+        """
+        if window < buckets * BLOCK:
+            samples = self.ordered(window).copy()
+            return samples, samples, 1
+        tail = self.written % BLOCK  # Samples of the incomplete newest block
+        count = min((self.size - tail) // BLOCK, max(0, window - tail) // BLOCK)
+        blocks = len(self.block_min)
+        indexes = np.arange(self.written // BLOCK - count, self.written // BLOCK) % blocks
+        minima = self.block_min[indexes]
+        maxima = self.block_max[indexes]
+        if tail:
+            newest = self.values[self.head - tail:self.head]
+            minima = np.append(minima, newest.min())
+            maxima = np.append(maxima, newest.max())
+        return minima, maxima, BLOCK
+
+
+def minmax_decimate(minima, maxima, buckets):
+    """Reduce (min, max) pairs to per-bucket pairs so spikes survive downsampling.
+
+    Plain samples are passed as both minima and maxima. Returns (positions, minima,
+    maxima) where positions are bucket centres in pair offsets. Short inputs are
+    returned as-is.
+    """
+    count = len(minima)
+    if count <= buckets * 2:
+        positions = np.arange(count, dtype=np.float64)
+        return positions, minima, maxima
+    per_bucket = count // buckets
+    skip = count - per_bucket * buckets
+    positions = (np.arange(buckets, dtype=np.float64) + 0.5) * per_bucket + skip
+    return (positions, np.nanmin(minima[skip:].reshape(buckets, per_bucket), axis=1),
+            np.nanmax(maxima[skip:].reshape(buckets, per_bucket), axis=1))
+
+
+def parse_batch(lines):
+    """Extract {channel: float64 array} from a batch of lines in a few bulk passes."""
+    text = "\n".join(lines)
+    channels = {}
+
+    pairs = KEY_VALUE_RE.findall(text)
+    if pairs:
+        grouped = {}
+        for key, value in pairs:
+            grouped.setdefault(key, []).append(value)
+        for key, values in grouped.items():
+            channels[key] = np.array(values, dtype=np.float64)  # NumPy parses the strings
+
+    rows = CSV_ROW_RE.findall(text)
+    if rows:
+        by_width = {}
+        for row in rows:
+            by_width.setdefault(row.count(","), []).append(row)
+        for commas, group in by_width.items():
+            table = np.array(",".join(group).split(","), dtype=np.float64).reshape(len(group), commas + 1)
+            for column in range(commas + 1):
+                name = f"c{column}"
+                if name in channels:
+                    channels[name] = np.concatenate((channels[name], table[:, column]))
+                else:
+                    channels[name] = table[:, column]
+    return channels
+
+
+class TelemetryStore:
+    """Parses submitted line batches on a worker thread into ChannelRings.
+
+    At most max_pending batches wait for the parser; beyond that the oldest are
+    discarded and counted, so a stalled parser cannot grow memory without bound.
+    Channels are keyed by (source, name), source being the port a batch came from.
+    """
+
+    def __init__(self, capacity=1000000, max_channels=16, max_pending=1024, stats=None):
+        self.capacity = capacity
+        self.max_channels = max_channels
+        self.dropped = 0  # Batches discarded because the parser fell behind
+        self.channels = {}  # (source, name) -> ChannelRing, in order of first appearance
+        self.version = 0  # Bumped after every ingest so views know when to repaint
+        self.lock = threading.Lock()
+        self._pending = deque(maxlen=max_pending)
+        self._dropped = stats.counter("telemetry.dropped") if stats is not None else None
+        self._wakeup = threading.Event()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="telemetry-parser", daemon=True)
+        self._thread.start()
+
+    def submit(self, lines, source=""):
+        """Queue one port's batch of unprefixed lines for parsing; returns immediately."""
+        if lines:
+            pending = self._pending
+            if len(pending) == pending.maxlen:
+                self.dropped += 1  # deque discards the oldest batch
+                if self._dropped is not None:
+                    self._dropped.add()
+            pending.append((source, lines))
+            self._wakeup.set()
+
+    def ingest(self, lines, source=""):
+        """Parse a batch and append it to the channel rings (runs on the worker thread)."""
+        parsed = parse_batch(lines)
+        if not parsed:
+            return
+        with self.lock:
+            for name, samples in parsed.items():
+                ring = self.channels.get((source, name))
+                if ring is None:
+                    if len(self.channels) >= self.max_channels:
+                        continue
+                    ring = self.channels[source, name] = ChannelRing(self.capacity)
+                ring.extend(samples)
+            self.version += 1
+
+    def snapshot(self, window, buckets):
+        """Return {label: (positions, minima, maxima, last)} for the newest window samples.
+
+        Only the copies are made under the lock, so the parser is not held up by the
+        decimation. Labels are "[source] name" once channels come from several sources.
+        """
+        with self.lock:
+            copies = [(key, ring.recent(window, buckets), ring.last) for key, ring in self.channels.items()]
+        prefix = len({source for (source, _), _, _ in copies}) > 1
+        result = {}
+        for (source, name), (minima, maxima, step), last in copies:
+            shift = window - len(minima) * step  # Channels with fewer samples end at the right edge
+            positions, minima, maxima = minmax_decimate(minima, maxima, buckets)
+            label = f"[{source}] {name}" if prefix else name
+            result[label] = (positions * step + shift, minima, maxima, last)
+        return result
+
+    def clear(self):
+        with self.lock:
+            self.channels.clear()
+            self.version += 1
+
+    def resize(self, capacity):
+        with self.lock:
+            self.capacity = capacity
+            self.channels.clear()
+            self.version += 1
+
+    def close(self):
+        self._running = False
+        self._wakeup.set()
+
+    def _run(self):
+        while self._running:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            while self._pending:
+                source, lines = self._pending.popleft()
+                self.ingest(lines, source)
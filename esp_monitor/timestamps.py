@@ -0,0 +1,73 @@
+"""Arrival timestamps: taken as time.monotonic_ns() integers, formatted only for display.
+
+Modes:
+    clock      wall clock, HH:MM:SS
+    clock-ms   wall clock with milliseconds
+    clock-us   wall clock with microseconds
+    delta      seconds since the previous line
+    elapsed    seconds since the formatter's origin (the first connect)
+    off        no prefix
+"""
+import time
+
+MODES = ["clock", "clock-ms", "clock-us", "delta", "elapsed", "off"]
+
+
+class TimestampFormatter:
+    """Turns monotonic stamps into "[...]" prefixes.
+
+    Monotonic stamps are mapped to wall-clock time with one offset measured at
+    construction. The clock modes cache the formatted HH:MM:SS of the last second
+    seen, so consecutive lines cost an integer division and an f-string, not a
+    strftime each.
+    """
+
+    def __init__(self, mode="clock", origin=None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown timestamp mode: {mode}")
+        self.mode = mode
+        self.origin = origin or time.monotonic_ns()
+        self._wall_offset = time.time_ns() - time.monotonic_ns()
+        self._second = None
+        self._second_text = ""
+
+    def copy(self):
+        """Independent formatter with the same settings, e.g. for a worker thread."""
+        other = TimestampFormatter(self.mode, self.origin)
+        other._wall_offset = self._wall_offset
+        return other
+
+    def _clock(self, stamp):
+        second, fraction = divmod(stamp + self._wall_offset, 1_000_000_000)
+        if second != self._second:
+            self._second = second
+            self._second_text = time.strftime("%H:%M:%S", time.localtime(second))
+        return self._second_text, fraction
+
+    def format(self, stamp, previous=None):
+        """Prefix for a line received at stamp; previous is the stamp of the line before it."""
+        mode = self.mode
+        if mode == "clock":
+            return f"[{self._clock(stamp)[0]}]"
+        if mode == "clock-ms":
+            text, fraction = self._clock(stamp)
+            return f"[{text}.{fraction // 1_000_000:03d}]"
+        if mode == "clock-us":
+            text, fraction = self._clock(stamp)
+            return f"[{text}.{fraction // 1000:06d}]"
+        if mode == "delta":
+            delta = stamp - previous if previous is not None else 0
+            return f"[{delta / 1e9:+.6f}]"
+        if mode == "elapsed":
+            return f"[{(stamp - self.origin) / 1e9:.6f}]"
+        return ""
+
+    def prefix_lines(self, lines, stamps, previous=None):
+        """Return lines with their prefixes, for export and headless output."""
+        if self.mode == "off":
+            return list(lines)
+        result = []
+        for line, stamp in zip(lines, stamps):
+            result.append(f"{self.format(stamp, previous)} {line}")
+            previous = stamp
+        return result
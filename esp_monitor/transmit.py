@@ -0,0 +1,256 @@
+"""Transmit path: a paced TX queue serviced by a background thread, and RX-driven macros.
+
+Macro scripts have one step per line; blank lines and lines starting with # are ignored:
+
+    # Check that the AT firmware answers
+    timeout 2
+    send AT
+    expect ^OK$
+    sleep 0.5
+    send AT+GMR
+    expect ^OK$
+
+"send TEXT" queues TEXT plus the transmitter's line ending, "expect REGEX" waits for a
+received line matching REGEX, "timeout SECONDS" sets the limit for the following
+expects (default 5) and "sleep SECONDS" pauses.
+
+The time from a send being written to its matching expect line is recorded as a
+round-trip time in the "tx.rtt" histogram and in one "rtt.<command>" per command.
+"""
+import re
+import threading
+import time
+from collections import deque
+
+LINE_ENDINGS = {"crlf": b"\r\n", "lf": b"\n", "cr": b"\r", "none": b""}
+DEFAULT_TIMEOUT = 5.0
+
+
+class TxItem:
+    """One queued write; sent_at is set by the TX thread as the last byte is written."""
+
+    __slots__ = ("engine", "data", "label", "queued_at", "sent_at", "error")
+
+    def __init__(self, engine, data, label):
+        self.engine = engine
+        self.data = data
+        self.label = label
+        self.queued_at = time.monotonic_ns()
+        self.sent_at = None
+        self.error = None
+
+
+class Transmitter:
+    """Writes queued data to ports on a background thread.
+
+    send() only appends to a deque, so neither the GUI nor a macro ever waits on a
+    slow or flow-controlled port. byte_delay (seconds) paces single bytes for targets
+    that lose characters at full speed; line_delay pauses after every item.
+    """
+
+    def __init__(self, line_ending="crlf", byte_delay=0.0, line_delay=0.0, stats=None, max_queue=1024):
+        self.line_ending = line_ending
+        self.byte_delay = byte_delay
+        self.line_delay = line_delay
+        self.max_queue = max_queue
+        self.queue = deque()
+        self.dropped = 0  # Items refused because the queue was full
+        self.errors = deque(maxlen=64)  # (port, exception) for the consumer to report
+        self._wake = threading.Event()
+        self._lock = threading.Lock()  # send() runs on the GUI and bridge threads; one of them starts the TX thread
+        self._running = False
+        self._thread = None
+        self._queue_time = stats.histogram("tx.queue_time", "ns") if stats is not None else None
+
+    def encode(self, text):
+        """Bytes for a line of text with the configured line ending."""
+        return text.encode("utf-8") + LINE_ENDINGS[self.line_ending]
+
+    def send_line(self, engine, text):
+        return self.send(engine, self.encode(text), text)
+
+    def send(self, engine, data, label=None):
+        """Queue data for engine's port; returns the TxItem, or None if the queue is full."""
+        if len(self.queue) >= self.max_queue:
+            self.dropped += 1
+            return None
+        item = TxItem(engine, data, label)
+        self.queue.append(item)
+        if not self._running:
+            with self._lock:
+                if not self._running:
+                    self._running = True
+                    self._thread = threading.Thread(target=self._run, name="transmitter", daemon=True)
+                    self._thread.start()
+        self._wake.set()
+        return item
+
+    def clear(self):
+        """Drop everything not written yet."""
+        self.queue.clear()
+
+    def close(self):
+        with self._lock:
+            self._running = False
+            self._wake.set()
+            if self._thread:
+                self._thread.join()
+                self._thread = None
+
+    def _run(self):
+        queue = self.queue
+        while self._running:
+            self._wake.clear()
+            if not queue:
+                self._wake.wait(0.5)
+                continue
+            item = queue.popleft()
+            try:
+                self._write(item)
+            except Exception as e:
+                item.error = e
+                self.errors.append((item.engine.port, e))
+            if self.line_delay:
+                time.sleep(self.line_delay)
+
+    def _write(self, item):
+        engine = item.engine
+        data = item.data
+        if self.byte_delay:
+            for index in range(len(data) - 1):
+                engine.write(data[index:index + 1])
+                time.sleep(self.byte_delay)
+            data = data[-1:]
+        # Stamped before the final write so that no response can be stamped earlier
+        item.sent_at = time.monotonic_ns()
+        engine.write(data)
+        if self._queue_time is not None:
+            self._queue_time.record(item.sent_at - item.queued_at)
+
+
+class Macro:
+    """A parsed macro script: a list of (kind, argument) steps."""
+
+    def __init__(self, steps, name="macro"):
+        self.steps = steps
+        self.name = name
+
+    @classmethod
+    def parse(cls, text, name="macro"):
+        """Parse a script; raises ValueError naming the offending line."""
+        steps = []
+        for number, raw in enumerate(text.splitlines(), 1):
+            line = raw.strip()
+            if not line or line.startswith("#"):
+                continue
+            kind, _, argument = line.partition(" ")
+            kind = kind.lower()
+            try:
+                if kind == "send":
+                    steps.append(("send", raw.lstrip()[5:]))  # Keep the text's own spacing
+                elif kind == "expect":
+                    steps.append(("expect", re.compile(argument.strip())))
+                elif kind in ("timeout", "sleep"):
+                    steps.append((kind, float(argument)))
+                else:
+                    raise ValueError(f"unknown step '{kind}'")
+            except (re.error, ValueError) as e:
+                raise ValueError(f"{name}, line {number}: {e}") from None
+        return cls(steps, name)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as file:
+            return cls.parse(file.read(), path)
+
+
+class MacroRunner:
+    """Steps through a Macro on the thread that drains received lines.
+
+    poll() is called regularly (GUI flush timer, headless loop) with the lines received
+    since the last call and their arrival stamps. Sends go to the Transmitter's queue
+    and expects are matched against the fed lines, so nothing blocks. Round-trip times
+    run from the TX thread's write stamp to the reader's arrival stamp of the matching
+    line, so they do not depend on how often poll() is called.
+    """
+
+    def __init__(self, macro, transmitter, engine, stats=None):
+        self.macro = macro
+        self.transmitter = transmitter
+        self.engine = engine
+        self.stats = stats
+        self.timeout = DEFAULT_TIMEOUT
+        self.step = 0
+        self.done = not macro.steps
+        self.error = None  # Message of the step that failed, if any
+        self.results = []  # (command, round-trip ns)
+        self._last_sent = None  # TxItem of the latest send
+        self._deadline = None  # End of the current expect or sleep
+
+    def stop(self):
+        self.done = True
+        self.error = self.error or "stopped"
+
+    def poll(self, lines=(), stamps=()):
+        """Run every step that can complete now; returns the messages to show."""
+        messages = []
+        received = list(zip(lines, stamps))
+        steps = self.macro.steps
+        while not self.done:
+            kind, argument = steps[self.step]
+            now = time.monotonic()
+            if kind == "send":
+                self._last_sent = self.transmitter.send_line(self.engine, argument)
+                if self._last_sent is None:
+                    self._fail("TX queue is full", messages)
+                    break
+            elif kind == "timeout":
+                self.timeout = argument
+            elif kind == "sleep":
+                if self._deadline is None:
+                    self._deadline = now + argument
+                if now < self._deadline:
+                    break
+                self._deadline = None
+            elif kind == "expect":
+                if self._deadline is None:
+                    self._deadline = now + self.timeout
+                match = None
+                # Only lines received after the command went out can answer it
+                after = self._last_sent.sent_at if self._last_sent else 0
+                if after is None:
+                    received = []  # Still queued, so nothing received so far is a response
+                for index, (line, stamp) in enumerate(received):
+                    if stamp >= after and argument.search(line):
+                        match = stamp
+                        received = received[index + 1:]
+                        break
+                else:
+                    received = []
+                if match is None:
+                    if now >= self._deadline:
+                        self._fail(f"timed out waiting for '{argument.pattern}'", messages)
+                    break
+                self._deadline = None
+                self._record(match, messages)
+            self.step += 1
+            if self.step >= len(steps):
+                self.done = True
+                messages.append(f"{self.macro.name}: done")
+        return messages
+
+    def _record(self, stamp, messages):
+        sent = self._last_sent
+        if sent is None:
+            return
+        rtt = stamp - sent.sent_at
+        self.results.append((sent.label, rtt))
+        if self.stats is not None:
+            self.stats.histogram("tx.rtt", "ns").record(rtt)
+            self.stats.histogram(f"rtt.{sent.label.strip()[:32]}", "ns").record(rtt)
+        messages.append(f"{self.macro.name}: {sent.label.strip()} -> {rtt / 1e6:.2f} ms")
+
+    def _fail(self, reason, messages):
+        self.done = True
+        self.error = reason
+        messages.append(f"{self.macro.name}: step {self.step + 1} failed, {reason}")
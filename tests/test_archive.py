@@ -0,0 +1,175 @@
+import os
+import random
+import sqlite3
+import time
+
+import pytest
+
+from esp_monitor import archive as archive_module
+from esp_monitor.archive import Archive, fts_query
+
+WORDS = ["wifi", "disconnect", "reason", "heap", "boot", "sta", "ip", "got", "error"]
+
+
+class QuickLockArchive(Archive):
+    """Gives up on a locked database after 50 ms instead of 10 s."""
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=0.05)
+        db.execute("PRAGMA journal_mode=WAL")
+        return db
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = Archive(str(tmp_path / "data" / "sessions.db"), flush_interval=0.01, on_message=pytest.fail)
+    archive.start()
+    yield archive
+    archive.stop()
+
+
+def stamps(count):
+    now = time.monotonic_ns()
+    return [now + i for i in range(count)]
+
+
+def test_sessions_and_lines_round_trip(archive):
+    rng = random.Random(1)
+    model = {}  # session -> lines
+    handles = [archive.open_session(f"COM{i}", 115200) for i in range(3)]
+    for _ in range(100):
+        session = rng.choice(handles)
+        lines = [" ".join(rng.choice(WORDS) for _ in range(4)) for _ in range(rng.randrange(1, 50))]
+        archive.add(session, lines, stamps(len(lines)))
+        model.setdefault(session, []).extend(lines)
+    archive.end_session(handles[0])
+    archive.stop()
+    assert [row[0] for row in archive.sessions()] == [h.id for h in reversed(handles)]
+    for session, lines in model.items():
+        row = archive.session(session.id)
+        assert row[1] == session.port and row[5] == len(lines) == session.count
+        assert [text for _, _, text in archive.lines(session.id, 0, 10 ** 6)] == lines
+        assert [seq for seq, _, _ in archive.lines(session.id, 5, 10)] == list(range(5, min(15, len(lines))))
+    assert archive.session(handles[0].id)[4] is not None
+    assert archive.session(handles[1].id)[4] is None
+
+
+def test_search_matches_a_scan(archive):
+    rng = random.Random(2)
+    session = archive.open_session("COM1")
+    lines = [" ".join(rng.choice(WORDS) for _ in range(3)) for _ in range(500)]
+    archive.add(session, lines, stamps(len(lines)))
+    archive.stop()
+    for query in ["wifi", "wifi disconnect", "hea*", "got ip error", "nothing"]:
+        words = [word.rstrip("*") for word in query.split()]
+        expected = [seq for seq, line in enumerate(lines)
+                    if all(any(token.startswith(word) if query.endswith("*") else token == word
+                               for token in line.split()) for word in words)]
+        found = archive.search(query, limit=1000)
+        assert [seq for _, seq, _, _ in found] == expected[::-1]  # Newest first
+
+
+def test_fts_query_quotes_words():
+    assert fts_query('wifi "dis* x*') == '"wifi" """dis"* "x"*'
+    assert fts_query(" * ") == ""
+
+
+def test_banner_is_collected(archive):
+    session = archive.open_session("COM1")
+    lines = ["ESP-ROM:esp32s3-20210327", "noise", "\x1b[0;32mI (10) app_init: App version: 1.2\x1b[0m"]
+    archive.add(session, lines, stamps(3))
+    archive.stop()
+    assert archive.session(session.id)[6] == "ESP-ROM:esp32s3-20210327\nI (10) app_init: App version: 1.2"
+
+
+def test_locked_database_is_retried_without_losing_lines(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    messages = []
+    archive = QuickLockArchive(path, flush_interval=0.01, on_message=messages.append)
+    archive.start()
+    session = archive.open_session("COM1")
+    blocker = sqlite3.connect(path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    archive.add(session, ["one", "two"], stamps(2))
+    time.sleep(0.1)  # At least one failed flush, fewer than WRITE_ATTEMPTS
+    assert session.id is None and session.count == 0  # Nothing committed yet
+    blocker.execute("COMMIT")
+    blocker.close()
+    archive.add(session, ["three"], stamps(1))
+    archive.stop()
+    assert not messages
+    assert [text for _, _, text in archive.lines(session.id)] == ["one", "two", "three"]
+    assert session.count == 3
+
+
+def test_writer_that_gives_up_can_be_restarted(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    messages = []
+    archive = QuickLockArchive(path, flush_interval=0.01, on_message=messages.append)
+    archive.start()
+    session = archive.open_session("COM1")
+    blocker = sqlite3.connect(path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    archive.add(session, ["kept"], stamps(1))
+    deadline = time.monotonic() + 10
+    while archive.running and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not archive.running
+    assert messages and "locked" in messages[0]
+    blocker.execute("COMMIT")
+    blocker.close()
+    assert archive.revive() is False  # Not before RESTART_INTERVAL
+    archive._gave_up -= archive_module.RESTART_INTERVAL
+    assert archive.revive() is True and archive.running
+    archive.stop()
+    assert [text for _, _, text in archive.lines(session.id)] == ["kept"]
+    assert archive.revive() is False  # Stopped on purpose: stays stopped
+
+
+def test_full_queue_drops_and_counts(tmp_path):
+    archive = Archive(str(tmp_path / "sessions.db"), max_pending=5)
+    session = archive.open_session("COM1")  # Not started: nothing is written yet
+    for count in (3, 3, 2, 1):  # The bound is in lines, not batches
+        archive.add(session, ["x"] * count, stamps(count))
+    assert archive.dropped == 4
+    archive.start()
+    archive.stop()
+    assert session.count == 5
+    archive.add(session, ["x"] * 5, stamps(5))  # Committed lines no longer count
+    assert archive.dropped == 4
+
+
+def test_search_without_fts_matches_wildcards_literally(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    archive = Archive(path, flush_interval=0.01, on_message=pytest.fail)
+    archive.start()
+    session = archive.open_session("COM1")
+    lines = ["heap 50% free", "heap 50 free", "task_wdt reset", "taskXwdt", "path c:\\esp"]
+    archive.add(session, lines, stamps(len(lines)))
+    archive.stop()
+    db = sqlite3.connect(path)
+    db.execute("DROP TABLE lines_fts")
+    db.commit()
+    db.close()
+    archive = Archive(path)
+    assert [row[3] for row in archive.search("50%")] == ["heap 50% free"]
+    assert [row[3] for row in archive.search("task_wdt")] == ["task_wdt reset"]
+    assert [row[3] for row in archive.search("c:\\esp")] == ["path c:\\esp"]
+    assert not archive.fts
+    archive.stop()
+
+
+@pytest.mark.parametrize("platform, environ, expected", [
+    ("win32", {"LOCALAPPDATA": "C:\\Users\\me\\AppData\\Local"}, ["C:\\Users\\me\\AppData\\Local"]),
+    ("win32", {}, ["~", "AppData", "Local"]),
+    ("darwin", {}, ["~", "Library", "Application Support"]),
+    ("linux", {}, ["~", ".local", "share"]),
+    ("linux", {"XDG_DATA_HOME": "/data"}, ["/data"]),
+])
+def test_data_dir_follows_the_platform(monkeypatch, platform, environ, expected):
+    monkeypatch.setattr(archive_module.sys, "platform", platform)
+    for name in ("LOCALAPPDATA", "XDG_DATA_HOME"):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in environ.items():
+        monkeypatch.setenv(name, value)
+    assert archive_module._data_dir() == os.path.join(*map(os.path.expanduser, expected), "esp_monitor")
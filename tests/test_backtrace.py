@@ -0,0 +1,140 @@
+import random
+import shutil
+import subprocess
+
+import pytest
+
+from esp_monitor import backtrace
+from esp_monitor.backtrace import MAX_BLOCK_LINES, BacktraceDecoder, SymbolIndex
+
+SOURCE = """
+int helper(int x) { return x * 3; }
+int app_main(int x) { return helper(x) + 1; }
+int main(void) { return app_main(2); }
+"""
+
+
+def make_index(functions):
+    """SymbolIndex from [(start, size, name)] without an ELF file."""
+    index = SymbolIndex()
+    for start, size, name in sorted(functions):
+        index.starts.append(start)
+        index.sizes.append(size)
+        index.names.append(name)
+    return index
+
+
+def naive_function(functions, address):
+    functions = sorted(functions)
+    for i, (start, size, name) in enumerate(functions):
+        if size:
+            end = start + size
+        else:
+            end = functions[i + 1][0] if i + 1 < len(functions) else start + 1
+        if start <= address < end:
+            return name, address - start
+    return None
+
+
+def test_function_lookup_matches_a_scan():
+    rng = random.Random(1)
+    for _ in range(20):
+        functions = []
+        address = 0x40080000
+        for number in range(rng.randrange(1, 60)):
+            address += rng.randrange(0, 64) * 4  # Gaps between functions
+            size = rng.choice([0, 4, 16, 100])
+            functions.append((address, size, f"f{number}"))
+            address += max(size, 4)
+        index = make_index(functions)
+        for _ in range(200):
+            probe = rng.randrange(0x40080000 - 16, address + 64)
+            assert index.function(probe) == naive_function(functions, probe)
+
+
+def test_size_zero_symbol_extends_to_the_next_one():
+    index = make_index([(0x100, 0, "vector"), (0x180, 0x20, "isr")])
+    assert index.function(0x17F) == ("vector", 0x7F)
+    assert index.function(0x1A0) is None
+
+
+def test_decoder_inserts_one_line_per_resolved_address():
+    index = make_index([(0x400D1000, 0x100, "app_main"), (0x400D2000, 0x100, "main_task")])
+    index.sha256 = "ab" * 32
+    decoder = BacktraceDecoder(index)
+    lines = ["I (10) boot: hello", "Backtrace: 0x400d1010:0x3ffb1230 0x400d2004:0x3ffb1250 0x400d1010:0x3ffb1260",
+             "", "Rebooting...", "I (20) after: 0x400d1010"]
+    out_lines, out_stamps = decoder.process(lines, list(range(5)))
+    assert out_lines == [
+        "I (10) boot: hello",
+        lines[1],
+        "--- 0x400d1010: app_main+0x10",
+        "--- 0x400d2004: main_task+0x4",
+        "",
+        "Rebooting...",
+        "I (20) after: 0x400d1010",  # Outside a panic dump
+    ]
+    assert out_stamps == [0, 1, 1, 1, 2, 3, 4]
+
+
+def test_decoder_leaves_quiet_batches_alone():
+    decoder = BacktraceDecoder(make_index([(0x400D1000, 0x100, "app_main")]))
+    lines = ["0x400d1010 is not in a panic dump"]
+    stamps = [1]
+    assert decoder.process(lines, stamps) == (lines, stamps)
+
+
+def test_decoder_closes_a_dump_after_max_block_lines():
+    decoder = BacktraceDecoder(make_index([(0x400D1000, 0x100, "app_main")]))
+    lines = ["Guru Meditation Error: Core 0 panic'ed"] + ["PC: 0x400d1010"] * (MAX_BLOCK_LINES + 5)
+    out_lines, _ = decoder.process(lines, [0] * len(lines))
+    assert sum(line.startswith("--- ") for line in out_lines) == MAX_BLOCK_LINES - 1
+
+
+def test_decoder_warns_about_a_different_elf():
+    index = make_index([])
+    index.sha256 = "12345678" + "0" * 56
+    decoder = BacktraceDecoder(index)
+    assert decoder.decode_line("ELF file SHA256: 12345678") == []
+    assert decoder.decode_line("ELF file SHA256: deadbeef")[0].startswith("--- Warning")
+
+
+@pytest.fixture(scope="module")
+def elf_path(tmp_path_factory):
+    if shutil.which("gcc") is None:
+        pytest.skip("gcc is needed to build a test ELF")
+    directory = tmp_path_factory.mktemp("elf")
+    (directory / "fw.c").write_text(SOURCE)
+    path = directory / "fw.elf"
+    subprocess.run(["gcc", "-g", "-O0", "-o", str(path), str(directory / "fw.c")], check=True)
+    return str(path)
+
+
+def test_index_from_elf_and_from_cache(elf_path, tmp_path):
+    parsed = SymbolIndex.load(elf_path, cache_dir=str(tmp_path))
+    assert not parsed.cached
+    assert {"helper", "app_main", "main"} <= set(parsed.names)
+    cached = SymbolIndex.load(elf_path, cache_dir=str(tmp_path))
+    assert cached.cached == parsed.has_lines  # An index without lines is parsed again once pyelftools is there
+    for name in ("starts", "sizes", "names", "line_addresses", "line_files", "line_numbers", "files", "sha256"):
+        assert getattr(cached, name) == getattr(parsed, name)
+    start = parsed.starts[parsed.names.index("app_main")]
+    description = cached.describe(start + 4)
+    assert description.startswith("app_main")
+    if backtrace.ELFFile is not None:
+        assert "fw.c:" in description
+
+
+def test_damaged_cache_is_rebuilt(elf_path, tmp_path):
+    index = SymbolIndex.load(elf_path, cache_dir=str(tmp_path))
+    cache = tmp_path / (index.sha256 + ".idx")
+    cache.write_bytes(b"{not json")
+    again = SymbolIndex.load(elf_path, cache_dir=str(tmp_path))
+    assert not again.cached and again.names == index.names
+
+
+def test_not_an_elf_file(tmp_path):
+    path = tmp_path / "fw.bin"
+    path.write_bytes(b"\xe9" + bytes(100))
+    with pytest.raises(ValueError):
+        SymbolIndex.load(str(path), cache_dir=None)
@@ -0,0 +1,162 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from esp_monitor.bridge import Bridge
+
+
+class Reader:
+    """A client that reads everything the bridge sends until it disconnects."""
+
+    def __init__(self, address, read=True):
+        self.sock = socket.create_connection(address)
+        self.data = bytearray()
+        self.thread = threading.Thread(target=self._run, daemon=True) if read else None
+        if self.thread:
+            self.thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                chunk = self.sock.recv(65536)
+            except OSError:
+                break
+            if not chunk:
+                break
+            self.data += chunk
+
+    def close(self):
+        if self.thread:
+            self.thread.join(5)
+        self.sock.close()
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.fixture
+def messages():
+    return []
+
+
+def start_bridge(messages, **options):
+    bridge = Bridge(on_message=messages.append, **options)
+    bridge.start()
+    return bridge
+
+
+@pytest.mark.parametrize("policy", ["drop", "disconnect"])
+def test_reading_client_gets_every_byte_of_a_burst(messages, policy):
+    bridge = start_bridge(messages, policy=policy, max_buffer=64 * 1024)
+    client = Reader(bridge.address)
+    assert wait_for(lambda: bridge.clients)
+    sent = b"".join(bytes([i]) * 4096 for i in range(100))
+    for i in range(100):
+        bridge.write(sent[i * 4096:(i + 1) * 4096])
+    assert wait_for(lambda: len(client.data) == len(sent))
+    bridge.stop()
+    client.close()
+    assert bytes(client.data) == sent
+    assert not any("too slow" in message or "dropped" in message for message in messages)
+
+
+def test_stalled_client_is_disconnected(messages):
+    bridge = start_bridge(messages, policy="disconnect", max_buffer=16 * 1024)
+    stalled = Reader(bridge.address, read=False)
+    assert wait_for(lambda: bridge.clients)
+    for _ in range(2000):  # More than the socket buffers hold
+        bridge.write(b"x" * 4096)
+    assert wait_for(lambda: not bridge.clients)
+    assert any("too slow" in message for message in messages)
+    bridge.stop()
+    stalled.close()
+
+
+def test_stalled_client_loses_oldest_data_but_stays(messages):
+    bridge = start_bridge(messages, policy="drop", max_buffer=16 * 1024)
+    stalled = Reader(bridge.address, read=False)
+    assert wait_for(lambda: bridge.clients)
+    for _ in range(2000):
+        bridge.write(b"x" * 4096)
+    assert wait_for(lambda: not bridge._inbox)
+    time.sleep(0.05)
+    client = next(iter(bridge.clients.values()))
+    assert client.dropped > 0 and client.size <= 16 * 1024 + 4096
+    bridge.stop()
+    stalled.close()
+
+
+def test_lines_mode_sends_only_whole_lines(messages):
+    bridge = start_bridge(messages, mode="lines")
+    client = Reader(bridge.address)
+    assert wait_for(lambda: bridge.clients)
+    bridge.write(b"one\ntw")
+    assert wait_for(lambda: client.data == b"one\n")
+    bridge.write(b"o\nthree")
+    assert wait_for(lambda: client.data == b"one\ntwo\n")
+    bridge.stop()
+    client.close()
+
+
+def test_lines_mode_drops_whole_lines_for_a_stalled_client(messages):
+    bridge = start_bridge(messages, mode="lines", policy="drop", max_buffer=16 * 1024)
+    client = Reader(bridge.address, read=False)
+    assert wait_for(lambda: bridge.clients)
+    stream = b"".join(b"line %06d\n" % i for i in range(1000000))  # More than the socket buffers hold
+    for start in range(0, len(stream), 40000):  # Chunks end in the middle of lines
+        bridge.write(stream[start:start + 40000])
+    assert wait_for(lambda: not bridge._inbox)
+    client.thread = threading.Thread(target=client._run, daemon=True)
+    client.thread.start()
+    time.sleep(0.2)
+    bridge.stop()
+    client.close()
+    lines = bytes(client.data).split(b"\n")
+    assert lines.pop() == b""
+    assert 0 < len(lines) < 1000000
+    assert all(line.startswith(b"line ") and len(line) == 11 for line in lines)
+    assert lines == sorted(lines)
+
+
+def test_full_inbox_drops_oldest_chunks(messages):
+    bridge = Bridge(on_message=messages.append)  # Not started: nothing drains the inbox
+    for i in range(bridge._inbox.maxlen + 3):
+        bridge.write(b"x")
+    assert bridge.inbox_dropped == 3
+    bridge.stop()
+
+
+def test_client_data_goes_to_the_transmitter(messages):
+    sent = []
+
+    class Transmitter:
+        def send(self, engine, data):
+            sent.append((engine, data))
+
+    class Engine:
+        bridge = None
+
+    engine = Engine()
+    bridge = start_bridge(messages, transmitter=Transmitter())
+    bridge.attach(engine)
+    assert engine.bridge is bridge
+    client = socket.create_connection(bridge.address)
+    client.sendall(b"AT\r\n")
+    assert wait_for(lambda: sent)
+    assert sent == [(engine, b"AT\r\n")]
+    bridge.stop()
+    client.close()
+    assert engine.bridge is None
+
+
+def test_bad_options():
+    with pytest.raises(ValueError):
+        Bridge(mode="frames")
+    with pytest.raises(ValueError):
+        Bridge(policy="block")
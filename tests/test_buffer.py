@@ -0,0 +1,61 @@
+import random
+
+from esp_monitor.buffer import LineBuffer
+
+WORDS = ["wifi", "boot", "error", "ok", "heap", "rssi=-40", "E (12)", "I (99)"]
+
+
+def random_lines(rng, count, start):
+    return [f"{start + i} {rng.choice(WORDS)} {rng.choice(WORDS)}" for i in range(count)]
+
+
+def append(buffer, lines, stamps=None):
+    """What the front ends do: make room, then extend."""
+    overflow = len(buffer) + len(lines) - buffer.capacity
+    if overflow > 0:
+        buffer.drop_front(overflow)
+    buffer.extend(lines, stamps)
+    return max(overflow, 0)
+
+
+def test_line_buffer_matches_a_list():
+    rng = random.Random(1)
+    buffer = LineBuffer(50)
+    model = []  # (seq, line, stamp)
+    total = 0
+    for _ in range(300):
+        if rng.random() < 0.05:
+            capacity = rng.randrange(1, 80)
+            buffer.resize(capacity)
+            model = model[-capacity:]
+            continue
+        count = rng.randrange(0, buffer.capacity + 1)
+        lines = random_lines(rng, count, total)
+        stamps = [rng.randrange(1 << 40) for _ in lines]
+        append(buffer, lines, stamps)
+        model += [(total + i, line, stamp) for i, (line, stamp) in enumerate(zip(lines, stamps))]
+        model = model[-buffer.capacity:]
+        total += count
+        assert buffer.total == total
+        assert len(buffer) == len(model)
+        assert list(buffer) == [line for _, line, _ in model]
+        assert list(buffer.stamps()) == [stamp for _, _, stamp in model]
+        if model:
+            assert buffer.first_seq == model[0][0]
+            seq, line, stamp = rng.choice(model)
+            assert buffer.get(seq) == line
+            assert buffer.stamp(seq) == stamp
+            assert buffer.lines_from(seq) == [line for s, line, _ in model if s >= seq]
+
+
+def test_line_buffer_resize_keeps_newest_lines_and_numbering():
+    buffer = LineBuffer(10)
+    append(buffer, [str(i) for i in range(10)], list(range(10)))
+    buffer.resize(4)
+    assert list(buffer) == ["6", "7", "8", "9"]
+    assert buffer.first_seq == 6
+    assert list(buffer.stamps()) == [6, 7, 8, 9]
+    buffer.resize(8)
+    append(buffer, ["10", "11"])
+    assert list(buffer) == ["6", "7", "8", "9", "10", "11"]
+    assert buffer.get(11) == "11"
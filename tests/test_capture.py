@@ -0,0 +1,49 @@
+import glob
+import gzip
+import random
+import time
+
+import pytest
+
+from esp_monitor.capture import CaptureWriter
+
+
+def record(directory, chunks, pause=0, **options):
+    writer = CaptureWriter(str(directory), prefix="dev", flush_interval=0.01, on_message=pytest.fail, **options)
+    writer.start()
+    start = time.monotonic_ns()
+    for i, chunk in enumerate(chunks):
+        writer.write(chunk, start + i * 1_000_000)  # 1 ms apart
+        if pause and i % 20 == 19:
+            time.sleep(pause)  # Segments rotate between flushes
+    writer.stop()
+    return writer
+
+
+def random_chunks(rng, count=300):
+    return [bytes(rng.randrange(256) for _ in range(rng.randrange(1, 300))) for _ in range(count)]
+
+
+def test_segment_holds_the_captured_bytes(tmp_path):
+    chunks = random_chunks(random.Random(1))
+    writer = record(tmp_path, chunks)
+    segments = glob.glob(str(tmp_path / "dev_*.log"))
+    assert len(segments) == 1
+    assert writer.bytes_written == sum(map(len, chunks)) and writer.dropped == 0
+    with open(segments[0], "rb") as file:
+        assert file.read() == b"".join(chunks)
+
+
+def test_rotated_and_compressed_segments(tmp_path):
+    chunks = random_chunks(random.Random(2))
+    record(tmp_path, chunks, pause=0.03, max_bytes=8 * 1024, compression="gzip")
+    deadline = time.monotonic() + 10
+    while glob.glob(str(tmp_path / "dev_*.log")) and time.monotonic() < deadline:
+        time.sleep(0.01)  # Segments are compressed on their own threads
+    segments = sorted(glob.glob(str(tmp_path / "dev_*.log.gz")))
+    assert len(segments) > 1
+    data = b""
+    for segment in segments:
+        with gzip.open(segment, "rb") as file:
+            data += file.read()
+    assert data == b"".join(chunks)
@@ -0,0 +1,54 @@
+import pytest
+
+from esp_monitor.cli import compile_filter, main, parse_address
+
+
+def test_compile_filter():
+    keep = compile_filter(["wifi", "heap"], ["debug"])
+    assert [line for line in ["wifi up", "heap 100", "wifi debug", "boot"] if keep(line)] == ["wifi up", "heap 100"]
+    assert compile_filter([], [])("anything")
+
+
+def test_parse_address():
+    assert parse_address("5555") == ("127.0.0.1", 5555)
+    assert parse_address("0.0.0.0:80") == ("0.0.0.0", 80)
+    with pytest.raises(ValueError):
+        parse_address("host:port")
+
+
+@pytest.mark.parametrize("options", [
+    ["--include", "("],
+    ["--encoding", "no-such-codec"],
+    ["--level", "Q"],
+    ["--serve", "x:y"],
+    ["--decoder", "no_such_module:decode"],
+    ["--output", "/nonexistent/out.log"],
+    ["--idf-csv", "/nonexistent/records.csv"],
+])
+def test_bad_options_are_rejected_before_opening_ports(options, capsys):
+    with pytest.raises(SystemExit) as exit:
+        main(["--headless", "--port", "/nonexistent/port"] + options)
+    assert exit.value.code == 2
+    assert "Connected" not in capsys.readouterr().err
+
+
+def test_headless_replay_writes_filtered_lines(tmp_path, capsys):
+    capture = tmp_path / "dev.log"
+    capture.write_bytes(b"boot\r\nI (10) wifi: up\r\nD (11) heap: 100\r\nI (12) wifi: down\r\npartial")
+    output = tmp_path / "out.log"
+    status = main(["--headless", "--replay", str(capture), "--speed", "0", "--no-timestamps", "--output", str(output),
+                   "--include", "wifi", "--poll-interval", "0.01"])
+    assert status == 0
+    assert output.read_text().splitlines() == ["I (10) wifi: up", "I (12) wifi: down"]
+    assert "Ready in" in capsys.readouterr().err
+
+
+def test_headless_replay_writes_idf_records(tmp_path):
+    capture = tmp_path / "dev.log"
+    capture.write_bytes(b"boot\r\nI (10) wifi: up\r\nE (11) heap: low\r\n")
+    records = tmp_path / "records.csv"
+    status = main(["--headless", "--replay", str(capture), "--speed", "0", "--output", str(tmp_path / "out.log"),
+                   "--idf-csv", str(records), "--level", "E", "--poll-interval", "0.01"])
+    assert status == 0
+    rows = records.read_text().splitlines()
+    assert len(rows) == 2 and rows[1].endswith(",11,E,heap,low")
@@ -0,0 +1,82 @@
+from esp_monitor.engine import SerialEngine
+from esp_monitor.framing import LengthPrefixedFramer
+from esp_monitor.stats import PipelineStats
+
+
+def frame(payload):
+    return len(payload).to_bytes(2, "little") + payload
+
+
+def test_binary_frames_are_formatted_by_default():
+    engine = SerialEngine("COM1", 115200, framer=LengthPrefixedFramer())
+    engine.feed(frame(b"hello") + frame(b"\x00\xff"))
+    lines, stamps, chunks = engine.drain_lines()
+    assert lines == ["hello", "<2 bytes> 00 ff"]
+    assert chunks == 1
+
+
+def test_failing_decoder_falls_back_per_frame():
+    def decoder(frame):
+        if frame.startswith(b"!"):
+            raise ValueError("bad frame")
+        return frame.decode().upper()
+
+    stats = PipelineStats()
+    engine = SerialEngine("COM1", 115200, framer=LengthPrefixedFramer(), decoder=decoder, stats=stats)
+    engine.feed(frame(b"one") + frame(b"!two") + frame(b"three"))
+    lines, _, _ = engine.drain_lines()
+    assert lines == ["ONE", "!two", "THREE"]
+    assert stats.counter("decode.errors").value == 1
+
+
+def test_lines_carry_the_stamp_of_the_chunk_that_completed_them():
+    engine = SerialEngine("COM1", 115200)
+    engine.feed(b"one\ntw", 10)
+    engine.feed(b"o\r\n\r\n  \n", 20)
+    engine.feed(b"three", 30)
+    assert engine.drain_lines() == (["one", "two"], [10, 20], 3)
+    assert engine.drain_lines() == ([], [], 0)
+    engine.feed(b"\n", 40)
+    assert engine.drain_lines() == (["three"], [40], 1)
+
+
+def test_full_queue_drops_the_oldest_chunks():
+    stats = PipelineStats()
+    engine = SerialEngine("/dev/ttyUSB0", 115200, queue_size=2, stats=stats)
+    for i in range(5):
+        engine.feed(b"%d\n" % i, i + 1)
+    assert engine.dropped == 3
+    assert stats.counter("queue.ttyUSB0.dropped").value == 3
+    assert engine.drain_lines() == (["3", "4"], [4, 5], 2)
+
+
+def test_chunks_go_to_capture_and_bridge_as_they_arrive():
+    class Sink:
+        def __init__(self):
+            self.chunks = []
+
+        def write(self, data, stamp=None):
+            self.chunks.append(data)
+
+    engine = SerialEngine("COM1", 115200)
+    engine.capture = Sink()
+    engine.bridge = Sink()
+    engine.feed(b"ab", 1)
+    engine.feed(b"c\n", 2)
+    assert engine.capture.chunks == engine.bridge.chunks == [b"ab", b"c\n"]
+    assert engine.drain_lines()[0] == ["abc"]
+
+
+def test_write_counts_transmitted_bytes():
+    class Port:
+        written = b""
+
+        def write(self, data):
+            self.written += data
+
+    stats = PipelineStats()
+    engine = SerialEngine("COM1", 115200, stats=stats)
+    engine.serial_port = Port()
+    engine.write(b"AT\r\n")
+    assert engine.serial_port.written == b"AT\r\n"
+    assert stats.counter("tx.bytes").value == 4
@@ -0,0 +1,74 @@
+import random
+import re
+
+from esp_monitor.buffer import LineBuffer
+from esp_monitor.filters import FilterEngine, PatternIndex
+from tests.test_buffer import append, random_lines
+
+
+def test_pattern_index_navigation():
+    index = PatternIndex("b")
+    index.scan(["a", "b", "c", "b", "b"], 10)
+    assert list(index) == [11, 13, 14]
+    assert index.next_after(11) == 13
+    assert index.previous_before(13) == 11
+    assert index.previous_before(11) is None
+    assert index.rank(14) == 2
+    index.trim(12)
+    assert list(index) == [13, 14]
+    assert 11 not in index and 13 in index
+    assert index.next_after(20) is None
+
+
+def test_filter_engine_matches_rescanning_the_buffer():
+    rng = random.Random(2)
+    buffer = LineBuffer(200)
+    engine = FilterEngine(buffer)
+    patterns = ["wifi", "error|heap", r"E \(", "^1", ""]
+    include = exclude = ""
+    for step in range(200):
+        if step % 20 == 0:
+            include, exclude = rng.choice(patterns), rng.choice(patterns)
+            engine.set_filter(include, exclude)
+            engine.set_search(rng.choice(patterns))
+        lines = random_lines(rng, rng.randrange(1, 60), buffer.total)
+        first = buffer.total
+        evicted = append(buffer, lines)
+        if evicted:
+            engine.on_evict(buffer.first_seq)
+        added = engine.on_append(lines, first)
+        if added is not None:
+            engine.commit(added)
+        held = list(zip(range(buffer.first_seq, buffer.total), buffer))
+        expected = [seq for seq, line in held
+                    if (not include or re.search(include, line)) and not (exclude and re.search(exclude, line))]
+        if engine.visible is None:
+            assert not include and not exclude
+        else:
+            assert list(engine.visible) == expected
+        if engine.search is not None:
+            assert list(engine.search) == [seq for seq, line in held if re.search(engine.search.pattern, line)]
+
+
+def test_filter_engine_backfills_a_cached_pattern():
+    buffer = LineBuffer(100)
+    engine = FilterEngine(buffer)
+    append(buffer, ["wifi up", "boot"])
+    engine.set_filter("wifi", "")
+    engine.set_filter("", "")
+    append(buffer, ["wifi down", "ok"])  # Not indexed: no filter uses "wifi" now
+    engine.on_append(["wifi down", "ok"], 2)
+    engine.set_filter("wifi", "")
+    assert list(engine.visible) == [0, 2]
+
+
+def test_highlights():
+    buffer = LineBuffer(10)
+    engine = FilterEngine(buffer)
+    append(buffer, ["E (1) x: bad", "I (2) x: good"])
+    engine.add_highlight(r"^E ", "red")
+    engine.add_highlight("x", "blue")
+    assert engine.highlight_for(0) == "red"
+    assert engine.highlight_for(1) == "blue"
+    engine.clear_highlights()
+    assert engine.highlight_for(0) is None
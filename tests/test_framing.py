@@ -0,0 +1,136 @@
+import random
+
+import pytest
+
+from esp_monitor.framing import CobsFramer, LengthPrefixedFramer, LineFramer, SlipFramer, load_decoder, make_framer
+
+
+def cobs_encode(payload):
+    out = bytearray()
+    block = bytearray()
+    for byte in payload:
+        if byte:
+            block.append(byte)
+            if len(block) == 254:
+                out += bytes([255]) + block
+                block = bytearray()
+        else:
+            out += bytes([len(block) + 1]) + block
+            block = bytearray()
+    out += bytes([len(block) + 1]) + block
+    return bytes(out)
+
+
+def slip_encode(payload):
+    return payload.replace(b"\xdb", b"\xdb\xdd").replace(b"\xc0", b"\xdb\xdc")
+
+
+def random_payload(rng, zeros=True):
+    size = rng.choice([0, 1, 2, 253, 254, 255, 600, rng.randrange(1, 100)])
+    alphabet = [0, 0xC0, 0xDB, 0xDC, 0xDD] + list(range(1, 256))
+    payload = bytes(rng.choice(alphabet) for _ in range(size))
+    return payload if zeros else payload.replace(b"\0", b"\1")
+
+
+def feed_in_pieces(framer, stream, rng):
+    frames = []
+    position = 0
+    while position < len(stream):
+        step = rng.randrange(1, 64)
+        frames += framer.feed(stream[position:position + step])
+        position += step
+    return frames
+
+
+def test_cobs_round_trip():
+    rng = random.Random(1)
+    for _ in range(50):
+        payloads = [random_payload(rng) for _ in range(rng.randrange(1, 20))]
+        stream = b"".join(cobs_encode(payload) + b"\0" for payload in payloads)
+        framer = CobsFramer()
+        assert feed_in_pieces(framer, stream, rng) == payloads
+        assert framer.errors == 0
+
+
+def test_cobs_invalid_frame_is_counted():
+    framer = CobsFramer()
+    assert framer.feed(b"\x05ab\0" + cobs_encode(b"ok") + b"\0") == [b"ok"]
+    assert framer.errors == 1
+
+
+def test_slip_round_trip():
+    rng = random.Random(2)
+    for _ in range(50):
+        payloads = [random_payload(rng) for _ in range(rng.randrange(1, 20))]
+        payloads = [payload for payload in payloads if payload]  # Back-to-back delimiters carry no frame
+        stream = b"".join(b"\xc0" + slip_encode(payload) + b"\xc0" for payload in payloads)
+        assert feed_in_pieces(SlipFramer(), stream, rng) == payloads
+
+
+def test_delimited_framer_resyncs_after_oversized_garbage():
+    framer = SlipFramer(max_frame=16)
+    assert framer.feed(b"x" * 32) == []
+    assert framer.errors == 1
+    assert framer.feed(b"\xc0abc\xc0") == [b"abc"]
+
+
+@pytest.mark.parametrize("header_size,byteorder", [(1, "little"), (2, "little"), (2, "big"), (4, "big")])
+def test_length_prefixed_round_trip(header_size, byteorder):
+    rng = random.Random(header_size)
+    limit = min(600, 256 ** header_size - 1)
+    payloads = [bytes(rng.randrange(256) for _ in range(rng.randrange(limit))) for _ in range(40)]
+    stream = b"".join(len(payload).to_bytes(header_size, byteorder) + payload for payload in payloads)
+    framer = LengthPrefixedFramer(header_size, byteorder)
+    assert feed_in_pieces(framer, stream, rng) == payloads
+
+
+def test_length_prefixed_rejects_oversized_length():
+    framer = LengthPrefixedFramer(2, "little", max_frame=10)
+    assert framer.feed((11).to_bytes(2, "little") + b"x" * 11) == []
+    assert framer.errors == 1
+
+
+def test_make_framer():
+    assert isinstance(make_framer("length", header_size=4), LengthPrefixedFramer)
+    with pytest.raises(ValueError):
+        make_framer("morse")
+
+
+def test_load_decoder():
+    assert load_decoder("binascii:hexlify")(b"\x01") == b"01"
+    with pytest.raises(ValueError):
+        load_decoder("binascii")
+    with pytest.raises(ImportError):
+        load_decoder("no_such_module_here:decode")
+    with pytest.raises(AttributeError):
+        load_decoder("binascii:no_such_function")
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "utf-16-le", "shift_jis"])
+def test_line_framer_decodes_characters_split_across_reads(encoding):
+    rng = random.Random(3)
+    alphabet = "ab \t日本語ÄöЖ€\n"
+    if encoding == "shift_jis":
+        alphabet = "ab \t日本語カナ\n"
+    text = "".join(rng.choice(alphabet) for _ in range(5000)) + "\n"
+    framer = LineFramer(encoding)
+    assert feed_in_pieces(framer, text.encode(encoding), rng) == text.split("\n")[:-1]
+
+
+def test_line_framer_replaces_undecodable_bytes():
+    assert LineFramer("utf-8", "replace").feed(b"ok\xff\n") == ["ok�"]
+    assert LineFramer("utf-8", "backslashreplace").feed(b"ok\xff\n") == ["ok\\xff"]
+
+
+def test_line_framer_passes_on_a_line_that_never_ends():
+    framer = LineFramer(max_frame=100)
+    lines = []
+    for _ in range(10):
+        lines += framer.feed(b"x" * 30)
+    assert all(len(line) >= 100 for line in lines)
+    rest = 300 - len("".join(lines))
+    assert framer.feed(b"\n") == ["x" * rest]
+
+
+def test_make_framer_ignores_text_options_for_binary_framers():
+    assert isinstance(make_framer("cobs", encoding="latin-1", errors="ignore"), CobsFramer)
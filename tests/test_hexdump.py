@@ -0,0 +1,42 @@
+import random
+
+from esp_monitor.hexdump import ROW_BYTES, HexDump
+
+
+def naive_row(offset, chunk):
+    hex_bytes = [f"{byte:02x}" for byte in chunk]
+    row_hex = " ".join(hex_bytes[:8])
+    if len(chunk) > 8:
+        row_hex += "  " + " ".join(hex_bytes[8:])
+    ascii_text = "".join(chr(byte) if 0x20 <= byte < 0x7F else "." for byte in chunk)
+    return f"{offset:08x}  {row_hex:<48}  |{ascii_text}|"
+
+
+def test_rows_match_a_per_byte_formatter():
+    rng = random.Random(1)
+    dump = HexDump(capacity=1024)
+    stream = bytearray()
+    for _ in range(200):
+        chunk = bytes(rng.randrange(256) for _ in range(rng.randrange(0, 100)))
+        dump.extend(chunk)
+        stream += chunk
+        kept = stream[dump.base:]
+        assert dump.base % ROW_BYTES == 0 and len(dump) <= 1024
+        assert dump.total == len(stream) and bytes(dump.data) == bytes(kept)
+        expected = [naive_row(dump.base + start, kept[start:start + ROW_BYTES])
+                    for start in range(0, len(kept), ROW_BYTES)]
+        assert dump.format_rows() == expected
+        if expected:
+            row = rng.randrange(len(expected))
+            assert dump.format_row(row) == expected[row]
+            assert dump.format_rows(row, 3) == expected[row:row + 3]
+
+
+def test_clear_restarts_rows_at_the_stream_offset():
+    dump = HexDump()
+    dump.extend(b"a" * 20)
+    dump.clear()
+    dump.extend(b"0123456789abcdefXY")
+    assert dump.rows == 2
+    assert dump.format_row(0).startswith("00000014  30 31")
+    assert dump.format_row(1) == naive_row(20 + 16, b"XY")
@@ -0,0 +1,84 @@
+import io
+import random
+import re
+
+from esp_monitor.idflog import CSV_COLUMNS, LogStore, parse_batch, parse_line
+
+TAGS = ["wifi", "boot", "main_task", "esp-tls", "a b", ""]
+
+
+def random_line(rng):
+    kind = rng.random()
+    if kind < 0.15:
+        return rng.choice(["", "ets Jun  8 2016 00:22:57", "rst:0x1 (POWERON_RESET)", "plain: text", "\x1b[0m"])
+    level = rng.choice("EWIDV")
+    tick = rng.choice([str(rng.randrange(10 ** 7)), f"{rng.randrange(24):02d}:{rng.randrange(60):02d}:"
+                                                     f"{rng.randrange(60):02d}.{rng.randrange(1000):03d}"])
+    message = rng.choice(["connected", "rssi: -40", "x:y:z", "", "heap 1234"])
+    line = f"{level} ({tick}) {rng.choice(TAGS)}: {message}"
+    if kind < 0.6:
+        line = f"\x1b[0;{rng.choice([31, 32, 33])}m{line}\x1b[0m"
+    elif kind < 0.7:
+        line = f"\x1b[1;{rng.choice([31, 32, 33])}m{line}"
+    return line
+
+
+def test_parse_line_fields():
+    assert parse_line("\x1b[0;32mI (1234) wifi: connected to ap\x1b[0m") == ("I", 1234, "wifi", "connected to ap", 32)
+    assert parse_line("W (01:02:03.456) boot: slow") == ("W", 3723456, "boot", "slow", 0)
+    assert parse_line("rst:0x1 (POWERON_RESET)") == ("-", -1, "", "rst:0x1 (POWERON_RESET)", 0)
+
+
+def test_parse_batch_matches_parse_line():
+    rng = random.Random(1)
+    for _ in range(50):
+        lines = [random_line(rng) for _ in range(rng.randrange(1, 200))]
+        assert parse_batch(lines) == [parse_line(line) for line in lines]
+
+
+def test_parse_batch_handles_embedded_line_breaks():
+    lines = ["I (1) a: one\ntwo", "E (2) b: three"]
+    assert parse_batch(lines) == [parse_line(line) for line in lines]
+
+
+def test_log_store_select_matches_a_scan():
+    rng = random.Random(2)
+    store = LogStore(capacity=400)
+    records = []  # Every record appended, by number
+    for _ in range(30):
+        lines = [random_line(rng) for _ in range(rng.randrange(1, 80))]
+        stamps = list(range(len(records), len(records) + len(lines)))
+        store.extend(lines, stamps, port=rng.choice(["COM1", "COM2"]))
+        records += [parse_line(line) for line in lines]
+        held = range(store.first, store.total)
+        assert store.total == len(records)
+        assert len(store) <= 400
+        for _ in range(5):
+            levels = rng.choice([None, "E", "EW", "-", "IDV"])
+            tags = rng.choice([None, {"wifi"}, {"boot", "a b"}, {"nope"}, {""}])
+            pattern = rng.choice([None, re.compile("rssi"), re.compile("^c")])
+            start = rng.choice([None, store.first, rng.randrange(store.total + 1)])
+            expected = [seq for seq in held
+                        if (start is None or seq >= start)
+                        and (levels is None or records[seq][0] in levels)
+                        and (tags is None or records[seq][2] in tags)
+                        and (pattern is None or pattern.search(records[seq][3]))]
+            assert list(store.select(levels, tags, pattern, start)) == expected
+        seq = rng.choice(held)
+        stamp, port, tick, level, tag, message, color = store.record(seq)
+        assert stamp == seq
+        assert (level, tick, tag, message, color) == records[seq]
+
+
+def test_log_store_copy_and_csv():
+    store = LogStore()
+    store.extend(["I (5) wifi: up", "not a log line"], [1000, 2000], port="COM3")
+    copy = store.copy()
+    store.clear()
+    assert len(store) == 0 and store.total == 2
+    out = io.StringIO()
+    copy.write_csv(out)
+    rows = out.getvalue().splitlines()
+    assert rows[0] == ",".join(CSV_COLUMNS)
+    assert rows[1].endswith(",COM3,5,I,wifi,up")
+    assert rows[2] == "2000,COM3,,,,not a log line"  # Non-log lines have no tick, level or tag
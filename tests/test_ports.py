@@ -0,0 +1,89 @@
+import time
+
+from serial.tools.list_ports_common import ListPortInfo
+
+from esp_monitor.ports import PortWatcher, Reconnector, port_identity
+from esp_monitor.stats import PipelineStats
+
+
+def usb_port(device, serial_number="A1"):
+    info = ListPortInfo(device, skip_link_detection=True)
+    info.vid, info.pid, info.serial_number = 0x10C4, 0xEA60, serial_number
+    return info
+
+
+def test_port_identity_survives_renames():
+    assert port_identity(usb_port("/dev/ttyUSB0")) == port_identity(usb_port("/dev/ttyUSB1"))
+    assert port_identity(usb_port("/dev/ttyUSB0", "B2")) != port_identity(usb_port("/dev/ttyUSB0"))
+    assert port_identity(ListPortInfo("/dev/ttyS0", skip_link_detection=True)) == "/dev/ttyS0"
+
+
+def test_scans_are_diffed_by_identity():
+    listing = [usb_port("/dev/ttyUSB0")]
+    watcher = PortWatcher(list_ports=lambda: list(listing))
+    assert watcher.scan() and watcher.version == 1
+    assert not watcher.events  # The first scan only fills the cache
+    assert not watcher.scan() and watcher.version == 1
+    key = watcher.identity_of("/dev/ttyUSB0")
+    assert watcher.device_for(key) == "/dev/ttyUSB0"
+
+    listing[:] = [usb_port("/dev/ttyUSB1"), usb_port("/dev/ttyUSB2", "B2")]
+    assert watcher.scan() and watcher.version == 2
+    assert watcher.devices() == ["/dev/ttyUSB1", "/dev/ttyUSB2"]
+    assert watcher.device_for(key) == "/dev/ttyUSB1"
+    assert [(kind, info.device) for kind, info in watcher.events] == [
+        ("removed", "/dev/ttyUSB0"), ("added", "/dev/ttyUSB1"), ("added", "/dev/ttyUSB2")]
+
+    listing.clear()
+    assert watcher.scan() and watcher.device_for(key) is None
+    assert watcher.identity_of("/dev/ttyUSB1") == "/dev/ttyUSB1"
+
+
+def test_failed_scan_keeps_the_cache():
+    def broken():
+        raise OSError("no sysfs")
+
+    watcher = PortWatcher(list_ports=broken)
+    assert not watcher.scan()
+    assert isinstance(watcher.error, OSError) and watcher.scans == 0 and watcher.ports == {}
+
+
+def test_backoff_doubles_up_to_the_maximum():
+    reconnector = Reconnector(initial=0.1, maximum=0.3)
+    reconnector.lost("COM3", "id", baudrate=115200)
+    assert "COM3" in reconnector and reconnector.due() == []
+    lost = reconnector.pending["COM3"]
+    delays = []
+    for _ in range(4):
+        lost.next_try = 0  # Time the current delay out
+        assert reconnector.due() == [("COM3", "id", {"baudrate": 115200})]
+        delays.append(lost.delay)
+        reconnector.failed("COM3")
+    assert delays == [0.1, 0.2, 0.3, 0.3]
+    assert lost.next_try > time.monotonic() and reconnector.due() == []
+
+
+def test_reappearing_port_is_tried_once_at_once():
+    reconnector = Reconnector(initial=60)
+    reconnector.lost("COM3", "id")
+    assert reconnector.due(present={"other"}) == []
+    assert reconnector.due(present={"id"}) == [("COM3", "id", {})]
+    reconnector.failed("COM3")
+    assert reconnector.due(present={"id"}) == []  # Still present: wait out the delay
+    assert reconnector.due() == []
+    assert reconnector.due(present={"id"}) == [("COM3", "id", {})]
+
+
+def test_success_reports_the_gap_and_attempts():
+    stats = PipelineStats()
+    reconnector = Reconnector(stats=stats)
+    reconnector.lost("COM3", "id")
+    reconnector.failed("COM3")
+    reconnector.failed("COM3")
+    gap, attempts = reconnector.succeeded("COM3")
+    assert gap >= 0 and attempts == 3
+    assert "COM3" not in reconnector and reconnector.succeeded("COM3") == (0.0, 0)
+    assert stats.counter("reconnect.attempts").value == 3
+    assert stats.histogram("reconnect.gap", "ns").count == 1
+    reconnector.lost("COM4", "id")
+    assert reconnector.cancel("COM4") and not reconnector.cancel("COM4")
@@ -0,0 +1,83 @@
+import glob
+import os
+import random
+import time
+
+import pytest
+
+from esp_monitor.capture import CaptureWriter
+from esp_monitor.replay import ReplayFinished, ReplayPort, is_replay, load_index, parse_replay_url, replay_url
+
+
+def record(directory, chunks, pause=0, **options):
+    writer = CaptureWriter(str(directory), prefix="dev", flush_interval=0.01, on_message=pytest.fail, **options)
+    writer.start()
+    start = time.monotonic_ns()
+    for i, chunk in enumerate(chunks):
+        writer.write(chunk, start + i * 1_000_000)  # 1 ms apart
+        if pause and i % 20 == 19:
+            time.sleep(pause)  # Segments rotate between flushes
+    writer.stop()
+    return writer
+
+
+def play(path, speed=0):
+    port = ReplayPort(path, speed=speed, timeout=1)
+    data = []
+    try:
+        while True:
+            data.append(port.read(port.in_waiting or 1))
+    except ReplayFinished:
+        pass
+    finally:
+        port.close()
+    return data
+
+
+def random_chunks(rng, count=300):
+    return [bytes(rng.randrange(256) for _ in range(rng.randrange(1, 300))) for _ in range(count)]
+
+
+def test_replay_returns_the_captured_bytes(tmp_path):
+    chunks = random_chunks(random.Random(1))
+    writer = record(tmp_path, chunks)
+    segments = glob.glob(str(tmp_path / "dev_*.log"))
+    assert len(segments) == 1
+    assert writer.bytes_written == sum(map(len, chunks)) and writer.dropped == 0
+    index = load_index(segments[0])
+    offsets = [index[3 + 2 * i] for i in range(len(chunks))]
+    assert offsets == [sum(map(len, chunks[:i])) for i in range(len(chunks))]
+    assert b"".join(play(segments[0])) == b"".join(chunks)
+
+
+def test_replay_keeps_the_recorded_timing(tmp_path):
+    record(tmp_path, [b"a", b"b", b"c"] * 20)  # 60 ms of recording
+    path = glob.glob(str(tmp_path / "dev_*.log"))[0]
+    started = time.monotonic()
+    assert b"".join(play(path, speed=1)) == b"abc" * 20
+    assert time.monotonic() - started >= 0.05
+
+
+def test_rotated_and_compressed_segments_replay_in_order(tmp_path):
+    chunks = random_chunks(random.Random(2))
+    record(tmp_path, chunks, pause=0.03, max_bytes=8 * 1024, compression="gzip")
+    deadline = time.monotonic() + 10
+    while glob.glob(str(tmp_path / "dev_*.log")) and time.monotonic() < deadline:
+        time.sleep(0.01)  # Segments are compressed on their own threads
+    segments = sorted(glob.glob(str(tmp_path / "dev_*.log.gz")))
+    assert len(segments) > 1
+    assert all(os.path.exists(segment[:-3] + ".idx") for segment in segments)
+    assert b"".join(b"".join(play(segment)) for segment in segments) == b"".join(chunks)
+
+
+def test_a_plain_log_replays_without_an_index(tmp_path):
+    path = tmp_path / "saved.log"
+    path.write_bytes(b"line 1\nline 2\n")
+    assert b"".join(play(str(path), speed=1)) == b"line 1\nline 2\n"
+
+
+def test_replay_urls():
+    url = replay_url("/tmp/a.log", 2.5)
+    assert is_replay(url)
+    assert parse_replay_url(url) == ("/tmp/a.log", 2.5)
+    assert parse_replay_url("replay:/tmp/a.log") == ("/tmp/a.log", 1.0)
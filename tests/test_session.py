@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+
+import pytest
+
+from esp_monitor.replay import replay_url
+from esp_monitor.session import SessionManager
+
+pty = pytest.importorskip("pty")
+
+
+def open_pty():
+    master, slave = pty.openpty()
+    return master, slave, os.ttyname(slave)
+
+
+def drain_until(engine, count, timeout=5):
+    lines = []
+    deadline = time.monotonic() + timeout
+    while len(lines) < count and time.monotonic() < deadline:
+        lines += engine.drain_lines()[0]
+        time.sleep(0.01)
+    return lines
+
+
+def reader_threads():
+    return [thread.name for thread in threading.enumerate() if thread.name.startswith(("reader-", "serial-selector"))]
+
+
+def test_ports_are_read_by_one_selector_thread():
+    session = SessionManager()
+    ptys = [open_pty() for _ in range(4)]
+    try:
+        engines = [session.add(name, 115200) for _, _, name in ptys]
+        assert reader_threads() == ["serial-selector"]
+        for number, (master, _, _) in enumerate(ptys):
+            os.write(master, b"port %d line 1\nport %d line 2\n" % (number, number))
+        for number, engine in enumerate(engines):
+            assert drain_until(engine, 2) == [f"port {number} line 1", f"port {number} line 2"]
+        assert session.stats.counter(f"read.{engines[0].name}.bytes").value == 28
+        with pytest.raises(ValueError):
+            session.add(ptys[0][2], 115200)
+        session.remove(ptys[0][2])
+        assert ptys[0][2] not in session and len(session) == 3
+    finally:
+        session.close()
+        for master, slave, _ in ptys:
+            os.close(master)
+            os.close(slave)
+    assert not reader_threads()
+
+
+def test_lost_port_reports_an_error():
+    session = SessionManager()
+    master, slave, name = open_pty()
+    try:
+        engine = session.add(name, 115200)
+        os.close(master)
+        os.close(slave)
+        deadline = time.monotonic() + 5
+        while engine.error is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert engine.take_error() is not None
+    finally:
+        session.close()
+
+
+def test_port_without_a_descriptor_gets_a_blocking_reader_thread(tmp_path):
+    capture = tmp_path / "dev.log"
+    capture.write_bytes(b"one\ntwo\n")
+    session = SessionManager()
+    try:
+        engine = session.add(replay_url(str(capture), 0), 115200)
+        assert engine.serial_port.timeout == 1
+        assert drain_until(engine, 2) == ["one", "two"]
+    finally:
+        session.close()
@@ -0,0 +1,53 @@
+import csv
+import io
+import json
+import math
+import random
+
+from esp_monitor.engine import SerialEngine
+from esp_monitor.stats import Histogram, PipelineStats
+
+
+def test_histogram_percentiles_are_within_a_factor_of_two():
+    rng = random.Random(1)
+    for _ in range(20):
+        values = [rng.randrange(0, rng.choice([2, 1000, 10 ** 9])) for _ in range(rng.randrange(1, 500))]
+        histogram = Histogram("ns")
+        for value in values:
+            histogram.record(value)
+        ordered = sorted(values)
+        assert histogram.count == len(values) and histogram.total == sum(values)
+        assert histogram.min == ordered[0] and histogram.max == ordered[-1]
+        for fraction in (0.5, 0.99):
+            exact = ordered[max(0, math.ceil(fraction * len(values)) - 1)]
+            assert exact <= histogram.percentile(fraction) <= 2 * exact
+        assert sum(hits for _, hits in histogram.distribution()) == len(values)
+
+
+def test_negative_values_count_as_zero():
+    histogram = Histogram()
+    histogram.record(-5)
+    assert histogram.min == histogram.max == 0 and histogram.buckets[0] == 1
+
+
+def test_snapshot_rates_and_exports():
+    stats = PipelineStats()
+    stats.counter("read.COM1.bytes").add(100)
+    stats.histogram("decode.time", "ns").record(1500)
+    rows = {row["name"]: row for row in stats.snapshot()}
+    assert rows["read.COM1.bytes"]["count"] == 100 and rows["read.COM1.bytes"]["rate"] > 0
+    assert {row["name"]: row["rate"] for row in stats.snapshot()} == {"read.COM1.bytes": 0, "decode.time": 0}
+    exported = list(csv.DictReader(io.StringIO(stats.to_csv())))
+    assert [row["name"] for row in exported] == ["read.COM1.bytes", "decode.time"]
+    metrics = json.loads(stats.to_json())["metrics"]
+    assert metrics[1]["buckets"] == [[2047, 1]] and metrics[1]["unit"] == "ns"
+
+
+def test_ports_sharing_stats_have_their_own_read_metrics():
+    stats = PipelineStats()
+    engines = [SerialEngine(port, 115200, stats=stats) for port in ("/dev/ttyUSB0", "/dev/ttyUSB1")]
+    for engine in engines:
+        assert engine._read_bytes is stats.counter(f"read.{engine.name}.bytes")
+        assert engine._queue_dropped is stats.counter(f"queue.{engine.name}.dropped")
+    assert engines[0]._read_bytes is not engines[1]._read_bytes
+    assert engines[0]._decode_lines is engines[1]._decode_lines  # Written by the one drain loop
@@ -0,0 +1,89 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from esp_monitor.stats import PipelineStats  # noqa: E402
+from esp_monitor.telemetry import BLOCK, ChannelRing, TelemetryStore, parse_batch  # noqa: E402
+
+
+def test_channel_ring_keeps_the_newest_samples():
+    rng = random.Random(1)
+    ring = ChannelRing(100)
+    capacity = ring.capacity
+    assert capacity == BLOCK  # Rounded up to whole blocks
+    model = []
+    for _ in range(200):
+        samples = [rng.random() for _ in range(rng.choice([0, 1, 7, 99, 100, 250, capacity, 600]))]
+        ring.extend(np.array(samples))
+        model = (model + samples)[-capacity:]
+        assert list(ring.ordered()) == model
+        count = rng.randrange(0, capacity + 20)
+        assert list(ring.ordered(count)) == (model[-count:] if count else [])
+
+
+def test_block_summaries_match_the_samples():
+    rng = random.Random(2)
+    ring = ChannelRing(4 * BLOCK)
+    stream = []
+    for _ in range(300):
+        samples = [rng.uniform(-1, 1) for _ in range(rng.choice([1, 50, BLOCK, 3 * BLOCK, 5 * BLOCK + 7]))]
+        ring.extend(np.array(samples))
+        stream += samples
+        window = rng.randrange(BLOCK, 5 * BLOCK)
+        minima, maxima, step = ring.recent(window, 1)
+        assert step == BLOCK
+        tail = len(stream) % BLOCK
+        count = min((min(len(stream), 4 * BLOCK) - tail) // BLOCK, (window - tail) // BLOCK)
+        first = len(stream) - tail - count * BLOCK
+        pairs = [stream[start:start + BLOCK] for start in range(first, len(stream) - tail, BLOCK)]
+        if tail:
+            pairs.append(stream[-tail:])
+        assert list(minima) == [min(pair) for pair in pairs]
+        assert list(maxima) == [max(pair) for pair in pairs]
+
+
+def test_parse_batch():
+    channels = parse_batch(["temp=23.5, rpm=1200", "boot", "1,2.5,-3", "temp=24", "4,5e1,6"])
+    assert list(channels["temp"]) == [23.5, 24.0]
+    assert list(channels["rpm"]) == [1200.0]
+    assert list(channels["c1"]) == [2.5, 50.0]
+
+
+def test_pending_batches_are_bounded():
+    stats = PipelineStats()
+    store = TelemetryStore(max_pending=4, stats=stats)
+    store.close()
+    store._thread.join()  # Nothing parses from here on
+    for i in range(10):
+        store.submit([f"x={i}"])
+    assert store.dropped == 6
+    assert len(store._pending) == 4
+    assert stats.counter("telemetry.dropped").value == 6
+
+
+def test_snapshot_keeps_ports_apart():
+    store = TelemetryStore(capacity=1000)
+    store.close()
+    store.ingest(["temp=20", "1,2"], "COM1")
+    store.ingest(["temp=30", "3,4"], "COM2")
+    snapshot = store.snapshot(100, 50)
+    assert sorted(snapshot) == ["[COM1] c0", "[COM1] c1", "[COM1] temp", "[COM2] c0", "[COM2] c1", "[COM2] temp"]
+    assert snapshot["[COM2] temp"][3] == 30.0
+    store.clear()
+    store.ingest(["temp=21"], "COM1")
+    assert list(store.snapshot(100, 50)) == ["temp"]
+
+
+def test_wide_windows_decimate_from_block_summaries():
+    store = TelemetryStore(capacity=64 * BLOCK)
+    store.close()
+    rng = random.Random(3)
+    samples = [rng.uniform(-1, 1) for _ in range(40 * BLOCK + 17)]
+    store.ingest([f"v={value!r}" for value in samples])
+    positions, minima, maxima, last = store.snapshot(32 * BLOCK, 8)["v"]
+    assert last == samples[-1] and len(minima) == 8
+    assert min(samples[-32 * BLOCK:]) <= minima.min() and maxima.max() <= max(samples[-32 * BLOCK:])
+    assert maxima.max() == max(samples[-31 * BLOCK - 17:])  # Whole blocks plus the incomplete newest one
+    assert positions[-1] < 32 * BLOCK
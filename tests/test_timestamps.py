@@ -0,0 +1,41 @@
+import random
+import time
+from datetime import datetime
+
+import pytest
+
+from esp_monitor.timestamps import TimestampFormatter
+
+
+FORMATS = {"clock": ("%H:%M:%S", 0), "clock-ms": ("%H:%M:%S.%f", 3), "clock-us": ("%H:%M:%S.%f", 0)}
+
+
+def test_clock_modes_match_strftime():
+    rng = random.Random(1)
+    formatters = {mode: TimestampFormatter(mode) for mode in FORMATS}
+    offset = formatters["clock"]._wall_offset
+    for formatter in formatters.values():
+        formatter._wall_offset = offset
+    stamp = time.monotonic_ns()
+    for _ in range(2000):
+        stamp += rng.choice([1, 999, 1_000_000, 400_000_000, 3_600_000_000_000])
+        seconds, ns = divmod(stamp + offset, 1_000_000_000)
+        wall = datetime.fromtimestamp(seconds).replace(microsecond=ns // 1000)
+        for mode, (pattern, cut) in FORMATS.items():
+            text = wall.strftime(pattern)
+            assert formatters[mode].format(stamp) == f"[{text[:len(text) - cut]}]"
+
+
+def test_relative_modes():
+    delta = TimestampFormatter("delta")
+    assert delta.prefix_lines(["a", "b"], [10, 1_500_000_010]) == ["[+0.000000] a", "[+1.500000] b"]
+    assert delta.prefix_lines(["c"], [2_000_000_010], previous=1_500_000_010) == ["[+0.500000] c"]
+    elapsed = TimestampFormatter("elapsed", origin=1_000_000_000)
+    assert elapsed.format(3_250_000_000) == "[2.250000]"
+    assert elapsed.copy().format(3_250_000_000) == "[2.250000]"
+
+
+def test_off_and_unknown_modes():
+    assert TimestampFormatter("off").prefix_lines(["a"], [1]) == ["a"]
+    with pytest.raises(ValueError):
+        TimestampFormatter("iso")
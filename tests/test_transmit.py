@@ -0,0 +1,133 @@
+import threading
+import time
+
+import pytest
+
+from esp_monitor.stats import PipelineStats
+from esp_monitor.transmit import Macro, MacroRunner, Transmitter
+
+
+class Port:
+    """Engine stand-in that records what the TX thread writes."""
+
+    port = "COM1"
+
+    def __init__(self):
+        self.written = bytearray()
+
+    def write(self, data):
+        self.written += data
+
+
+def wait_sent(item, timeout=5):
+    deadline = time.monotonic() + timeout
+    while item.sent_at is None and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert item.sent_at is not None
+
+
+def test_concurrent_senders_start_one_tx_thread():
+    transmitter = Transmitter()
+    port = Port()
+    start = threading.Barrier(8)
+
+    def sender():
+        start.wait()
+        for _ in range(100):
+            transmitter.send(port, b"x")
+
+    threads = [threading.Thread(target=sender) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wait_sent(transmitter.send(port, b"!"))
+    assert sum(thread.name == "transmitter" for thread in threading.enumerate()) == 1
+    transmitter.close()
+    assert bytes(port.written) == b"x" * 800 + b"!"
+
+
+def test_full_queue_refuses_items():
+    transmitter = Transmitter(max_queue=2)
+    transmitter.queue.extend([None, None])  # As if the TX thread were stuck
+    assert transmitter.send(Port(), b"x") is None
+    assert transmitter.dropped == 1
+
+
+def test_write_errors_are_reported():
+    class Broken(Port):
+        def write(self, data):
+            raise OSError("gone")
+
+    transmitter = Transmitter()
+    item = transmitter.send(Broken(), b"x")
+    deadline = time.monotonic() + 5
+    while not transmitter.errors and time.monotonic() < deadline:
+        time.sleep(0.001)
+    transmitter.close()
+    assert transmitter.errors[0][0] == "COM1" and str(item.error) == "gone"
+
+
+def test_macro_parse():
+    macro = Macro.parse("# comment\n\ntimeout 2\nsend  AT+GMR\nexpect ^OK$\nsleep 0.5\n")
+    assert [kind for kind, _ in macro.steps] == ["timeout", "send", "expect", "sleep"]
+    assert macro.steps[1] == ("send", " AT+GMR")
+    for bad in ["jump 3", "expect (", "sleep soon"]:
+        with pytest.raises(ValueError, match="line 1"):
+            Macro.parse(bad)
+
+
+def run_until_done(runner, respond, timeout=5):
+    """Poll like the front ends do, answering each command with respond(command)."""
+    messages = []
+    port = runner.engine
+    answered = 0
+    deadline = time.monotonic() + timeout
+    while not runner.done and time.monotonic() < deadline:
+        lines = []
+        commands = bytes(port.written).split(b"\r\n")[:-1]
+        for command in commands[answered:]:
+            lines += respond(command.decode())
+        answered = len(commands)
+        messages += runner.poll(lines, [time.monotonic_ns()] * len(lines))
+        time.sleep(0.001)
+    return messages
+
+
+def test_macro_runner_records_round_trips():
+    stats = PipelineStats()
+    transmitter = Transmitter()
+    runner = MacroRunner(Macro.parse("send AT\nexpect ^OK$\nsend AT+GMR\nexpect ^OK$"), transmitter, Port(), stats)
+    messages = run_until_done(runner, lambda command: ["noise", "OK"])
+    transmitter.close()
+    assert runner.error is None
+    assert [label for label, _ in runner.results] == ["AT", "AT+GMR"]
+    assert all(rtt >= 0 for _, rtt in runner.results)
+    assert messages[-1] == "macro: done"
+    assert stats.histogram("tx.rtt", "ns").count == 2
+
+
+def test_macro_runner_ignores_lines_from_before_the_command():
+    transmitter = Transmitter()
+    runner = MacroRunner(Macro.parse("timeout 0.2\nsend AT\nexpect ^OK$"), transmitter, Port())
+    early = time.monotonic_ns()
+    runner.poll()  # Queues the send
+    wait_sent(runner._last_sent)
+    runner.poll(["OK"], [early])
+    assert not runner.done
+    messages = run_until_done(runner, lambda command: [])
+    transmitter.close()
+    assert runner.error == "timed out waiting for '^OK$'"
+    assert "step 3 failed" in messages[-1]
+
+
+def test_macro_runner_sleeps_without_blocking():
+    transmitter = Transmitter()
+    runner = MacroRunner(Macro.parse("sleep 0.05\nsend AT"), transmitter, Port())
+    started = time.monotonic()
+    runner.poll()
+    assert not runner.done and time.monotonic() - started < 0.05
+    run_until_done(runner, lambda command: [])
+    transmitter.close()
+    assert runner.done and runner.error is None
+    assert time.monotonic() - started >= 0.05